@@ -1,9 +1,58 @@
 # SPDX-FileCopyrightText: 2022-present Ravi Terala <terala.work@gmail.com>
 # SPDX-License-Identifier: MIT
 """pagerduty module exported APIs
+
+Modules are imported on first access to their names (PEP 562), so that
+`import aiopagerduty` does not load aiohttp, pydantic or the models until
+they are used.
 """
-from aiopagerduty.client import *
-from aiopagerduty.fetcher import Error
-from aiopagerduty.models import *
+import importlib
+import importlib.util
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from aiopagerduty.client import Client
+    from aiopagerduty.fetcher import Error
+    from aiopagerduty.models import *
+    from aiopagerduty.pool import AccountResult, ClientPool
+    from aiopagerduty.transport import Transport
+
+# Exported name -> module defining it. Any other name is looked up in
+# aiopagerduty.models.
+_EXPORTS = {
+    'Client': 'aiopagerduty.client',
+    'Error': 'aiopagerduty.fetcher',
+    'AccountResult': 'aiopagerduty.pool',
+    'ClientPool': 'aiopagerduty.pool',
+    'Transport': 'aiopagerduty.transport',
+}
+_MODELS = 'aiopagerduty.models'
+
+
+def _public(module: Any) -> List[str]:
+    return [name for name in vars(module) if not name.startswith('_')]
+
+
+def __getattr__(name: str) -> Any:  # pylint: disable=invalid-name
+    if name == '__all__':
+        return [*_EXPORTS, *_public(importlib.import_module(_MODELS))]
+    if name.startswith('__'):
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    elif importlib.util.find_spec(f'{__name__}.{name}') is not None:
+        # Submodules used to be imported along with the package.
+        value = importlib.import_module(f'{__name__}.{name}')
+    else:
+        try:
+            value = getattr(importlib.import_module(_MODELS), name)
+        except AttributeError:
+            raise AttributeError(
+                f'module {__name__!r} has no attribute {name!r}') from None
+    # Later accesses skip __getattr__.
+    globals()[name] = value
+    return value
+
 
-__all_ = [Client, Error, ObjectRef]
+def __dir__() -> List[str]:  # pylint: disable=invalid-name
+    return sorted({*globals(), *_EXPORTS})
@@ -0,0 +1,344 @@
+"""Incident response analytics.
+
+`IncidentTable` holds incidents as parallel columns: timestamps in `array`
+columns, and services, teams, priorities and urgencies as integer keys
+into interned ids. Metrics are computed over whole columns and grouped by
+key, instead of walking incident models::
+
+    table = IncidentTable()
+    async for incident in client.iter_incidents(since, until):
+        table.add_incident(incident)
+    table.add_log_entries(log_entries)
+    table.percentiles(table.time_to_ack(), 'service')
+    table.ack_timeout_breaches(await client.list_services())
+
+Incidents are grouped by service, first team, priority id or urgency;
+incidents without a team or priority are left out of those groups.
+Priority ids are named by `list_priorities`.
+
+Acknowledgements are taken from the incidents, and from the log entries
+when given, as PagerDuty drops them from resolved incidents. Log entries
+are the json of the `log_entries` API: notifications count as pages of
+their user, acknowledgements set the acknowledgement time of their
+incident, other entries are ignored.
+
+Times are in seconds. Incidents not acknowledged or not resolved have a
+NaN time to acknowledge or resolve, which metrics skip.
+"""
+
+import collections
+import math
+import time
+from array import array
+from typing import (Any, Counter, Dict, Iterable, List, NamedTuple, Optional,
+                    Sequence)
+
+from pydantic.datetime_parse import parse_datetime
+
+from aiopagerduty.models import Incident, Service
+
+GROUPS = ('service', 'team', 'priority', 'urgency')
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+_NO_KEY = -1
+
+
+class Histogram(NamedTuple):
+    """Counts of incidents per time bucket.
+    """
+    start: float  # Timestamp of the first bucket
+    bucket: float  # Length of the buckets
+    counts: Dict[str, 'array[int]']  # Group key -> count of each bucket
+
+
+def _timestamp(value: Optional[str]) -> float:
+    if value is None:
+        return math.nan
+    return parse_datetime(value).timestamp()
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    # Linear interpolation between the closest ranks of sorted values.
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class IncidentTable:
+    """Incidents as columns.
+    """
+
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self.created = array('d')
+        self.acknowledged = array('d')
+        self.resolved = array('d')
+        # Group -> key of each incident, _NO_KEY when it has none
+        self.keys: Dict[str, 'array[int]'] = {
+            group: array('l') for group in GROUPS
+        }
+        # Group -> ids of the keys
+        self.names: Dict[str, List[str]] = {group: [] for group in GROUPS}
+        self._ints: Dict[str, Dict[str, int]] = {
+            group: {} for group in GROUPS
+        }
+        # Incident id -> row
+        self._rows: Dict[str, int] = {}
+        # Row of the incident and user key of each notification
+        self._page_rows = array('l')
+        self._page_users = array('l')
+        self.users: List[str] = []
+        self._user_ints: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _key(self, group: str, obj_id: Optional[str]) -> int:
+        if obj_id is None:
+            return _NO_KEY
+        ints = self._ints[group]
+        key = ints.get(obj_id)
+        if key is None:
+            key = ints[obj_id] = len(ints)
+            self.names[group].append(obj_id)
+        return key
+
+    # pylint: disable=too-many-arguments
+    def add(self, incident_id: str, created: float, acknowledged: float,
+            resolved: float, service_id: str, team_id: Optional[str],
+            priority_id: Optional[str], urgency: str) -> None:
+        """Add an incident, unless it was already added.
+
+        Args:
+            incident_id (str): Id of the incident.
+            created (float): Creation timestamp.
+            acknowledged (float): First acknowledgement timestamp, or NaN.
+            resolved (float): Resolution timestamp, or NaN.
+            service_id (str): Id of its service.
+            team_id (str): Id of its first team, if any.
+            priority_id (str): Id of its priority, if any.
+            urgency (str): Its urgency.
+        """
+        if incident_id in self._rows:
+            # Incidents on the boundary of crawled windows come twice.
+            return
+        self._rows[incident_id] = len(self.ids)
+        self.ids.append(incident_id)
+        self.created.append(created)
+        self.acknowledged.append(acknowledged)
+        self.resolved.append(resolved)
+        keys = self.keys
+        keys['service'].append(self._key('service', service_id))
+        keys['team'].append(self._key('team', team_id))
+        keys['priority'].append(self._key('priority', priority_id))
+        keys['urgency'].append(self._key('urgency', urgency))
+
+    def add_incident(self, incident: Incident) -> None:
+        """Add an incident model.
+        """
+        acknowledged = min((ack.at.timestamp()
+                            for ack in incident.acknowledgements or []),
+                           default=math.nan)
+        resolved = math.nan
+        if incident.resolved_at is not None:
+            resolved = incident.resolved_at.timestamp()
+        self.add(incident.id, incident.created_at.timestamp(), acknowledged,
+                 resolved, incident.service.id,
+                 incident.teams[0].id if incident.teams else None,
+                 incident.priority.id if incident.priority else None,
+                 incident.urgency)
+
+    def add_json(self, items: Iterable[Dict[str, Any]]) -> None:
+        """Add incidents as decoded json, eg. from `list_incidents_raw`
+        pages, without building their models.
+        """
+        for item in items:
+            acknowledged = min((_timestamp(ack['at'])
+                                for ack in item.get('acknowledgements') or []),
+                               default=math.nan)
+            teams = item.get('teams')
+            priority = item.get('priority')
+            self.add(item['id'], _timestamp(item['created_at']), acknowledged,
+                     _timestamp(item.get('resolved_at')),
+                     item['service']['id'], teams[0]['id'] if teams else None,
+                     priority['id'] if priority else None, item['urgency'])
+
+    def add_log_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Add the log entries of incidents already added.
+
+        Entries of other incidents are ignored.
+        """
+        rows = self._rows
+        for entry in entries:
+            incident_id = (entry.get('incident') or {}).get('id')
+            row = rows.get(incident_id) if incident_id is not None else None
+            if row is None:
+                continue
+            entry_type = entry['type']
+            if entry_type.startswith('notify_log_entry'):
+                user_id = entry['user']['id']
+                user = self._user_ints.get(user_id)
+                if user is None:
+                    user = self._user_ints[user_id] = len(self.users)
+                    self.users.append(user_id)
+                self._page_rows.append(row)
+                self._page_users.append(user)
+            elif entry_type.startswith('acknowledge_log_entry'):
+                at = _timestamp(entry['created_at'])
+                if (math.isnan(self.acknowledged[row]) or
+                        at < self.acknowledged[row]):
+                    self.acknowledged[row] = at
+
+    def time_to_ack(self) -> 'array[float]':
+        """Time from creation to first acknowledgement of each incident.
+        """
+        return array('d', [acknowledged - created for acknowledged, created
+                           in zip(self.acknowledged, self.created)])
+
+    def time_to_resolve(self) -> 'array[float]':
+        """Time from creation to resolution of each incident.
+        """
+        return array('d', [resolved - created for resolved, created
+                           in zip(self.resolved, self.created)])
+
+    def _grouped(self, values: Sequence[float],
+                 by: Optional[str]) -> Dict[str, List[float]]:
+        # Group key -> values, without NaNs
+        if len(values) != len(self.ids):
+            raise ValueError('Values differ in length from the incidents')
+        if by is None:
+            return {'': [value for value in values if not math.isnan(value)]}
+        names = self.names[by]
+        grouped: Dict[int, List[float]] = collections.defaultdict(list)
+        for key, value in zip(self.keys[by], values):
+            if key != _NO_KEY and not math.isnan(value):
+                grouped[key].append(value)
+        return {names[key]: group for key, group in grouped.items()}
+
+    def percentiles(
+            self, values: Sequence[float], by: Optional[str] = None,
+            percentiles: Sequence[float] = DEFAULT_PERCENTILES
+    ) -> Dict[str, List[float]]:
+        """Percentiles of a metric per group.
+
+        Args:
+            values (Sequence[float]): Metric of each incident, eg.
+                                      `time_to_ack()`.
+            by (str): Group, one of GROUPS, or None for all incidents,
+                      under the '' key.
+            percentiles (Sequence[float]): Percentiles, from 0 to 100.
+
+        Returns:
+            Dict[str, List[float]]: Group key to the percentiles of its
+                                    metric, for groups with a value.
+        """
+        result = {}
+        for key, group in self._grouped(values, by).items():
+            if group:
+                group.sort()
+                result[key] = [_percentile(group, q) for q in percentiles]
+        return result
+
+    def means(self, values: Sequence[float],
+              by: Optional[str] = None) -> Dict[str, float]:
+        """Mean of a metric per group, eg. MTTA for `time_to_ack()`.
+        """
+        return {
+            key: math.fsum(group) / len(group)
+            for key, group in self._grouped(values, by).items() if group
+        }
+
+    def histogram(self, by: Optional[str] = None, bucket: float = 3600,
+                  column: Optional['array[float]'] = None) -> Histogram:
+        """Counts of incidents per time bucket and group.
+
+        Args:
+            by (str): Group, one of GROUPS, or None for all incidents,
+                      under the '' key.
+            bucket (float): Length of the buckets.
+            column (array): Timestamps counted, `created` by default.
+                            NaNs are skipped.
+
+        Returns:
+            Histogram: Counts, from the bucket of the earliest timestamp.
+        """
+        if column is None:
+            column = self.created
+        present = [t for t in column if not math.isnan(t)]
+        if not present:
+            return Histogram(0.0, bucket, {})
+        start = min(present) // bucket * bucket
+        size = int((max(present) - start) // bucket) + 1
+        keys = self.keys[by] if by is not None else [0] * len(column)
+        names = self.names[by] if by is not None else ['']
+        counts: Dict[int, 'array[int]'] = {}
+        for key, t in zip(keys, column):
+            if key == _NO_KEY or math.isnan(t):
+                continue
+            buckets = counts.get(key)
+            if buckets is None:
+                buckets = counts[key] = array('l', [0]) * size
+            buckets[int((t - start) // bucket)] += 1
+        return Histogram(start, bucket,
+                         {names[key]: buckets for key, buckets in counts.items()})
+
+    def ack_timeout_breaches(self, services: Iterable[Service],
+                             now: Optional[float] = None
+                             ) -> Dict[str, List[str]]:
+        """Incidents acknowledged for longer than the acknowledgement
+        timeout of their service, ie. that were triggered again.
+
+        Incidents not resolved are acknowledged until `now`, the current
+        time by default. Services without a timeout are never breached.
+
+        Returns:
+            Dict[str, List[str]]: Service id to the ids of its breaching
+                                  incidents.
+        """
+        if now is None:
+            now = time.time()
+        # Timeout of each service key
+        timeouts = array('d', [math.inf]) * len(self.names['service'])
+        ints = self._ints['service']
+        for service in services:
+            key = ints.get(service.id)
+            if key is not None and service.acknowledgement_timeout:
+                timeouts[key] = service.acknowledgement_timeout
+        names = self.names['service']
+        breaches: Dict[str, List[str]] = collections.defaultdict(list)
+        for incident_id, key, acknowledged, resolved in zip(
+                self.ids, self.keys['service'], self.acknowledged,
+                self.resolved):
+            if math.isnan(acknowledged):
+                continue
+            end = now if math.isnan(resolved) else resolved
+            if end - acknowledged > timeouts[key]:
+                breaches[names[key]].append(incident_id)
+        return dict(breaches)
+
+    def pages(self, by: Optional[str] = None) -> Dict[str, Counter[str]]:
+        """Notifications per responder, from the log entries.
+
+        Args:
+            by (str): Group, one of GROUPS, or None for all incidents,
+                      under the '' key.
+
+        Returns:
+            Dict[str, Counter[str]]: Group key to the count of pages of
+                                     each user id.
+        """
+        width = len(self.users)
+        keys = self.keys[by] if by is not None else None
+        # Counts of (group key, user) pairs, in a single integer each
+        pairs = collections.Counter(
+            (keys[row] if keys is not None else 0) * width + user
+            for row, user in zip(self._page_rows, self._page_users))
+        names = self.names[by] if by is not None else ['']
+        pages: Dict[str, Counter[str]] = {}
+        for pair, count in pairs.items():
+            key, user = divmod(pair, width)
+            if key == _NO_KEY:
+                continue
+            pages.setdefault(names[key], collections.Counter())[
+                self.users[user]] = count
+        return pages
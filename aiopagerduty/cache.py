@@ -0,0 +1,111 @@
+"""Catalog cache of list results.
+
+Clients configured with a cache serve `list_services()`, `list_users()` and
+the other catalog lists from it, and only crawl the API when the cached
+collection is missing or expired. Collections are stored as the item json,
+keyed by the collection url (eg. 'services') and by item id within it, so
+that single items can be patched in place.
+
+Backends whose calls may block, eg. on a database lock, set `blocking`;
+the client then makes its calls in the default executor, off the event
+loop.
+"""
+
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+JsonObj = Dict[str, Any]
+
+
+class CacheBackend(Protocol):
+    """Storage of cached collections.
+    """
+
+    # Whether calls may block, and are made off the event loop.
+    blocking: bool
+
+    def get(self, key: str) -> Optional[List[JsonObj]]:
+        """Items of a collection, None if it is missing or expired."""
+
+    def get_item(self, key: str, item_id: str) -> Optional[JsonObj]:
+        """One item of a collection, None if it is not cached."""
+
+    def set(self, key: str, items: List[JsonObj], ttl: float) -> None:
+        """Replace a collection with items, valid for ttl seconds."""
+
+    def upsert(self, key: str, item: JsonObj) -> None:
+        """Insert or replace one item of a cached collection, by its id.
+        Does nothing if the collection is not cached."""
+
+    def remove(self, key: str, item_id: str) -> None:
+        """Remove one item of a cached collection."""
+
+    def invalidate(self, key: str) -> None:
+        """Drop a collection so that the next read refetches it."""
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """Take the right to refresh a collection for ttl seconds. Fails if
+        another owner holds an unexpired lease."""
+
+    def release_lease(self, key: str, owner: str) -> None:
+        """Give up a lease taken with acquire_lease."""
+
+
+def new_owner() -> str:
+    """Unique lease owner id."""
+    return uuid.uuid4().hex
+
+
+class MemoryCache:
+    """In-process cache backend.
+    """
+
+    blocking = False
+
+    def __init__(self) -> None:
+        # key -> (expiry, items keyed by id)
+        self._collections: Dict[str, Tuple[float, Dict[str, JsonObj]]] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def get(self, key: str) -> Optional[List[JsonObj]]:
+        entry = self._collections.get(key)
+        if entry is None or entry[0] < time.time():
+            return None
+        return list(entry[1].values())
+
+    def get_item(self, key: str, item_id: str) -> Optional[JsonObj]:
+        entry = self._collections.get(key)
+        if entry is None or entry[0] < time.time():
+            return None
+        return entry[1].get(item_id)
+
+    def set(self, key: str, items: List[JsonObj], ttl: float) -> None:
+        self._collections[key] = (time.time() + ttl,
+                                  {item['id']: item for item in items})
+
+    def upsert(self, key: str, item: JsonObj) -> None:
+        entry = self._collections.get(key)
+        if entry is not None:
+            entry[1][item['id']] = item
+
+    def remove(self, key: str, item_id: str) -> None:
+        entry = self._collections.get(key)
+        if entry is not None:
+            entry[1].pop(item_id, None)
+
+    def invalidate(self, key: str) -> None:
+        self._collections.pop(key, None)
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        holder = self._leases.get(key)
+        now = time.time()
+        if holder is not None and holder[0] != owner and holder[1] > now:
+            return False
+        self._leases[key] = (owner, now + ttl)
+        return True
+
+    def release_lease(self, key: str, owner: str) -> None:
+        holder = self._leases.get(key)
+        if holder is not None and holder[0] == owner:
+            del self._leases[key]
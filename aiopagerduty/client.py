@@ -1,8 +1,11 @@
 """aiopagerduty Client module
 """
 
+from typing import Any
+
 from aiopagerduty.escalationpolicy_mixin import EscalationPolicyMixin
 from aiopagerduty.fetcher import Fetcher
+from aiopagerduty.incidents_mixin import IncidentsMixin
 from aiopagerduty.integrations_mixin import IntegrationsMixin
 from aiopagerduty.prioritites_mixin import PrioritiesMixin
 from aiopagerduty.serviceorchestration_mixin import ServiceOrchestrationsMixin
@@ -14,10 +17,12 @@ from aiopagerduty.vendors_mixin import VendorsMixin
 
 class Client(ServiceOrchestrationsMixin, VendorsMixin, PrioritiesMixin,
              TeamsMixin, ServicesMixin, UsersMixin, IntegrationsMixin,
-             EscalationPolicyMixin,
+             EscalationPolicyMixin, IncidentsMixin,
              Fetcher):
     """aiopagerduty Client API
+
+    Keyword arguments, such as `base_url`, are passed on to `Fetcher`.
     """
 
-    def __init__(self, api_key: str) -> None:
-        super().__init__(api_key=api_key)
+    def __init__(self, api_key: str, **kwargs: Any) -> None:
+        super().__init__(api_key=api_key, **kwargs)
@@ -0,0 +1,227 @@
+"""Offline simulation of escalation policies.
+
+An incident notifies the targets of the first rule of its escalation
+policy when it is created, then escalates to the next rule each time the
+escalation delay of the current rule runs out before the incident is
+acknowledged. After the last rule, the rules are repeated `num_loops`
+times, and the incident stays on the last rule once the loops are done.
+
+`EscalationSimulator` compiles every policy once into a schedule of steps,
+the offset from the creation of the incident and the targets of each
+notification, and simulates large batches of incidents given as parallel
+sequences of policy ids, creation timestamps and acknowledgement delays::
+
+    simulator = EscalationSimulator(policies)
+    load = simulator.target_load(policy_ids, starts, ack_delays)
+    print(load.most_common(10))
+
+Times are in seconds, an acknowledgement delay of `math.inf` stands for an
+incident never acknowledged. Targets are users or schedules, as referenced
+by the rules; schedules are not resolved to the users on call.
+"""
+
+import bisect
+import collections
+from array import array
+from typing import (Counter, Dict, Iterable, Iterator, List, NamedTuple,
+                    Sequence, Tuple)
+
+from aiopagerduty.models import EscalationPolicy, ObjectRef
+
+
+class Notification(NamedTuple):
+    """Targets notified for an incident.
+    """
+    incident: int  # Index of the incident in the batch
+    at: float  # Timestamp of the notification
+    step: int  # Step of the schedule, across loops
+    rule_id: str
+    targets: List[ObjectRef]
+
+
+class CompiledPolicy:
+    """Notification schedule of an escalation policy.
+    """
+
+    def __init__(self, policy: EscalationPolicy) -> None:
+        """Constructor
+
+        Args:
+            policy (EscalationPolicy): Policy to simulate.
+
+        Raises:
+            ValueError: If the policy has no escalation rule.
+        """
+        if not policy.escalation_rules:
+            raise ValueError(f'Escalation policy {policy.id} has no rules')
+        self.id = policy.id
+        rules = policy.escalation_rules * ((policy.num_loops or 0) + 1)
+        # Offset of each step from the creation of the incident
+        self.offsets = array('d')
+        offset = 0.0
+        for rule in rules:
+            self.offsets.append(offset)
+            offset += rule.escalation_delay_in_minutes * 60.0
+        self.rule_ids = [rule.id for rule in rules]
+        self.targets = [rule.targets for rule in rules]
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def steps(self, ack_delay: float) -> int:
+        """Number of steps notified before an incident is acknowledged.
+
+        The first step is notified on creation, and a step due when the
+        incident is acknowledged is not.
+        """
+        return bisect.bisect_left(self.offsets, ack_delay) or 1
+
+
+class EscalationSimulator:
+    """Escalation policies compiled for simulation.
+    """
+
+    def __init__(self, policies: Iterable[EscalationPolicy]) -> None:
+        """Constructor
+
+        Args:
+            policies (Iterable[EscalationPolicy]): Policies to simulate.
+
+        Raises:
+            ValueError: If a policy has no escalation rule.
+        """
+        self.policies: Dict[str, CompiledPolicy] = {
+            policy.id: CompiledPolicy(policy) for policy in policies
+        }
+
+    @staticmethod
+    def _group(policy_ids: Sequence[str],
+               *columns: Sequence[float]) -> Dict[str, List[int]]:
+        # Indexes of the incidents of each policy
+        if any(len(column) != len(policy_ids) for column in columns):
+            raise ValueError('Sequences differ in length')
+        groups: Dict[str, List[int]] = collections.defaultdict(list)
+        for i, policy_id in enumerate(policy_ids):
+            groups[policy_id].append(i)
+        return groups
+
+    def step_counts(self, policy_ids: Sequence[str],
+                    ack_delays: Sequence[float]) -> 'array[int]':
+        """Number of steps notified for each incident.
+
+        Args:
+            policy_ids (Sequence[str]): Escalation policy of each incident.
+            ack_delays (Sequence[float]): Delay before each incident is
+                                          acknowledged.
+
+        Returns:
+            array[int]: Step count of each incident, in order.
+
+        Raises:
+            KeyError: If a policy is unknown.
+            ValueError: If the sequences differ in length.
+        """
+        counts = array('l', [0]) * len(policy_ids)
+        groups = self._group(policy_ids, ack_delays)
+        bisect_left = bisect.bisect_left
+        for policy_id, indexes in groups.items():
+            offsets = self.policies[policy_id].offsets
+            for i in indexes:
+                counts[i] = bisect_left(offsets, ack_delays[i]) or 1
+        return counts
+
+    def simulate(self, policy_ids: Sequence[str], starts: Sequence[float],
+                 ack_delays: Sequence[float]) -> Iterator[Notification]:
+        """Notifications of a batch of incidents, lazily.
+
+        Notifications come grouped per policy, and in order of steps for
+        each incident.
+
+        Args:
+            policy_ids (Sequence[str]): Escalation policy of each incident.
+            starts (Sequence[float]): Creation time of each incident.
+            ack_delays (Sequence[float]): Delay before each incident is
+                                          acknowledged.
+
+        Yields:
+            Notification: Notification of the targets of a step.
+
+        Raises:
+            KeyError: If a policy is unknown.
+            ValueError: If the sequences differ in length.
+        """
+        groups = self._group(policy_ids, starts, ack_delays)
+        for policy_id, indexes in groups.items():
+            policy = self.policies[policy_id]
+            steps = list(zip(range(len(policy)), policy.offsets,
+                             policy.rule_ids, policy.targets))
+            for i in indexes:
+                start = starts[i]
+                for step, offset, rule_id, targets in steps[:policy.steps(
+                        ack_delays[i])]:
+                    yield Notification(i, start + offset, step, rule_id,
+                                       targets)
+
+    def target_load(self, policy_ids: Sequence[str], starts: Sequence[float],
+                    ack_delays: Sequence[float]) -> Counter[str]:
+        """Number of notifications of each target for a batch of incidents.
+
+        Only the number of steps each incident reaches is computed per
+        incident, the targets are counted once per step of each policy.
+
+        Args:
+            policy_ids (Sequence[str]): Escalation policy of each incident.
+            starts (Sequence[float]): Creation time of each incident.
+            ack_delays (Sequence[float]): Delay before each incident is
+                                          acknowledged.
+
+        Returns:
+            Counter[str]: Target id to number of notifications.
+
+        Raises:
+            KeyError: If a policy is unknown.
+            ValueError: If the sequences differ in length.
+        """
+        load: Counter[str] = collections.Counter()
+        groups = self._group(policy_ids, starts, ack_delays)
+        bisect_left = bisect.bisect_left
+        for policy_id, indexes in groups.items():
+            policy = self.policies[policy_id]
+            offsets = policy.offsets
+            # Number of incidents ending on each step...
+            ending = [0] * len(policy)
+            for i in indexes:
+                ending[(bisect_left(offsets, ack_delays[i]) or 1) - 1] += 1
+            # ...so that incidents reaching a step are those ending on it
+            # or after.
+            reaching = 0
+            for step in range(len(policy) - 1, -1, -1):
+                reaching += ending[step]
+                if reaching:
+                    for target in policy.targets[step]:
+                        load[target.id] += reaching
+        return load
+
+    def timeline(self, policy_ids: Sequence[str], starts: Sequence[float],
+                 ack_delays: Sequence[float],
+                 bucket: float = 3600.0) -> Dict[Tuple[str, int], int]:
+        """Number of notifications of each target per time bucket.
+
+        Args:
+            policy_ids (Sequence[str]): Escalation policy of each incident.
+            starts (Sequence[float]): Creation time of each incident.
+            ack_delays (Sequence[float]): Delay before each incident is
+                                          acknowledged.
+            bucket (float): Length of the buckets, in seconds.
+
+        Returns:
+            Dict[Tuple[str, int], int]: (target id, bucket) to number of
+                                        notifications, buckets being
+                                        timestamps divided by their length.
+        """
+        timeline: Counter[Tuple[str, int]] = collections.Counter()
+        for notification in self.simulate(policy_ids, starts, ack_delays):
+            slot = int(notification.at // bucket)
+            for target in notification.targets:
+                timeline[target.id, slot] += 1
+        return dict(timeline)
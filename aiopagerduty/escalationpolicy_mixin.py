@@ -1,10 +1,27 @@
 """Escalation Policy Mixin
 """
 
-from typing import List
+import datetime
+import urllib.parse
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 
-from aiopagerduty.fetcher import FetcherProtocol
-from aiopagerduty.models import EscalationPolicy
+from aiopagerduty.fetcher import FetcherProtocol, RawPage
+from aiopagerduty.models import EscalationPolicy, OnCall
+
+
+def _oncalls_url(escalation_policy_ids: Optional[Sequence[str]],
+                 since: Optional[datetime.datetime],
+                 until: Optional[datetime.datetime]) -> str:
+    params: Dict[str, Any] = {}
+    if escalation_policy_ids:
+        params["escalation_policy_ids[]"] = list(escalation_policy_ids)
+    if since is not None:
+        params["since"] = since.isoformat()
+    if until is not None:
+        params["until"] = until.isoformat()
+    if not params:
+        return "oncalls"
+    return f"oncalls?{urllib.parse.urlencode(params, doseq=True)}"
 
 
 class EscalationPolicyMixin:
@@ -13,8 +30,40 @@ class EscalationPolicyMixin:
 
     async def list_escalation_policies(self: FetcherProtocol) -> List[EscalationPolicy]:
         url = "escalation_policies"
-        return await self.multi_fetch(EscalationPolicy, url, "escalation_policies")
+        return await self.cached_multi_fetch(EscalationPolicy, url,
+                                             "escalation_policies")
+
+    def list_escalation_policies_raw(self: FetcherProtocol) -> AsyncIterator[RawPage]:
+        return self.iter_raw_pages("escalation_policies")
 
     async def list_escalation_policy(self: FetcherProtocol, ep_id: str) -> EscalationPolicy:
         url = f"escalation_policies/{ep_id}"
         return await self.single_fetch(EscalationPolicy, url, "escalation_policy")
+
+    async def list_oncalls(
+            self: FetcherProtocol,
+            escalation_policy_ids: Optional[Sequence[str]] = None,
+            since: Optional[datetime.datetime] = None,
+            until: Optional[datetime.datetime] = None) -> List[OnCall]:
+        """Fetch the on-call entries of escalation policies.
+
+        Without a time range, the users on call now are returned.
+
+        Args:
+            escalation_policy_ids (Sequence[str]): Only these policies.
+            since (datetime): Start of the range, timezone aware.
+            until (datetime): End of the range, timezone aware.
+
+        Returns:
+            List[OnCall]: Users on call, per escalation level.
+        """
+        url = _oncalls_url(escalation_policy_ids, since, until)
+        return await self.multi_fetch(OnCall, url, "oncalls")
+
+    def list_oncalls_raw(
+            self: FetcherProtocol,
+            escalation_policy_ids: Optional[Sequence[str]] = None,
+            since: Optional[datetime.datetime] = None,
+            until: Optional[datetime.datetime] = None) -> AsyncIterator[RawPage]:
+        return self.iter_raw_pages(
+            _oncalls_url(escalation_policy_ids, since, until))
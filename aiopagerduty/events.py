@@ -0,0 +1,399 @@
+"""Events API v2 sender.
+
+`EventSender` sends alert events to the integration keys of
+`events_api_v2_inbound_integration` integrations. Events are put on a
+bounded queue and posted by concurrent workers over a shared `Transport`,
+so that producers only wait when the queue is full::
+
+    async with EventSender(transport=transport) as sender:
+        for alert in alerts:
+            await sender.send({
+                'routing_key': integration.integration_key,
+                'event_action': 'trigger',
+                'dedup_key': alert.id,
+                'payload': {'summary': alert.title, 'source': alert.host,
+                            'severity': 'critical'},
+            })
+        await sender.flush()
+        print(sender.metrics())
+
+Events with the same routing and dedup keys are always posted by the same
+worker, in the order they were queued. An `EventCoalescer` in front of the
+sender folds the bursts of events of an alert during alert storms.
+
+Throttled events and server errors are retried with exponential backoff.
+Events the API rejects, or still failing after the retries, are logged
+and counted in the `failed` metric.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from aiopagerduty.ratelimit import RateLimiter
+from aiopagerduty.transport import Transport, retry_delay
+
+_logger = logging.getLogger(__name__)
+
+EVENTS_URL = 'https://events.pagerduty.com/v2/enqueue'
+
+_TRIGGER = 'trigger'
+_RESOLVE = 'resolve'
+
+# Number of recent latencies the percentiles are computed from.
+_LATENCY_WINDOW = 10000
+
+JsonObj = Dict[str, Any]
+# Routing key and dedup key of an alert
+AlertKey = Tuple[Optional[str], str]
+
+
+class EventSender:
+    """Queued, concurrent sender of Events API v2 events.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, url: str = EVENTS_URL, *,
+                 transport: Optional[Transport] = None,
+                 max_queue: int = 10000, concurrency: int = 16,
+                 max_retries: int = 5, retry_backoff: float = 0.5,
+                 rate_limiter: Optional[RateLimiter] = None) -> None:
+        """Constructor
+
+        Args:
+            url (str): Events API enqueue url.
+            transport (Transport): Shared connection pool. A private one is
+                                   created if None.
+            max_queue (int): Events queued before `send` waits, split
+                             evenly between the workers.
+            concurrency (int): Events posted concurrently.
+            max_retries (int): Retries of throttled or failed events.
+            retry_backoff (float): First retry delay in seconds, doubled on
+                                   every retry.
+            rate_limiter (RateLimiter): Limits the rate events are posted at.
+        """
+        self._url = url
+        self._owns_transport = transport is None
+        self._transport = transport or Transport()
+        self._max_queue = max_queue
+        self._concurrency = concurrency
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._rate_limiter = rate_limiter
+        # One queue per worker, created within the event loop by start().
+        self._queues: List['asyncio.Queue[Tuple[JsonObj, float]]'] = []
+        self._workers: List['asyncio.Task[None]'] = []
+        self._next_queue = 0
+        self._started = 0.0
+        self._latencies: Deque[float] = collections.deque(
+            maxlen=_LATENCY_WINDOW)
+        self.stats: Dict[str, int] = {
+            'queued': 0,
+            'sent': 0,
+            'failed': 0,
+            'retries': 0,
+            'throttled': 0,
+        }
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'EventSender':
+        await self.start()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Open the transport and start the workers.
+        """
+        if self._queues:
+            return
+        await self._transport.open()
+        size = max(self._max_queue // self._concurrency, 1)
+        self._queues = [asyncio.Queue(size) for _ in range(self._concurrency)]
+        self._started = time.monotonic()
+        self._workers = [
+            asyncio.ensure_future(self._work(queue)) for queue in self._queues
+        ]
+
+    async def close(self) -> None:
+        """Send the queued events and stop the workers.
+        """
+        if not self._queues:
+            return
+        await self.flush()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = []
+        if self._owns_transport:
+            await self._transport.close()
+
+    def _queue_of(self,
+                  event: JsonObj) -> 'asyncio.Queue[Tuple[JsonObj, float]]':
+        if not self._queues:
+            raise RuntimeError('EventSender is not started')
+        if (dedup_key := event.get('dedup_key')) is None:
+            # Nothing to keep in order, the queues take turns.
+            self._next_queue = (self._next_queue + 1) % len(self._queues)
+            return self._queues[self._next_queue]
+        key = hash((event.get('routing_key'), dedup_key))
+        return self._queues[key % len(self._queues)]
+
+    async def send(self, event: JsonObj) -> None:
+        """Queue an event, waiting while the queue is full.
+        """
+        await self._queue_of(event).put((event, time.monotonic()))
+        self.stats['queued'] += 1
+
+    def send_nowait(self, event: JsonObj) -> None:
+        """Queue an event.
+
+        Raises:
+            asyncio.QueueFull: If the queue is full.
+        """
+        self._queue_of(event).put_nowait((event, time.monotonic()))
+        self.stats['queued'] += 1
+
+    async def flush(self) -> None:
+        """Wait until every queued event was sent or failed.
+        """
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+
+    def metrics(self) -> Dict[str, float]:
+        """Counters, throughput in events per second since started, and
+        end to end latency percentiles in seconds of the recent events.
+        """
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        metrics: Dict[str, float] = dict(self.stats)
+        metrics['pending'] = sum(queue.qsize() for queue in self._queues)
+        metrics['events_per_sec'] = (self.stats['sent'] / elapsed
+                                     if elapsed > 0 else 0.0)
+        latencies = sorted(self._latencies)
+        for percentile in (50, 95, 99):
+            metrics[f'latency_p{percentile}'] = (
+                latencies[min(len(latencies) * percentile // 100,
+                              len(latencies) - 1)] if latencies else 0.0)
+        return metrics
+
+    async def _work(self,
+                    queue: 'asyncio.Queue[Tuple[JsonObj, float]]') -> None:
+        while True:  # pylint: disable=while-used
+            event, queued_at = await queue.get()
+            try:
+                sent = await self._post(event)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                self.stats['failed'] += 1
+                _logger.error('Error sending event', extra={
+                    'dedup_key': event.get('dedup_key'),
+                    'reason': str(ex),
+                })
+            # The worker must outlive any error, or the events queued to it
+            # would never be sent and flush() would never return.
+            except Exception:  # pylint: disable=broad-except
+                self.stats['failed'] += 1
+                _logger.exception('Unexpected error sending event', extra={
+                    'dedup_key': event.get('dedup_key'),
+                })
+            else:
+                if sent:
+                    self.stats['sent'] += 1
+                    self._latencies.append(time.monotonic() - queued_at)
+                else:
+                    self.stats['failed'] += 1
+            finally:
+                queue.task_done()
+
+    async def _post(self, event: JsonObj) -> bool:
+        """Post an event, retrying throttled and failed requests.
+
+        Returns:
+            bool: True if the event was accepted.
+        """
+        attempt = 0
+        while True:  # pylint: disable=while-used
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire()
+            session = self._transport.session
+            async with session.post(self._url, json=event) as resp:
+                await resp.read()
+                if HTTPStatus.OK <= resp.status < HTTPStatus.MULTIPLE_CHOICES:
+                    return True
+                throttled = resp.status == HTTPStatus.TOO_MANY_REQUESTS
+                retryable = (throttled or
+                             resp.status >= HTTPStatus.INTERNAL_SERVER_ERROR)
+                if not retryable or attempt >= self._max_retries:
+                    _logger.error('Error sending event', extra={
+                        'dedup_key': event.get('dedup_key'),
+                        'reason': resp.reason,
+                        'status': resp.status,
+                    })
+                    return False
+                delay = retry_delay(resp, attempt, self._retry_backoff)
+                if throttled:
+                    self.stats['throttled'] += 1
+                    if self._rate_limiter is not None:
+                        self._rate_limiter.pause(delay)
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+class EventCoalescer:
+    """Folds the events of each alert within a time window before sending.
+
+    The first event of an alert, by routing and dedup key, opens a window
+    of `window` seconds. The events of the alert received during the window
+    are folded, and what remains is sent when the window closes:
+
+    - A trigger replaces the pending trigger, keeping the latest payload.
+    - An acknowledge is dropped if one is already pending.
+    - A resolve cancels the pending trigger and acknowledge. It is dropped
+      too when the alert is known to be resolved already: a trigger and
+      resolve pair sends nothing once the coalescer sent the alert's
+      resolve, or saw it resolved earlier in the window.
+
+    The remaining events of an alert are sent in the order received. Events
+    without a dedup key can not be folded and are sent right away.
+    """
+
+    def __init__(self, sender: EventSender, window: float = 10.0,
+                 max_keys: int = 100000) -> None:
+        """Constructor
+
+        Args:
+            sender (EventSender): Sender of the folded events. It is
+                                  started and closed by the caller.
+            window (float): Seconds the events of an alert are held.
+            max_keys (int): Number of alerts whose state is remembered, to
+                            tell whether they are open.
+        """
+        self._sender = sender
+        self._window = window
+        self._max_keys = max_keys
+        self._pending: Dict[AlertKey, List[JsonObj]] = {}
+        self._timers: Dict[AlertKey, asyncio.TimerHandle] = {}
+        # Alert -> whether the last event sent left it open. Alerts not in
+        # there may be open.
+        self._open: 'OrderedDict[AlertKey, bool]' = OrderedDict()
+        # Created within the event loop, by start().
+        self._due: Optional['asyncio.Queue[AlertKey]'] = None
+        self._flusher: Optional['asyncio.Task[None]'] = None
+        self.stats: Dict[str, int] = {
+            'received': 0,
+            'forwarded': 0,
+            'replaced': 0,
+            'cancelled': 0,
+        }
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'EventCoalescer':
+        await self.start()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        if self._due is not None:
+            return
+        self._due = asyncio.Queue()
+        self._flusher = asyncio.ensure_future(self._flush_due(self._due))
+
+    async def close(self) -> None:
+        """Send the pending events and stop.
+        """
+        if self._due is None or self._flusher is None:
+            return
+        await self.flush()
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        self._due = None
+        self._flusher = None
+
+    def _started_due(self) -> 'asyncio.Queue[AlertKey]':
+        if self._due is None:
+            raise RuntimeError('EventCoalescer is not started')
+        return self._due
+
+    async def send(self, event: JsonObj) -> None:
+        """Fold an event into the pending events of its alert.
+        """
+        due = self._started_due()
+        self.stats['received'] += 1
+        if (dedup_key := event.get('dedup_key')) is None:
+            await self._forward(event)
+            return
+        key = (event.get('routing_key'), dedup_key)
+        if (pending := self._pending.get(key)) is None:
+            pending = self._pending[key] = []
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self._window, due.put_nowait, key)
+        self._fold(key, pending, event)
+
+    async def flush(self) -> None:
+        """Send the pending events now, and wait until they are sent.
+        """
+        due = self._started_due()
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            due.put_nowait(key)
+        await due.join()
+        await self._sender.flush()
+
+    def _fold(self, key: AlertKey, pending: List[JsonObj],
+              event: JsonObj) -> None:
+        action = event.get('event_action')
+        # Only the events after the last pending resolve can be folded.
+        resolved = max((i for i, e in enumerate(pending)
+                        if e.get('event_action') == _RESOLVE), default=-1)
+        if action == _RESOLVE:
+            cancelled = len(pending) - resolved - 1
+            del pending[resolved + 1:]
+            if resolved >= 0 or self._open.get(key) is False:
+                # Already resolved, the resolve itself is not needed.
+                self.stats['cancelled'] += cancelled + 1
+                return
+            self.stats['cancelled'] += cancelled
+            pending.append(event)
+            return
+        for i in range(resolved + 1, len(pending)):
+            if pending[i].get('event_action') == action:
+                if action == _TRIGGER:
+                    pending[i] = event
+                self.stats['replaced'] += 1
+                return
+        pending.append(event)
+
+    async def _forward(self, event: JsonObj) -> None:
+        await self._sender.send(event)
+        self.stats['forwarded'] += 1
+
+    async def _flush_due(self, due: 'asyncio.Queue[AlertKey]') -> None:
+        # A single task sends every alert's events, so that they are queued
+        # on the sender in order.
+        while True:  # pylint: disable=while-used
+            key = await due.get()
+            try:
+                await self._send_due(key)
+            finally:
+                due.task_done()
+
+    async def _send_due(self, key: AlertKey) -> None:
+        self._timers.pop(key, None)
+        for event in self._pending.pop(key, []):
+            await self._forward(event)
+            if (action := event.get('event_action')) in {_TRIGGER, _RESOLVE}:
+                self._open[key] = action == _TRIGGER
+                self._open.move_to_end(key)
+                if len(self._open) > self._max_keys:
+                    self._open.popitem(last=False)
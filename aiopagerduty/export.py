@@ -0,0 +1,277 @@
+"""Streaming export of account entities to NDJSON or CSV files.
+
+Each export chains the raw pages of a list into a file writer through a
+bounded queue: items are decoded page by page as plain dicts, never as
+models, and a page is only fetched when the writer has room for it, so
+memory stays flat whatever the size of the account. Exports of different
+entities run concurrently::
+
+    await export_all(client, [
+        Export('services', 'services.csv.gz', 'csv'),
+        Export('users', 'users.ndjson'),
+        Export('memberships', 'memberships.csv', 'csv',
+               ['team.id', 'user.id', 'role']),
+    ])
+
+Fields are projections of the items: `escalation_policy.id` reads a
+nested field, and `teams[].id` the field of every item of a list. NDJSON
+rows hold the projected fields, or whole items without fields. CSV rows
+flatten lists by joining their values with `|`. Files ending in `.gz` are
+gzip compressed.
+
+Rows are written in the default executor of the loop, so that the exports
+do not block each other. A file is written next to its path and only moved
+there once complete: a failed export leaves no truncated file behind.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+from typing import (IO, Any, AsyncIterator, Callable, Dict, List, NamedTuple,
+                    Optional, Sequence)
+
+from aiopagerduty.fetcher import FetcherProtocol
+
+Item = Dict[str, Any]
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+LIST_SEPARATOR = '|'
+
+# Entity -> (url part, items name) of its list
+_LISTS: Dict[str, Any] = {
+    'services': ('services', 'services'),
+    'users': ('users', 'users'),
+    'teams': ('teams', 'teams'),
+    'escalation_policies': ('escalation_policies', 'escalation_policies'),
+}
+MEMBERSHIPS = 'memberships'
+
+# Entity -> fields exported to CSV when none are given
+DEFAULT_FIELDS: Dict[str, List[str]] = {
+    'services': ['id', 'name', 'status', 'escalation_policy.id',
+                 'teams[].id', 'created_at'],
+    'users': ['id', 'name', 'email', 'role', 'time_zone', 'teams[].id'],
+    'teams': ['id', 'name', 'description'],
+    'escalation_policies': ['id', 'name', 'num_loops',
+                            'escalation_rules[].targets[].id',
+                            'services[].id', 'teams[].id'],
+    MEMBERSHIPS: ['team.id', 'user.id', 'role'],
+}
+_DONE = object()
+
+
+class Export(NamedTuple):
+    """Export of the items of an entity to a file.
+    """
+    entity: str  # One of DEFAULT_FIELDS
+    path: str  # gzip compressed when ending in .gz
+    format: str = NDJSON  # NDJSON or CSV
+    fields: Optional[List[str]] = None  # Projections, see module doc
+
+
+def projection(path: str) -> Callable[[Item], Any]:
+    """Function reading a field path from an item.
+
+    Keys ending in `[]` map the rest of the path over a list, so the
+    function returns a flat list of values. Missing fields read as None,
+    and are left out of lists.
+    """
+    head, _, rest = path.partition('.')
+    many = head.endswith('[]')
+    key = head[:-2] if many else head
+    inner = projection(rest) if rest else None
+
+    def project(item: Item) -> Any:
+        value = item.get(key) if isinstance(item, dict) else None
+        if not many:
+            if inner is None or value is None:
+                return value
+            return inner(value)
+        values: List[Any] = []
+        for element in value or []:
+            projected = element if inner is None else inner(element)
+            if isinstance(projected, list):
+                values.extend(projected)
+            elif projected is not None:
+                values.append(projected)
+        return values
+
+    return project
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(element) for element in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+class _Writer:
+    """Writes the items of an export to its file.
+    """
+
+    def __init__(self, spec: Export) -> None:
+        if spec.format not in (NDJSON, CSV):
+            raise ValueError(f'Unknown export format {spec.format}')
+        fields = spec.fields
+        if fields is None and spec.format == CSV:
+            fields = DEFAULT_FIELDS[spec.entity]
+        self._fields = fields or []
+        self._projections = [projection(field) for field in self._fields]
+        self._path = spec.path
+        directory, name = os.path.split(spec.path)
+        self._partial = os.path.join(directory, f'.{name}.partial')
+        # pylint: disable=consider-using-with
+        self._raw = open(self._partial, 'wb')
+        self._file: IO[str]
+        if name.endswith('.gz'):
+            # Named after the final path in the gzip header.
+            self._file = io.TextIOWrapper(
+                gzip.GzipFile(filename=name, mode='wb', fileobj=self._raw),
+                encoding='utf-8', newline='')
+        else:
+            self._file = io.TextIOWrapper(self._raw, encoding='utf-8',
+                                          newline='')
+        self._csv = None
+        if spec.format == CSV:
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self._fields)
+        self.rows = 0
+
+    def write(self, page: List[Item]) -> None:
+        for item in page:
+            if self._csv is not None:
+                self._csv.writerow([
+                    _cell(project(item)) for project in self._projections
+                ])
+                continue
+            row = item
+            if self._projections:
+                row = {
+                    field: project(item) for field, project in zip(
+                        self._fields, self._projections)
+                }
+            self._file.write(json.dumps(row))
+            self._file.write('\n')
+        self.rows += len(page)
+
+    def close(self, complete: bool) -> None:
+        """Close the file, and move it to its path if it is complete.
+        """
+        try:
+            self._file.close()
+        finally:
+            # Gzip files do not close the file they write to.
+            self._raw.close()
+        if complete:
+            os.replace(self._partial, self._path)
+        else:
+            os.remove(self._partial)
+
+
+async def _list_items(fetcher: FetcherProtocol, url_part: str,
+                      items_name: str) -> AsyncIterator[List[Item]]:
+    async for page in fetcher.iter_raw_pages(url_part):
+        yield json.loads(page.body)[items_name]
+
+
+async def _membership_items(
+        fetcher: FetcherProtocol) -> AsyncIterator[List[Item]]:
+    # Members are listed team by team, with a reference to their team.
+    async for teams in _list_items(fetcher, 'teams', 'teams'):
+        for team in teams:
+            ref = {'id': team['id'], 'summary': team.get('summary')}
+            async for members in _list_items(
+                    fetcher, f"teams/{team['id']}/members", 'members'):
+                yield [{'team': ref, **member} for member in members]
+
+
+def items(fetcher: FetcherProtocol,
+          entity: str) -> AsyncIterator[List[Item]]:
+    """Items of an entity, page by page, as decoded json.
+
+    Raises:
+        KeyError: If the entity is unknown.
+    """
+    if entity == MEMBERSHIPS:
+        return _membership_items(fetcher)
+    url_part, items_name = _LISTS[entity]
+    return _list_items(fetcher, url_part, items_name)
+
+
+async def export(fetcher: FetcherProtocol, spec: Export,
+                 queue_size: int = 4) -> int:
+    """Export the items of an entity to a file.
+
+    Pages are fetched while the previous ones are written, at most
+    `queue_size` pages ahead.
+
+    Args:
+        fetcher (FetcherProtocol): Client fetching the items.
+        spec (Export): What to export where.
+        queue_size (int): Pages fetched ahead of the writer.
+
+    Returns:
+        int: Number of rows written.
+
+    Raises:
+        KeyError: If the entity is unknown.
+        ValueError: If the format is unknown.
+        Error: If a page could not be fetched.
+    """
+    pages = items(fetcher, spec.entity)
+    queue: 'asyncio.Queue[Any]' = asyncio.Queue(queue_size)
+
+    async def produce() -> None:
+        cancelled = False
+        try:
+            async for page in pages:
+                await queue.put(page)
+        except asyncio.CancelledError:
+            # The writer stopped reading, and would never make room for
+            # the sentinel.
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                await queue.put(_DONE)
+
+    loop = asyncio.get_running_loop()
+    writer = _Writer(spec)
+    producer = asyncio.ensure_future(produce())
+    complete = False
+    try:
+        while True:  # pylint: disable=while-used
+            page = await queue.get()
+            if page is _DONE:
+                break
+            await loop.run_in_executor(None, writer.write, page)
+        # Raises the fetching error, if any.
+        await producer
+        complete = True
+    finally:
+        producer.cancel()
+        await loop.run_in_executor(None, writer.close, complete)
+    return writer.rows
+
+
+async def export_all(fetcher: FetcherProtocol, specs: Sequence[Export],
+                     queue_size: int = 4) -> Dict[str, int]:
+    """Run exports concurrently.
+
+    Args:
+        fetcher (FetcherProtocol): Client fetching the items.
+        specs (Sequence[Export]): Exports to run.
+        queue_size (int): Pages fetched ahead of each writer.
+
+    Returns:
+        Dict[str, int]: Path of each export to its number of rows.
+    """
+    rows = await asyncio.gather(*(export(fetcher, spec, queue_size)
+                                  for spec in specs))
+    return {spec.path: count for spec, count in zip(specs, rows)}
@@ -0,0 +1,207 @@
+"""Offline evaluation of orchestration variables and extractions.
+
+Rule actions transform the events they match: `Variable`s capture values
+from event fields with regexes, and `Extraction`s set PD-CEF fields from a
+template interpolating the variables, eg. `High CPU on {{hostname}}` or
+`{{variables.hostname}}`, or from a regex applied to a source field.
+`Transformer` compiles all of them once, along with the rules of the
+orchestration, and computes the fields set on each event of a stream::
+
+    transformer = Transformer(orchestration)
+    for match, fields in transformer.transform_batch(events):
+        print(match.rules, fields)  # eg. {'event.summary': 'High CPU on a1'}
+
+Events are PCL documents, see `aiopagerduty.pcl`. Extractions read the
+event as received, and when several matched rules set the same field the
+last one wins.
+"""
+
+import functools
+import re
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Pattern, Tuple)
+
+from aiopagerduty.models import Action, ServiceOrchestration
+from aiopagerduty.orchestrationeval import CompiledOrchestration, Match
+from aiopagerduty.pcl import MISSING, Document, field_lookup
+
+Fields = Dict[str, Any]
+Variables = Dict[str, str]
+
+_TEMPLATE_RE = re.compile(r'\{\{\s*([\w.-]+)\s*\}\}')
+_VARIABLES_PREFIX = 'variables.'
+
+
+@functools.lru_cache(maxsize=None)
+def _regex(text: str) -> Pattern[str]:
+    return re.compile(text)
+
+
+def _capture(regex: Pattern[str], value: Any) -> Optional[str]:
+    # The capture groups are appended together, or the whole match is used
+    # without any group.
+    if value is MISSING:
+        return None
+    match = regex.search(value if isinstance(value, str) else str(value))
+    if match is None:
+        return None
+    if regex.groups:
+        return ''.join(group for group in match.groups() if group is not None)
+    return match.group(0)
+
+
+def _template(template: str) -> Callable[[Document, Variables], str]:
+    # Split once into literal text and the names interpolated after it.
+    pieces = _TEMPLATE_RE.split(template)
+    parts: List[Tuple[str, str, Optional[Callable[[Document], Any]]]] = []
+    for i in range(0, len(pieces) - 1, 2):
+        name = pieces[i + 1]
+        lookup = None
+        if name.startswith(_VARIABLES_PREFIX):
+            name = name[len(_VARIABLES_PREFIX):]
+        elif '.' in name:
+            # Names not defined as variables are looked up in the event.
+            lookup = field_lookup(name)
+        parts.append((pieces[i], name, lookup))
+    tail = pieces[-1]
+
+    def render(doc: Document, variables: Variables) -> str:
+        out = []
+        for literal, name, lookup in parts:
+            out.append(literal)
+            value = variables.get(name)
+            if value is None and lookup is not None:
+                value = lookup(doc)
+                value = '' if value is MISSING else str(value)
+            out.append(value or '')
+        out.append(tail)
+        return ''.join(out)
+
+    return render
+
+
+def _regex_extraction(
+        source: str,
+        regex: str) -> Callable[[Document, Variables], Optional[str]]:
+    lookup = field_lookup(source)
+    compiled = _regex(regex)
+    return lambda doc, variables: _capture(compiled, lookup(doc))
+
+
+class CompiledActions:
+    """Variables and extractions of an action compiled for evaluation.
+    """
+
+    def __init__(self, action: Action) -> None:
+        self._variables = [(variable.name, field_lookup(variable.path),
+                            _regex(variable.value))
+                           for variable in action.variables or []]
+        self._extractions: List[Tuple[str, Callable[[Document, Variables],
+                                                    Optional[str]]]] = []
+        for extraction in action.extractions or []:
+            if extraction.template is not None:
+                self._extractions.append(
+                    (extraction.target, _template(extraction.template)))
+            elif extraction.source is not None and extraction.regex is not None:
+                self._extractions.append(
+                    (extraction.target,
+                     _regex_extraction(extraction.source, extraction.regex)))
+
+    def __bool__(self) -> bool:
+        return bool(self._variables or self._extractions)
+
+    def apply(self, doc: Document, fields: Fields) -> None:
+        """Set the fields extracted from an event.
+
+        Args:
+            doc (Document): Event.
+            fields (Fields): Field path to value, updated in place.
+        """
+        variables: Variables = {}
+        for name, lookup, regex in self._variables:
+            value = _capture(regex, lookup(doc))
+            if value is not None:
+                variables[name] = value
+        for target, extract in self._extractions:
+            value = extract(doc, variables)
+            if value is not None:
+                fields[target] = value
+
+
+class Transformer:
+    """Rules, variables and extractions of an orchestration compiled for
+    evaluation.
+    """
+
+    def __init__(self, orchestration: ServiceOrchestration) -> None:
+        """Constructor
+
+        Args:
+            orchestration (ServiceOrchestration): Rules to evaluate.
+
+        Raises:
+            PCLError: If a condition is invalid or a rule routes to an
+                      unknown set or in a loop.
+            re.error: If a variable or extraction regex is invalid.
+        """
+        self.rules = CompiledOrchestration(orchestration)
+        # Rule id -> compiled actions, None for catch_all. Actions without
+        # any variable or extraction are left out.
+        self._actions: Dict[Optional[str], CompiledActions] = {}
+        candidates: List[Tuple[Optional[str], Action]] = [
+            (rule.id, rule.actions)
+            for rule_set in orchestration.sets or []
+            for rule in rule_set.rules
+        ]
+        candidates.append((None, orchestration.catch_all.actions))
+        for rule_id, action in candidates:
+            compiled = CompiledActions(action)
+            if compiled:
+                self._actions[rule_id] = compiled
+
+    def fields(self, event: Document, match: Match) -> Fields:
+        """Fields the matched actions set on an event.
+        """
+        fields: Fields = {}
+        rule_ids: Iterable[Optional[str]] = match.rules
+        if match.catch_all:
+            rule_ids = [*match.rules, None]
+        for rule_id in rule_ids:
+            actions = self._actions.get(rule_id)
+            if actions is not None:
+                actions.apply(event, fields)
+        return fields
+
+    def transform(self, event: Document) -> Tuple[Match, Fields]:
+        """Evaluate the rules against an event and extract its fields.
+        """
+        match = self.rules.evaluate(event)
+        return match, self.fields(event, match)
+
+    def transform_batch(self,
+                        events: Iterable[Document]) -> Iterator[Tuple[Match,
+                                                                      Fields]]:
+        """Transform events, lazily and in order.
+        """
+        transform = self.transform
+        for event in events:
+            yield transform(event)
+
+
+def apply_fields(event: Document, fields: Fields) -> Document:
+    """Copy of an event with extracted fields set.
+
+    Only the dicts along the field paths are copied, the rest of the event
+    is shared with the original.
+    """
+    result = dict(event)
+    for path, value in fields.items():
+        *parents, last = path.split('.')
+        node = result
+        for key in parents:
+            child = node.get(key)
+            child = dict(child) if isinstance(child, dict) else {}
+            node[key] = child
+            node = child
+        node[last] = value
+    return result
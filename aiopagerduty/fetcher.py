@@ -1,17 +1,34 @@
 """Fetcher module that provides HTTP transport to PagerDuty API servers.
 """
 
+import asyncio
+import collections
 import json
 import logging
+import re
+import time
+from concurrent.futures import Executor
 from http import HTTPStatus
-from typing import Any, Dict, List, Optional, Protocol, Type, TypeVar
+from typing import (Any, AsyncIterator, Callable, Deque, Dict, List, Optional,
+                    Protocol, Tuple, Type, TypeVar)
 
 import aiohttp
 from pydantic import BaseModel
 
+from aiopagerduty.cache import CacheBackend, new_owner
+from aiopagerduty.ratelimit import RateLimiter
+from aiopagerduty.transport import Transport, retry_delay
+from aiopagerduty.tuning import MAX_LIMIT, AutoTuner
+
 _URL_PREFIX = 'https://api.pagerduty.com'
 
+# Seconds a cache refresh lease is held for, and polled at by the waiters.
+_LEASE_TTL = 120.0
+_LEASE_POLL_INTERVAL = 0.1
+
 BaseModelT = TypeVar('BaseModelT', bound=BaseModel)
+FetcherT = TypeVar('FetcherT', bound='Fetcher')
+T = TypeVar('T')
 
 _logger = logging.getLogger(__name__)
 
@@ -20,16 +37,19 @@ class Error(aiohttp.ClientError):
     """PagerDuty error.
     """
 
-    def __init__(self, message: Optional[str], status: int):
+    def __init__(self, message: Optional[str], status: int,
+                 body: bytes = b''):
         """Constructor
 
         Args:
             message (str): Error message
             status (int): HTTP error code
+            body (bytes): Response body, the PagerDuty error json
         """
         aiohttp.ClientError.__init__(self)
         self._msg = message
         self._status = status
+        self._body = body
 
     def __str__(self) -> str:
         return f'Error: status: {self._status}, message: {self._msg}'
@@ -42,79 +62,220 @@ class Error(aiohttp.ClientError):
     def status(self) -> int:
         return self._status
 
+    @property
+    def body(self) -> bytes:
+        return self._body
+
+
+def build_models(model_type: Type[BaseModelT],
+                 json_objs: List[Dict[str, Any]]) -> List[BaseModelT]:
+    """Construct models from their json. Module level so that it can be sent
+    to a process pool.
+    """
+    return [model_type(**json_obj) for json_obj in json_objs]
+
+
+# Pagination fields are top level keys that PagerDuty sends after the items.
+_MORE_RE = re.compile(rb'"more"\s*:\s*(true|false)')
+_LIMIT_RE = re.compile(rb'"limit"\s*:\s*(\d+)')
+
+
+class RawPage:
+    """Undecoded body of a page of a list, with its pagination metadata.
+    """
+
+    __slots__ = ('body', 'offset', 'limit', 'more')
+
+    def __init__(self, body: bytes, offset: int, limit: int,
+                 more: bool) -> None:
+        self.body = body
+        self.offset = offset
+        self.limit = limit
+        self.more = more
+
+    @property
+    def view(self) -> memoryview:
+        """Zero-copy view over the response buffer."""
+        return memoryview(self.body)
+
+    @classmethod
+    def parse(cls, body: bytes, offset: int, limit: int) -> 'RawPage':
+        """Read the pagination fields of a page body.
+
+        The fields are searched for from the end of the body, where the
+        API puts them. Falls back to decoding the body if they are not
+        found there.
+        """
+        more_at = body.rfind(b'"more"')
+        more = _MORE_RE.match(body, more_at) if more_at >= 0 else None
+        limit_at = body.rfind(b'"limit"')
+        limit_match = (_LIMIT_RE.match(body, limit_at) if limit_at >= 0
+                       else None)
+        if more is None or limit_match is None:
+            obj = json.loads(body)
+            return cls(body, offset, obj.get('limit') or limit, obj['more'])
+        return cls(body, offset, int(limit_match.group(1)),
+                   more.group(1) == b'true')
+
 
 class Fetcher:
     """Mixin to fetch json results from url.
     """
 
-    def __init__(self, api_key: str) -> None:
+    def __init__(self, api_key: str, base_url: str = _URL_PREFIX,
+                 max_retries: int = 3, retry_backoff: float = 0.5,
+                 transport: Optional[Transport] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 executor: Optional[Executor] = None,
+                 cache: Optional[CacheBackend] = None,
+                 cache_ttl: float = 300.0,
+                 tuner: Optional[AutoTuner] = None) -> None:
+        """Constructor
+
+        Args:
+            api_key (str): PagerDuty API key
+            base_url (str): PagerDuty API server url.
+            max_retries (int): Number of times a throttled (429) or failed
+                               (5xx) request is retried.
+            retry_backoff (float): Base delay in seconds of the exponential
+                                   backoff, used when the server does not
+                                   send a Retry-After header.
+            transport (Transport): Connection pool shared with other
+                                   clients. The client opens a private
+                                   transport if None.
+            rate_limiter (RateLimiter): Request budget of the api key.
+                                        Requests are not limited if None.
+            executor (Executor): Executor to construct models of each page
+                                 in, eg. a ProcessPoolExecutor when model
+                                 construction is the bottleneck.
+            cache (CacheBackend): Cache of the catalog lists, eg. services
+                                  and users. Lists are not cached if None.
+            cache_ttl (float): Seconds a cached list is served for.
+            tuner (AutoTuner): Tunes the page size and concurrency of
+                               list crawls. Pages hold 100 items and are
+                               fetched one at a time if None.
+        """
         self._api_key = api_key
+        self._headers = {'Authorization': f'Token token={api_key}'}
+        self._base_url = base_url.rstrip('/')
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._owns_transport = transport is None
+        self._transport = transport or Transport()
+        self._rate_limiter = rate_limiter
+        self._executor = executor
+        self._cache = cache
+        self._cache_ttl = cache_ttl
+        self._cache_owner = new_owner()
+        self._tuner = tuner
 
     # Async ContextManager support
-    async def __aenter__(self) -> None:
-        headers = {'Authorization': f'Token token={self._api_key}'}
-        # Use max of 25 concurrent connections to limit PagerDuty
-        # rate limiting issues.
-        conn = aiohttp.TCPConnector(limit=25)
-        self._session = aiohttp.ClientSession(headers=headers, connector=conn)
+    async def __aenter__(self: FetcherT) -> FetcherT:
+        # A shared transport is opened on first use, and closed by its owner.
+        await self._transport.open()
         # self._session = CachedSession(cache=SQLiteBackend(
         #     'pd.cache'), headers=headers, connector=conn)
-        pass
+        return self
 
     # Async ContextManager support
     async def __aexit__(self, *args: Any) -> None:
-        await self._session.close()
+        if self._owns_transport:
+            await self._transport.close()
+        if self._tuner is not None:
+            self._tuner.save()
+
+    async def _request(self, method: str, url: str,
+                       expected_status: HTTPStatus,
+                       data: Optional[Dict[str, Any]] = None) -> bytes:
+        """Send a request and return the response body.
+        """
+        _, body = await self.send(method, url, data, expected_status)
+        return body
+
+    async def send(self, method: str, url: str,
+                   data: Optional[Dict[str, Any]] = None,
+                   expected_status: Optional[HTTPStatus] = None
+                   ) -> Tuple[int, bytes]:
+        """Send a request and return the response status and body.
+
+        Throttled requests are retried after the delay asked for by the
+        server. Server errors are retried with exponential backoff, except
+        for POST requests that are not safe to repeat.
+
+        Args:
+            method (str): HTTP method
+            url (str): Url relative to the base url
+            data (Dict[str, Any]): Json body of the request
+            expected_status (HTTPStatus): Status of a successful response.
+                                          Any 2xx status if None.
+
+        Returns:
+            Tuple[int, bytes]: Response status and body
+        """
+        u = f'{self._base_url}/{url}'
+        attempt = 0
+        while True:  # pylint: disable=while-used
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire()
+            session = self._transport.session
+            started = time.monotonic()
+            async with session.request(method, u, json=data,
+                                       headers=self._headers) as resp:
+                body = await resp.read()
+                if self._tuner is not None and method == 'GET':
+                    self._tuner.record(url, resp.status,
+                                       time.monotonic() - started, len(body))
+                if (resp.status == expected_status
+                        or (expected_status is None
+                            and HTTPStatus.OK <= resp.status
+                            < HTTPStatus.MULTIPLE_CHOICES)):
+                    return resp.status, body
+                retryable = (resp.status == HTTPStatus.TOO_MANY_REQUESTS
+                             or (resp.status >= HTTPStatus.INTERNAL_SERVER_ERROR
+                                 and method != 'POST'))
+                if not retryable or attempt >= self._max_retries:
+                    _logger.error('Error requesting', extra={
+                                  'method': method,
+                                  'url': url,
+                                  'reason': resp.reason,
+                                  'status': resp.status,
+                                  })
+                    raise Error(resp.reason, resp.status, body)
+                delay = retry_delay(resp, attempt, self._retry_backoff)
+                if (self._rate_limiter is not None
+                        and resp.status == HTTPStatus.TOO_MANY_REQUESTS):
+                    self._rate_limiter.pause(delay)
+            _logger.debug('Retrying request', extra={
+                          'method': method,
+                          'url': url,
+                          'status': resp.status,
+                          'delay': delay,
+                          })
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def fetch_raw_result(self, url: str) -> bytes:
+        return await self._request('GET', url, HTTPStatus.OK)
 
     async def fetch_json_result(self, url: str) -> Dict[str, Any]:
-        u = f'{_URL_PREFIX}/{url}'
-        async with self._session.get(u) as resp:
-            data: str = await resp.text()
-            if resp.status != HTTPStatus.OK:
-                _logger.error('Error posting', extra={
-                              'message': resp.reason,
-                              'status': resp.status,
-                              })
-                raise Error(resp.reason, resp.status)
-            obj: Dict[str, Any] = json.loads(data)
-            return obj
+        data = await self.fetch_raw_result(url)
+        obj: Dict[str, Any] = json.loads(data)
+        return obj
 
     async def post_json_result(self, url: str,
                                data: Dict[str, Any]) -> Dict[str, Any]:
-        u = f'{_URL_PREFIX}/{url}'
-        async with self._session.post(u, json=data) as resp:
-            resp_data: str = await resp.text()
-            if resp.status != HTTPStatus.CREATED:
-                _logger.error('Error posting', extra={
-                              'message': resp.reason,
-                              'status': resp.status,
-                              })
-                raise Error(resp.reason, resp.status)
-            obj: Dict[str, Any] = json.loads(resp_data)
-            return obj
+        resp_data = await self._request('POST', url, HTTPStatus.CREATED, data)
+        obj: Dict[str, Any] = json.loads(resp_data)
+        return obj
 
     async def put_json_result(self, url: str,
                               data: Dict[str, Any]) -> Dict[str, Any]:
-        u = f'{_URL_PREFIX}/{url}'
-        async with self._session.put(u, json=data) as resp:
-            resp_data: str = await resp.text()
-            if resp.status != HTTPStatus.OK:
-                _logger.error('Error posting', extra={
-                    'message': resp.reason,
-                    'status': resp.status,
-                })
-                raise Error(resp.reason, resp.status)
-            obj: Dict[str, Any] = json.loads(resp_data)
-            return obj
+        resp_data = await self._request('PUT', url, HTTPStatus.OK, data)
+        obj: Dict[str, Any] = json.loads(resp_data)
+        return obj
 
     async def delete(self, url: str, expected_status: HTTPStatus) -> None:
-        u = f'{_URL_PREFIX}/{url}'
-        async with self._session.delete(u) as resp:
-            if resp.status != expected_status:
-                _logger.error('Error posting', extra={
-                              'message': resp.reason,
-                              'status': resp.status,
-                              })
-                raise Error(resp.reason, resp.status)
+        await self._request('DELETE', url, expected_status)
 
     async def multi_fetch(self, model_type: Type[BaseModelT], url_part: str,
                           items_name: str) -> List[BaseModelT]:
@@ -130,18 +291,217 @@ class Fetcher:
             List[TBaseModel]: List of items
         """
         return_val: List[BaseModelT] = []
+        async for items in self._iter_json_pages(url_part, items_name):
+            return_val.extend(await self._build_models(model_type, items))
+        return return_val
+
+    async def multi_fetch_json(self, url_part: str,
+                               items_name: str) -> List[Dict[str, Any]]:
+        """Fetch the json of a list of items, paging if needed.
+        """
+        return_val: List[Dict[str, Any]] = []
+        async for items in self._iter_json_pages(url_part, items_name):
+            return_val.extend(items)
+        return return_val
+
+    async def _iter_json_pages(
+            self, url_part: str,
+            items_name: str) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Items of each page of a list, in offset order.
+
+        With a tuner allowing concurrency, the first page asks for the
+        total number of items, and the pages after it are fetched that
+        many at a time. Only the pages fetched but not yet consumed are
+        held.
+        """
+        concurrency = 1
+        if self._tuner is not None:
+            concurrency = self._tuner.settings(url_part).concurrency
+        sep = '&' if '?' in url_part else '?'
+        limit = self._page_limit(url_part)
+        total_query = '&total=true' if concurrency > 1 else ''
+        result = await self.fetch_json_result(
+            f'{url_part}{sep}offset=0&limit={limit}{total_query}')
+        more = result['more']
+        # Offset of the last page received
+        offset = 0
+        total = result.get('total')
+        yield result[items_name]
+        if more and total is not None:
+            limit = result.get('limit') or limit
+            pending: Deque['asyncio.Task[Dict[str, Any]]'] = (
+                collections.deque())
+            try:
+                for page_offset in range(limit, total, limit):
+                    if len(pending) >= concurrency:
+                        result = await pending.popleft()
+                        yield result[items_name]
+                    pending.append(asyncio.ensure_future(
+                        self.fetch_json_result(f'{url_part}{sep}offset='
+                                               f'{page_offset}&limit={limit}')))
+                    offset = page_offset
+                while pending:  # pylint: disable=while-used
+                    result = await pending.popleft()
+                    yield result[items_name]
+            finally:
+                for task in pending:
+                    task.cancel()
+            more = result['more']
+        offset += len(result[items_name])
+        # Items added since the total was read, or no total at all.
+        while more:  # pylint: disable=while-used
+            limit = self._page_limit(url_part)
+            result = await self.fetch_json_result(
+                f'{url_part}{sep}offset={offset}&limit={limit}')
+            more = result['more']
+            offset += len(result[items_name])
+            yield result[items_name]
+
+    async def cached_multi_fetch(self, model_type: Type[BaseModelT],
+                                 url_part: str,
+                                 items_name: str) -> List[BaseModelT]:
+        """Fetch a list through the cache, if the client has one.
+
+        When the cached list is missing or expired, only the process
+        holding the refresh lease crawls the API; the others wait for its
+        result to land in the cache.
+        """
+        if self._cache is None:
+            return await self.multi_fetch(model_type, url_part, items_name)
+        items = await self.cached_multi_fetch_json(url_part, items_name)
+        return await self._build_models(model_type, items)
+
+    async def cached_multi_fetch_json(self, url_part: str,
+                                      items_name: str) -> List[Dict[str, Any]]:
+        """Fetch the json of a list through the cache, if the client has
+        one. See `cached_multi_fetch`.
+        """
+        if (cache := self._cache) is None:
+            return await self.multi_fetch_json(url_part, items_name)
+        while (items := await self._cache_call(  # pylint: disable=while-used
+                cache.get, url_part)) is None:
+            if await self._cache_call(cache.acquire_lease, url_part,
+                                      self._cache_owner, _LEASE_TTL):
+                try:
+                    return await self._refresh_cached_list(cache, url_part,
+                                                           items_name)
+                finally:
+                    await self._cache_call(cache.release_lease, url_part,
+                                           self._cache_owner)
+            await asyncio.sleep(_LEASE_POLL_INTERVAL)
+        return items
+
+    async def _refresh_cached_list(
+            self, cache: CacheBackend, url_part: str,
+            items_name: str) -> List[Dict[str, Any]]:
+        # Another process may have refreshed the list and released its
+        # lease since it was found missing.
+        if (items := await self._cache_call(cache.get, url_part)) is None:
+            items = await self.multi_fetch_json(url_part, items_name)
+            await self._cache_call(cache.set, url_part, items,
+                                   self._cache_ttl)
+        return items
+
+    @property
+    def cache(self) -> Optional[CacheBackend]:
+        return self._cache
+
+    async def _cache_call(self, func: Callable[..., T], *args: Any) -> T:
+        # Calls to blocking backends are made off the event loop.
+        if self._cache is not None and self._cache.blocking:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, func, *args)
+        return func(*args)
+
+    async def cached_item(self, url_part: str,
+                          item_id: str) -> Optional[Dict[str, Any]]:
+        """Json of an item of a cached list, None if not cached."""
+        if self._cache is None:
+            return None
+        return await self._cache_call(self._cache.get_item, url_part,
+                                      item_id)
+
+    async def cache_item(self, url_part: str, item: Dict[str, Any]) -> None:
+        """Write an item through to its cached list, if the list is
+        cached.
+
+        Args:
+            url_part (str): Url of the list, eg. 'users'
+            item (Dict[str, Any]): Item json, with its 'id'
+        """
+        if self._cache is not None:
+            await self._cache_call(self._cache.upsert, url_part, item)
+
+    async def uncache_item(self, url_part: str, item_id: str) -> None:
+        """Remove a deleted item from its cached list."""
+        if self._cache is not None:
+            await self._cache_call(self._cache.remove, url_part, item_id)
+
+    async def refresh_cached_item(self, url_part: str, item_id: str,
+                                  item_name: str) -> Optional[Dict[str, Any]]:
+        """Refetch one item of a cached list and patch it into the cache.
+
+        Args:
+            url_part (str): Url of the list, eg. 'services'
+            item_id (str): Id of the item
+            item_name (str): Name of the item within the returned json
+
+        Returns:
+            Optional[Dict[str, Any]]: Item json, None if it no longer
+                                      exists and was removed from the cache.
+        """
+        if self._cache is None:
+            return None
+        try:
+            result = await self.fetch_json_result(f'{url_part}/{item_id}')
+        except Error as ex:
+            if ex.status != HTTPStatus.NOT_FOUND:
+                raise
+            await self.uncache_item(url_part, item_id)
+            return None
+        item: Dict[str, Any] = result[item_name]
+        await self.cache_item(url_part, item)
+        return item
+
+    async def iter_raw_pages(
+            self, url_part: str,
+            limit: Optional[int] = None) -> AsyncIterator[RawPage]:
+        """Fetch pages of a list without decoding them.
+
+        Only the pagination fields are read from each body, so the items
+        are never decoded into dicts or models.
+
+        Args:
+            url_part (str): Url part to make a query against
+            limit (int): Page size. Tuned for each page if None.
+
+        Yields:
+            RawPage: Body of each page, in offset order.
+        """
         fetch: bool = True
         offset = 0
-        limit = 100
+        sep = '&' if '?' in url_part else '?'
         while fetch is True:  # pylint: disable=while-used
-            url = f'{url_part}?offset={offset}&limit={limit}'
-            result = await self.fetch_json_result(url)
-            fetch = result['more']
-            offset += len(result[items_name])
-            for json_obj in result[items_name]:
-                item = model_type(**json_obj)
-                return_val.append(item)
-        return return_val
+            page_limit = limit or self._page_limit(url_part)
+            url = f'{url_part}{sep}offset={offset}&limit={page_limit}'
+            page = RawPage.parse(await self.fetch_raw_result(url), offset,
+                                 page_limit)
+            fetch = page.more
+            offset += page.limit
+            yield page
+
+    def _page_limit(self, url_part: str) -> int:
+        if self._tuner is None:
+            return MAX_LIMIT
+        return self._tuner.settings(url_part).limit
+
+    async def _build_models(self, model_type: Type[BaseModelT],
+                            json_objs: List[Dict[str, Any]]) -> List[BaseModelT]:
+        if self._executor is None:
+            return build_models(model_type, json_objs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, build_models,
+                                          model_type, json_objs)
 
     async def single_fetch(self, model_type: Type[BaseModelT], url: str,
                            item_name: str) -> BaseModelT:
@@ -160,6 +520,8 @@ class FetcherProtocol(Protocol):
     """Forward declarations for mypy
     """
 
+    async def fetch_raw_result(self, url: str) -> bytes: ...
+
     async def fetch_json_result(self, url: str) -> Dict[str, Any]: ...
 
     async def post_json_result(self, url: str,
@@ -173,6 +535,38 @@ class FetcherProtocol(Protocol):
     async def multi_fetch(self, model_type: Type[BaseModelT], url_part: str,
                           items_name: str) -> List[BaseModelT]: ...
 
+    def iter_raw_pages(
+            self, url_part: str,
+            limit: Optional[int] = None) -> AsyncIterator[RawPage]: ...
+
+    async def multi_fetch_json(self, url_part: str,
+                               items_name: str) -> List[Dict[str, Any]]: ...
+
+    async def cached_multi_fetch(self, model_type: Type[BaseModelT],
+                                 url_part: str,
+                                 items_name: str) -> List[BaseModelT]: ...
+
+    async def cached_multi_fetch_json(
+            self, url_part: str, items_name: str) -> List[Dict[str, Any]]: ...
+
+    @property
+    def cache(self) -> Optional[CacheBackend]: ...
+
+    async def cached_item(self, url_part: str,
+                          item_id: str) -> Optional[Dict[str, Any]]: ...
+
+    async def cache_item(self, url_part: str,
+                         item: Dict[str, Any]) -> None: ...
+
+    async def uncache_item(self, url_part: str, item_id: str) -> None: ...
+
+    async def refresh_cached_item(self, url_part: str, item_id: str,
+                                  item_name: str) -> Optional[Dict[str, Any]]: ...
+
+    async def _build_models(
+            self, model_type: Type[BaseModelT],
+            json_objs: List[Dict[str, Any]]) -> List[BaseModelT]: ...
+
     async def single_fetch(self, model_type: Type[BaseModelT], url: str,
                            item_name: str) -> BaseModelT: ...
 
@@ -0,0 +1,184 @@
+"""Incidents Mixin
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import urllib.parse
+from typing import (Any, AsyncIterator, Dict, List, Optional, Sequence, Set,
+                    Tuple)
+
+from aiopagerduty.fetcher import FetcherProtocol, RawPage
+from aiopagerduty.models import Incident
+
+_logger = logging.getLogger(__name__)
+
+# PagerDuty refuses pages past this offset, so a time window holding more
+# incidents has to be split in smaller ones.
+MAX_OFFSET = 10000
+# Windows are not split below this length.
+_MIN_WINDOW = datetime.timedelta(seconds=1)
+_DONE = object()
+
+Window = Tuple[datetime.datetime, datetime.datetime]
+
+
+def split_windows(since: datetime.datetime, until: datetime.datetime,
+                  count: int) -> List[Window]:
+    """Split a time range in count windows of the same length, on whole
+    seconds.
+    """
+    count = max(min(count, int((until - since) / _MIN_WINDOW)), 1)
+    step = (until - since) / count
+    bounds = [since]
+    bounds.extend((since + step * i).replace(microsecond=0)
+                  for i in range(1, count))
+    bounds.append(until)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _url(since: datetime.datetime, until: datetime.datetime,
+         params: Dict[str, Any]) -> str:
+    query = urllib.parse.urlencode({
+        'since': since.isoformat(),
+        'until': until.isoformat(),
+        **params,
+    }, doseq=True)
+    return f'incidents?{query}'
+
+
+class _WindowCrawler:
+    """Crawls the incident pages of time windows concurrently, splitting
+    the windows holding too many incidents to be paged through.
+    """
+
+    def __init__(self, fetcher: FetcherProtocol,
+                 statuses: Optional[Sequence[str]],
+                 service_ids: Optional[Sequence[str]],
+                 concurrency: int) -> None:
+        self._fetcher = fetcher
+        self._params: Dict[str, Any] = {}
+        if statuses:
+            self._params['statuses[]'] = list(statuses)
+        if service_ids:
+            self._params['service_ids[]'] = list(service_ids)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Bounds of every window crawled
+        self.bounds: Set[datetime.datetime] = set()
+        # Bounded, so that crawling waits for slow consumers.
+        self._pages: 'asyncio.Queue[Any]' = asyncio.Queue(concurrency * 2)
+
+    async def _total(self, since: datetime.datetime,
+                     until: datetime.datetime) -> int:
+        url = _url(since, until, {**self._params, 'limit': 1,
+                                  'total': 'true'})
+        result = await self._fetcher.fetch_json_result(url)
+        return int(result['total'] or 0)
+
+    async def _crawl(self, since: datetime.datetime,
+                     until: datetime.datetime) -> None:
+        self.bounds.update((since, until))
+        async with self._semaphore:
+            total = await self._total(since, until)
+        if total > MAX_OFFSET:
+            if until - since > _MIN_WINDOW:
+                await asyncio.gather(*(
+                    self._crawl(*window)
+                    for window in split_windows(since, until, 2)))
+                return
+            _logger.warning('Incidents past the offset limit are skipped',
+                            extra={'since': since.isoformat(),
+                                   'total': total})
+        if total == 0:
+            return
+        async with self._semaphore:
+            url = _url(since, until, self._params)
+            offset = 0
+            async for page in self._fetcher.iter_raw_pages(url):
+                await self._pages.put(page)
+                offset += page.limit
+                if offset >= MAX_OFFSET:
+                    break
+
+    async def _crawl_all(self, windows: Sequence[Window]) -> None:
+        try:
+            await asyncio.gather(*(self._crawl(*window)
+                                   for window in windows))
+        finally:
+            await self._pages.put(_DONE)
+
+    async def pages(self, windows: Sequence[Window]) -> AsyncIterator[RawPage]:
+        crawler = asyncio.ensure_future(self._crawl_all(windows))
+        try:
+            while True:  # pylint: disable=while-used
+                page = await self._pages.get()
+                if page is _DONE:
+                    break
+                yield page
+            # Raises the crawling error, if any.
+            await crawler
+        finally:
+            crawler.cancel()
+
+
+class IncidentsMixin:
+    """Incidents API Mixin
+    """
+
+    # pylint: disable=too-many-arguments
+    def list_incidents_raw(
+            self: FetcherProtocol, since: datetime.datetime,
+            until: datetime.datetime,
+            statuses: Optional[Sequence[str]] = None,
+            service_ids: Optional[Sequence[str]] = None,
+            windows: int = 16,
+            concurrency: int = 8) -> AsyncIterator[RawPage]:
+        """Fetch the pages of incidents created in a time range, without
+        decoding them.
+
+        The range is split in windows crawled concurrently, and windows
+        holding more incidents than can be paged through are split further.
+        Pages come in the order they are fetched, and pages of adjacent
+        windows may both hold an incident created on their shared boundary.
+
+        Args:
+            since (datetime): Start of the range, timezone aware.
+            until (datetime): End of the range, timezone aware.
+            statuses (Sequence[str]): Only incidents with these statuses.
+            service_ids (Sequence[str]): Only incidents of these services.
+            windows (int): Number of windows the range is first split in.
+            concurrency (int): Number of requests sent concurrently.
+
+        Returns:
+            AsyncIterator[RawPage]: Incident pages
+        """
+        crawler = _WindowCrawler(self, statuses, service_ids, concurrency)
+        return crawler.pages(split_windows(since, until, windows))
+
+    # pylint: disable=too-many-arguments
+    async def iter_incidents(
+            self: FetcherProtocol, since: datetime.datetime,
+            until: datetime.datetime,
+            statuses: Optional[Sequence[str]] = None,
+            service_ids: Optional[Sequence[str]] = None,
+            windows: int = 16,
+            concurrency: int = 8) -> AsyncIterator[Incident]:
+        """Fetch the incidents created in a time range, as they arrive.
+
+        Same as `list_incidents_raw`, except that incidents found in two
+        windows are only yielded once.
+        """
+        crawler = _WindowCrawler(self, statuses, service_ids, concurrency)
+        # Only incidents on window boundaries can be found twice, so only
+        # their ids are remembered.
+        seen: Set[str] = set()
+        async for page in crawler.pages(split_windows(since, until,
+                                                      windows)):
+            items = json.loads(page.body)['incidents']
+            for incident in await self._build_models(Incident, items):
+                if incident.created_at in crawler.bounds:
+                    if incident.id in seen:
+                        continue
+                    seen.add(incident.id)
+                yield incident
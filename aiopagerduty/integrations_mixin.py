@@ -44,4 +44,17 @@ class IntegrationsMixin:
         }
         intg = await self.post_json_result(url, data)
         model = Integration(**intg['integration'])
+
+        # Add the integration to the service's references in the cache.
+        cached = await self.cached_item('services', service.id)
+        if cached is not None:
+            ref = {
+                'id': model.id,
+                'summary': model.summary,
+                'self': model.self,
+                'html_url': model.html_url,
+                'type': f'{model.type}_reference',
+            }
+            cached['integrations'] = [*cached['integrations'], ref]
+            await self.cache_item('services', cached)
         return model
@@ -3,7 +3,7 @@
 
 import datetime
 from enum import Enum
-from typing import List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, ConstrainedStr, EmailStr
 
@@ -49,10 +49,13 @@ class Team(ObjectRef):
 
 class IncidentUrgencyDefinition(BaseModel):
     urgency: Literal['low', 'high', 'severity_based']
-    type: Literal['constant', 'user_support_hours']
+    type: Literal['constant', 'use_support_hours']
 
 
-class IncidentUrgencyRule(IncidentUrgencyDefinition):
+class IncidentUrgencyRule(BaseModel):
+    # Not set when the urgency depends on the support hours.
+    urgency: Optional[Literal['low', 'high', 'severity_based']]
+    type: Literal['constant', 'use_support_hours']
     during_support_hours: Optional[IncidentUrgencyDefinition]
     outside_support_hours: Optional[IncidentUrgencyDefinition]
 
@@ -73,7 +76,7 @@ class Service(ObjectRef):
     teams: List[ObjectRef]
     integrations: List[ObjectRef]
     incident_urgency_rule: IncidentUrgencyRule
-    support_hours: Optional[ObjectRef]
+    support_hours: Optional[SupportHours]
 
     class Config:
         use_enum_values = True
@@ -159,7 +162,7 @@ class UserInfo(BaseModel):
     name: UserName
     email: EmailStr
     # time_zone: datetime.tzinfo
-    time_zome: Optional[str]
+    time_zone: Optional[str]
     description: Optional[str]
     job_title: Optional[str]
     color: Optional[str]
@@ -292,8 +295,12 @@ class Extraction(BaseModel):
     # You can include variables extracted from the payload by using string
     # interpolation.
     # eg: `High CPU on {{hostname}} server`
-    template: str
+    # None for extractions using a regex instead.
+    template: Optional[str]
 
+    # The PD-CEF field the regex is applied to, and the RE2 regular
+    # expression whose capture groups are appended together, for
+    # extractions without a template.
     source: Optional[str]
     regex: Optional[str]
 
@@ -407,3 +414,71 @@ class EscalationPolicy(ObjectRef):
 
     class Config:
         use_enum_values = True
+
+
+class OnCall(BaseModel):
+    """User on call for a level of an escalation policy."""
+
+    user: ObjectRef
+    # Schedule the user is on call from, None when targeted directly.
+    schedule: Optional[ObjectRef]
+    escalation_policy: ObjectRef
+    escalation_level: int
+    # None when the user is on call without end, eg. targeted directly.
+    start: Optional[datetime.datetime]
+    end: Optional[datetime.datetime]
+
+
+class WebhookEvent(BaseModel):
+    """Event delivered by a PagerDuty v3 webhook subscription.
+    """
+    id: str
+    # eg: service.updated
+    event_type: str
+    # eg: service
+    resource_type: str
+    occurred_at: datetime.datetime
+    agent: Optional[ObjectRef]
+    # The affected resource, or a reference to it.
+    data: Dict[str, Any]
+
+
+class IncidentStatus(str, Enum):
+    TRIGGERED = 'triggered'
+    ACKNOWLEDGED = 'acknowledged'
+    RESOLVED = 'resolved'
+
+
+class Assignment(BaseModel):
+    at: datetime.datetime
+    assignee: ObjectRef
+
+
+class Acknowledgement(BaseModel):
+    at: datetime.datetime
+    acknowledger: ObjectRef
+
+
+class Incident(ObjectRef):
+    """Incident of a service.
+    """
+    incident_number: int
+    title: str
+    description: Optional[str]
+    status: IncidentStatus
+    urgency: Literal['low', 'high']
+    incident_key: Optional[str]
+    created_at: datetime.datetime
+    updated_at: Optional[datetime.datetime]
+    last_status_change_at: Optional[datetime.datetime]
+    resolved_at: Optional[datetime.datetime]
+    service: ObjectRef
+    escalation_policy: Optional[ObjectRef]
+    priority: Optional[ObjectRef]
+    teams: Optional[List[ObjectRef]]
+    # Current assignments; empty once the incident is resolved.
+    assignments: Optional[List[Assignment]]
+    acknowledgements: Optional[List[Acknowledgement]]
+
+    class Config:
+        use_enum_values = True
@@ -0,0 +1,205 @@
+"""Local cache of the users on call.
+
+`OnCallCache` fetches the on-call entries of escalation policies for a
+window of time, and turns the entries of each escalation level into a
+sorted array of interval bounds along with the users on call in each
+interval. Looking up who is on call at a point in time is then a binary
+search, without any request::
+
+    async with OnCallCache(client, policy_ids) as oncalls:
+        users = oncalls.users(service.escalation_policy.id, 1)
+
+The next window is fetched in the background before the current one ends,
+so that lookups never wait on the API. Until it is fetched, eg. when the
+API is down, lookups past the current window raise `LookupError`.
+"""
+
+import asyncio
+import bisect
+import datetime
+import logging
+import time
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from aiopagerduty.client import Client
+from aiopagerduty.models import ObjectRef, OnCall
+
+_logger = logging.getLogger(__name__)
+
+# Escalation policies per request, to keep urls short.
+_POLICIES_PER_REQUEST = 50
+
+Users = Tuple[ObjectRef, ...]
+
+
+class OnCallLevel:
+    """Users on call for an escalation level over a window.
+    """
+
+    def __init__(self, oncalls: Sequence[OnCall], since: float,
+                 until: float) -> None:
+        # Entries without start or end are on call over the whole window.
+        entries = []
+        for oncall in oncalls:
+            start = since if oncall.start is None else max(
+                oncall.start.timestamp(), since)
+            end = until if oncall.end is None else min(
+                oncall.end.timestamp(), until)
+            if start < end:
+                entries.append((start, end, oncall.user))
+        edges = {since, until}
+        for start, end, _ in entries:
+            edges.update((start, end))
+        # Intervals start at each bound but the last.
+        self.bounds = array('d', sorted(edges))
+        self.users: List[Users] = []
+        for start in self.bounds[:-1]:
+            self.users.append(tuple(user for begin, end, user in entries
+                                    if begin <= start < end))
+
+    def at(self, timestamp: float) -> Users:
+        """Users on call at a timestamp, none outside the window.
+        """
+        i = bisect.bisect_right(self.bounds, timestamp) - 1
+        if 0 <= i < len(self.users):
+            return self.users[i]
+        return ()
+
+
+class _Window(NamedTuple):
+    since: float
+    until: float
+    # (policy id, escalation level) -> users on call
+    levels: Dict[Tuple[str, int], OnCallLevel]
+
+
+class OnCallCache:
+    """Users on call for escalation policies, prefetched window by window.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, client: Client, policy_ids: Sequence[str],
+                 window: datetime.timedelta = datetime.timedelta(hours=6),
+                 lead: datetime.timedelta = datetime.timedelta(minutes=30),
+                 retry_delay: float = 10.0) -> None:
+        """Constructor
+
+        Args:
+            client (Client): Client fetching the on-call entries.
+            policy_ids (Sequence[str]): Escalation policies to cache.
+            window (timedelta): Length of the windows fetched.
+            lead (timedelta): How long before the end of a window the next
+                              one is fetched.
+            retry_delay (float): Seconds before fetching a window again
+                                 after an error.
+        """
+        self._client = client
+        self._policy_ids = list(policy_ids)
+        self._window = window.total_seconds()
+        self._lead = min(lead.total_seconds(), self._window / 2)
+        self._retry_delay = retry_delay
+        # Windows fetched, in order, the last one is the latest.
+        self._windows: List[_Window] = []
+        self._prefetcher: Optional['asyncio.Future[None]'] = None
+        self.stats: Dict[str, int] = {
+            'hits': 0,
+            'misses': 0,
+            'windows': 0,
+            'errors': 0,
+        }
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'OnCallCache':
+        await self.start()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Fetch the current window and start prefetching.
+
+        Raises:
+            Error: If the current window could not be fetched.
+        """
+        if self._prefetcher is not None:
+            return
+        self._windows = [await self._fetch(time.time())]
+        self._prefetcher = asyncio.ensure_future(self._prefetch())
+
+    async def close(self) -> None:
+        """Stop prefetching.
+        """
+        if self._prefetcher is None:
+            return
+        self._prefetcher.cancel()
+        await asyncio.gather(self._prefetcher, return_exceptions=True)
+        self._prefetcher = None
+
+    def users(self, policy_id: str, level: int,
+              at: Optional[datetime.datetime] = None) -> List[ObjectRef]:
+        """Users on call for an escalation level.
+
+        Args:
+            policy_id (str): Escalation policy id.
+            level (int): Escalation level, from 1.
+            at (datetime): Point in time, now by default.
+
+        Returns:
+            List[ObjectRef]: Users on call, none if the policy or level is
+                             not cached.
+
+        Raises:
+            LookupError: If the point in time is not in a window fetched.
+        """
+        timestamp = time.time() if at is None else at.timestamp()
+        for window in self._windows:
+            if window.since <= timestamp < window.until:
+                self.stats['hits'] += 1
+                oncall = window.levels.get((policy_id, level))
+                return [] if oncall is None else list(oncall.at(timestamp))
+        self.stats['misses'] += 1
+        raise LookupError(f'No on-call data at {timestamp}')
+
+    async def _fetch(self, since: float) -> _Window:
+        until = since + self._window
+        start = datetime.datetime.fromtimestamp(since, datetime.timezone.utc)
+        end = datetime.datetime.fromtimestamp(until, datetime.timezone.utc)
+        chunks = [
+            self._policy_ids[i:i + _POLICIES_PER_REQUEST]
+            for i in range(0, len(self._policy_ids), _POLICIES_PER_REQUEST)
+        ]
+        results = await asyncio.gather(*(
+            self._client.list_oncalls(chunk, start, end) for chunk in chunks))
+        grouped: Dict[Tuple[str, int], List[OnCall]] = {}
+        for oncalls in results:
+            for oncall in oncalls:
+                key = (oncall.escalation_policy.id, oncall.escalation_level)
+                grouped.setdefault(key, []).append(oncall)
+        self.stats['windows'] += 1
+        return _Window(since, until, {
+            key: OnCallLevel(oncalls, since, until)
+            for key, oncalls in grouped.items()
+        })
+
+    async def _prefetch(self) -> None:
+        while True:  # pylint: disable=while-used
+            latest = self._windows[-1]
+            await asyncio.sleep(max(latest.until - self._lead - time.time(),
+                                    0))
+            try:
+                window = await self._fetch(latest.until)
+            # Any error ending the task would leave the cache without
+            # windows, answering LookupError from then on.
+            except Exception:  # pylint: disable=broad-except
+                self.stats['errors'] += 1
+                _logger.exception('Error prefetching on-call window',
+                                  extra={'since': latest.until})
+                await asyncio.sleep(self._retry_delay)
+                continue
+            now = time.time()
+            self._windows = [
+                kept for kept in self._windows if kept.until > now
+            ] + [window]
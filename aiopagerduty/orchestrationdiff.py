@@ -0,0 +1,121 @@
+"""Structural diff of service orchestrations.
+
+`diff()` compares a desired `ServiceOrchestration` with the live one and
+returns the changes needed to go from one to the other, walking rule sets
+and rules by id and actions field by field. Metadata the API maintains
+(version, timestamps, self links) is not compared, so an orchestration
+read back after a write diffs empty against the one written.
+
+Paths name the changed element, eg. `sets[start].rules[r1].actions.severity`
+or `catch_all.actions.suppress`.
+"""
+
+from typing import Any, List, NamedTuple, Sequence
+
+from aiopagerduty.models import Action, Rule, RuleSet, ServiceOrchestration
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+REORDERED = 'reordered'
+
+# Fields of a rule compared besides its actions.
+_RULE_FIELDS = ('label', 'disabled', 'conditions')
+
+
+class Change(NamedTuple):
+    """One difference between the live and the desired orchestration.
+    """
+    op: str  # ADDED, REMOVED, CHANGED or REORDERED
+    path: str
+    old: Any = None
+    new: Any = None
+
+
+def _value(value: Any) -> Any:
+    # Models are compared and reported as their json.
+    if isinstance(value, list):
+        return [_value(item) for item in value]
+    if hasattr(value, 'dict'):
+        return value.dict()
+    return value
+
+
+def _diff_actions(path: str, old: Action, new: Action,
+                  changes: List[Change]) -> None:
+    for name in Action.__fields__:
+        old_value = _value(getattr(old, name))
+        new_value = _value(getattr(new, name))
+        if old_value != new_value:
+            changes.append(Change(CHANGED, f'{path}.{name}', old_value,
+                                  new_value))
+
+
+def _diff_rule(path: str, old: Rule, new: Rule,
+               changes: List[Change]) -> None:
+    for name in _RULE_FIELDS:
+        old_value = _value(getattr(old, name))
+        new_value = _value(getattr(new, name))
+        if old_value != new_value:
+            changes.append(Change(CHANGED, f'{path}.{name}', old_value,
+                                  new_value))
+    _diff_actions(f'{path}.actions', old.actions, new.actions, changes)
+
+
+def _diff_rules(path: str, old: Sequence[Rule], new: Sequence[Rule],
+                changes: List[Change]) -> None:
+    old_rules = {rule.id: rule for rule in old}
+    new_rules = {rule.id: rule for rule in new}
+    for rule in old:
+        if rule.id not in new_rules:
+            changes.append(Change(REMOVED, f'{path}[{rule.id}]', rule.dict()))
+    for rule in new:
+        old_rule = old_rules.get(rule.id)
+        if old_rule is None:
+            changes.append(
+                Change(ADDED, f'{path}[{rule.id}]', new=rule.dict()))
+        else:
+            _diff_rule(f'{path}[{rule.id}]', old_rule, rule, changes)
+
+    # Rules are evaluated in order, so moving one is a change too.
+    old_order = [rule.id for rule in old if rule.id in new_rules]
+    new_order = [rule.id for rule in new if rule.id in old_rules]
+    if old_order != new_order:
+        changes.append(Change(REORDERED, path, old_order, new_order))
+
+
+def _diff_sets(old: Sequence[RuleSet], new: Sequence[RuleSet],
+               changes: List[Change]) -> None:
+    old_sets = {rule_set.id: rule_set for rule_set in old}
+    new_sets = {rule_set.id: rule_set for rule_set in new}
+    for rule_set in old:
+        if rule_set.id not in new_sets:
+            changes.append(
+                Change(REMOVED, f'sets[{rule_set.id}]', rule_set.dict()))
+    for rule_set in new:
+        old_set = old_sets.get(rule_set.id)
+        if old_set is None:
+            changes.append(
+                Change(ADDED, f'sets[{rule_set.id}]', new=rule_set.dict()))
+        else:
+            _diff_rules(f'sets[{rule_set.id}].rules', old_set.rules,
+                        rule_set.rules, changes)
+
+
+def diff(live: ServiceOrchestration,
+         desired: ServiceOrchestration) -> List[Change]:
+    """Changes turning the live orchestration into the desired one.
+
+    Args:
+        live (ServiceOrchestration): Orchestration currently defined.
+        desired (ServiceOrchestration): Orchestration to define.
+
+    Returns:
+        List[Change]: Changes, empty if both define the same rules.
+    """
+    changes: List[Change] = []
+    _diff_sets(live.sets or [], desired.sets or [], changes)
+    _diff_actions('catch_all.actions', live.catch_all.actions,
+                  desired.catch_all.actions, changes)
+    return changes
+
@@ -0,0 +1,158 @@
+"""Offline evaluation of service orchestration rules.
+
+`CompiledOrchestration` compiles the rules of a `ServiceOrchestration`
+once and runs events through them the way PagerDuty routes them: rule
+sets are evaluated from the `start` set, the first enabled rule whose
+conditions match applies its actions and continues to its `route_to` set,
+if any. An event no rule of a set matches gets the `catch_all` actions.
+
+Events are PCL documents, see `aiopagerduty.pcl`. Comparing the matches
+of the live and the desired rules over historical events shows the effect
+of a rule change before it is pushed::
+
+    for event, old, new in changed(live, desired, events):
+        print(old.rules, '->', new.rules)
+"""
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from aiopagerduty.models import Action, ServiceOrchestration
+from aiopagerduty.pcl import (Compiler, Document, PCLError, Predicate,
+                              any_of)
+
+START_SET = 'start'
+
+
+class Match(NamedTuple):
+    """Outcome of an event's evaluation.
+    """
+    rules: Tuple[str, ...]  # Ids of the matched rules, in order
+    actions: Tuple[Action, ...]  # Actions applied, in order
+    catch_all: bool  # Whether the catch_all actions were applied
+
+
+class _Rule(NamedTuple):
+    id: str
+    predicate: Optional[Predicate]  # None matches every event
+    actions: Action
+    route_to: Optional[str]
+
+
+def _check_routes(sets: Dict[str, List[_Rule]]) -> None:
+    # Routes must lead to existing sets without looping.
+    state: Dict[str, int] = {}  # set id -> 1 while visiting, 2 once done
+
+    def visit(set_id: str) -> None:
+        state[set_id] = 1
+        for rule in sets[set_id]:
+            if not rule.route_to:
+                continue
+            if rule.route_to not in sets:
+                raise PCLError(f'Rule {rule.id} routes to unknown set',
+                               rule.route_to, 0)
+            if state.get(rule.route_to) == 1:
+                raise PCLError(f'Rule {rule.id} routes in a loop',
+                               rule.route_to, 0)
+            if rule.route_to not in state:
+                visit(rule.route_to)
+        state[set_id] = 2
+
+    for set_id in sets:
+        if set_id not in state:
+            visit(set_id)
+
+
+class CompiledOrchestration:
+    """Rules of a service orchestration compiled for evaluation.
+    """
+
+    def __init__(self, orchestration: ServiceOrchestration) -> None:
+        """Constructor
+
+        Args:
+            orchestration (ServiceOrchestration): Rules to evaluate.
+
+        Raises:
+            PCLError: If a condition is invalid or a rule routes to an
+                      unknown set or in a loop.
+        """
+        rule_sets = orchestration.sets or []
+        enabled = [(rule_set.id, rule) for rule_set in rule_sets
+                   for rule in rule_set.rules
+                   if not rule.disabled and not rule.actions.disabled]
+
+        # Every condition is added first so that shared subexpressions are
+        # known when compiling.
+        self._compiler = Compiler()
+        for _, rule in enabled:
+            for condition in rule.conditions:
+                self._compiler.add(condition.expression)
+
+        self._sets: Dict[str, List[_Rule]] = {
+            rule_set.id: [] for rule_set in rule_sets
+        }
+        for set_id, rule in enabled:
+            predicates = [
+                self._compiler.compile(condition.expression)
+                for condition in rule.conditions
+            ]
+            self._sets[set_id].append(
+                _Rule(rule.id, self._any(predicates), rule.actions,
+                      rule.actions.route_to))
+        _check_routes(self._sets)
+        self._catch_all = orchestration.catch_all.actions
+
+    @staticmethod
+    def _any(predicates: List[Predicate]) -> Optional[Predicate]:
+        # A rule matches when any of its conditions does.
+        if not predicates:
+            return None
+        if len(predicates) == 1:
+            return predicates[0]
+        return any_of(predicates)
+
+    def evaluate(self, event: Document) -> Match:
+        """Evaluate the rules against one event.
+        """
+        memo = self._compiler.new_memo()
+        rules: List[str] = []
+        actions: List[Action] = []
+        rule_set = self._sets.get(START_SET)
+        while rule_set is not None:  # pylint: disable=while-used
+            for rule in rule_set:
+                if rule.predicate is None or rule.predicate(event, memo):
+                    rules.append(rule.id)
+                    actions.append(rule.actions)
+                    if not rule.route_to:
+                        return Match(tuple(rules), tuple(actions), False)
+                    rule_set = self._sets[rule.route_to]
+                    break
+            else:
+                rule_set = None
+        actions.append(self._catch_all)
+        return Match(tuple(rules), tuple(actions), True)
+
+    def evaluate_batch(self, events: Iterable[Document]) -> Iterator[Match]:
+        """Evaluate the rules against events, lazily and in order.
+        """
+        evaluate = self.evaluate
+        for event in events:
+            yield evaluate(event)
+
+
+def changed(
+    old: ServiceOrchestration, new: ServiceOrchestration,
+    events: Iterable[Document]
+) -> Iterator[Tuple[Document, Match, Match]]:
+    """Events evaluated differently by the old and the new rules.
+
+    Yields:
+        Tuple[Document, Match, Match]: Event, old match and new match.
+    """
+    old_rules = CompiledOrchestration(old)
+    new_rules = CompiledOrchestration(new)
+    for event in events:
+        old_match = old_rules.evaluate(event)
+        new_match = new_rules.evaluate(event)
+        if old_match != new_match:
+            yield event, old_match, new_match
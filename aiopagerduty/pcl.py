@@ -0,0 +1,403 @@
+"""PagerDuty Condition Language (PCL) compiler.
+
+Compiles the condition expressions of orchestration rules, eg.
+`event.summary matches part 'cpu' and not event.source exists`, into
+Python predicates over event documents. A document is a dict holding the
+paths the conditions refer to, eg. `{'event': {...}, 'raw_event': {...}}`
+for `event.summary` or `raw_event.host`.
+
+Supported syntax:
+
+- `<path> matches '<text>'`: the field equals text.
+- `<path> matches part '<text>'`: the field contains text.
+- `<path> matches regex '<regex>'`: the regex matches part of the field.
+- `<path> exists`: the field is set.
+- `<path> == != < <= > >= <literal>`: comparison with a string, number,
+  `true` or `false`.
+- `not`, `and`, `or` and parentheses.
+
+String operators compare the string form of non string fields. A missing
+field fails every test but `not`.
+
+Expressions compiled by one `Compiler` share identical subexpressions: a
+subexpression used by several conditions, eg. the same field test in many
+rules, is evaluated at most once per document.
+"""
+
+import operator
+import re
+from typing import (Any, Callable, Dict, Iterator, List, NoReturn, Pattern,
+                    Tuple)
+
+Document = Dict[str, Any]
+# Predicates take the document and its memo of shared subexpressions.
+Predicate = Callable[[Document, List[Any]], bool]
+
+# Parsed expressions, as nested tuples so that identical subexpressions
+# compare and hash equal. Comparisons hold the type name of their literal
+# next to it, as `1 == 1.0 == True` would otherwise make `x == 1` and
+# `x == true` the same node.
+Node = Tuple[Any, ...]
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op>==|!=|<=|>=|<|>)
+      | (?P<paren>[()])
+      | (?P<word>[A-Za-z_][\w-]*(?:\.[A-Za-z_][\w-]*)*)
+    )''', re.VERBOSE)
+
+# Only quotes and backslashes are escaped, regexes keep their escapes.
+_ESCAPE_RE = re.compile(r'''\\(['"\\])''')
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+# Kinds of tokens
+_STRING = 'string'
+_NUMBER = 'number'
+_OP = 'op'
+_WORD = 'word'
+_PAREN = 'paren'
+
+# Kinds of nodes, besides the comparison operators
+_FIELD = 'field'
+_AND = 'and'
+_OR = 'or'
+_NOT = 'not'
+_EXISTS = 'exists'
+_MATCHES = 'matches'
+_MATCHES_PART = 'matches part'
+_MATCHES_REGEX = 'matches regex'
+
+_TRUE = 'true'
+_FALSE = 'false'
+
+# Value of the fields missing from a document
+MISSING = object()
+_UNSET = object()
+
+
+class PCLError(ValueError):
+    """Invalid or unsupported PCL expression.
+    """
+
+    def __init__(self, message: str, expression: str, position: int):
+        super().__init__(f'{message} at {position}: {expression!r}')
+        self.expression = expression
+        self.position = position
+
+
+def _tokenize(expression: str) -> Iterator[Tuple[str, Any, int]]:
+    position = 0
+    end = len(expression.rstrip())
+    while position < end:  # pylint: disable=while-used
+        if (match := _TOKEN_RE.match(expression, position)) is None:
+            raise PCLError('Unexpected character', expression, position)
+        kind = match.lastgroup or ''
+        text = match.group(kind)
+        value: Any = text
+        if kind == _STRING:
+            value = _ESCAPE_RE.sub(r'\1', text[1:-1])
+        elif kind == _NUMBER:
+            value = int(text) if text.lstrip('-').isdigit() else float(text)
+        yield kind, value, match.start(kind)
+        position = match.end()
+
+
+class _Parser:
+    """Recursive descent parser of one expression into a `Node`.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self._expression = expression
+        self._tokens = list(_tokenize(expression))
+        self._pos = 0
+
+    def parse(self) -> Node:
+        node = self._or()
+        if self._pos < len(self._tokens):
+            self._fail('Unexpected token')
+        return node
+
+    def _fail(self, message: str) -> NoReturn:
+        position = (self._tokens[self._pos][2] if self._pos < len(
+            self._tokens) else len(self._expression))
+        raise PCLError(message, self._expression, position)
+
+    def _peek(self, value: str) -> bool:
+        return (self._pos < len(self._tokens) and
+                self._tokens[self._pos][0] in {_WORD, _OP, _PAREN} and
+                self._tokens[self._pos][1] == value)
+
+    def _take(self, kind: str) -> Any:
+        if self._pos >= len(self._tokens) or self._tokens[self._pos][0] != kind:
+            self._fail(f'Expected {kind}')
+        value = self._tokens[self._pos][1]
+        self._pos += 1
+        return value
+
+    def _or(self) -> Node:
+        nodes = [self._and()]
+        while self._peek(_OR):  # pylint: disable=while-used
+            self._pos += 1
+            nodes.append(self._and())
+        return nodes[0] if len(nodes) == 1 else (_OR, *nodes)
+
+    def _and(self) -> Node:
+        nodes = [self._unary()]
+        while self._peek(_AND):  # pylint: disable=while-used
+            self._pos += 1
+            nodes.append(self._unary())
+        return nodes[0] if len(nodes) == 1 else (_AND, *nodes)
+
+    def _unary(self) -> Node:
+        if self._peek(_NOT):
+            self._pos += 1
+            return (_NOT, self._unary())
+        if self._peek('('):
+            self._pos += 1
+            node = self._or()
+            if not self._peek(')'):
+                self._fail('Expected )')
+            self._pos += 1
+            return node
+        return self._test()
+
+    def _literal(self) -> Any:
+        if self._peek(_TRUE) or self._peek(_FALSE):
+            return self._take(_WORD) == _TRUE
+        if self._pos < len(self._tokens) and self._tokens[self._pos][0] in {
+                _STRING, _NUMBER}:
+            self._pos += 1
+            return self._tokens[self._pos - 1][1]
+        self._fail('Expected a literal')
+
+    def _test(self) -> Node:
+        field = (_FIELD, self._take(_WORD))
+        if self._peek(_EXISTS):
+            self._pos += 1
+            return (_EXISTS, field)
+        if self._peek(_MATCHES):
+            self._pos += 1
+            kind = _MATCHES
+            if self._peek('part') or self._peek('regex'):
+                kind = f'{_MATCHES} {self._take(_WORD)}'
+            return (kind, field, str(self._take(_STRING)))
+        if self._pos < len(self._tokens) and self._tokens[self._pos][0] == _OP:
+            op = self._take(_OP)
+            literal = self._literal()
+            return (op, field, type(literal).__name__, literal)
+        self._fail('Expected an operator')
+
+
+def parse(expression: str) -> Node:
+    """Parse a PCL expression.
+
+    Raises:
+        PCLError: If the expression is invalid.
+    """
+    return _Parser(expression).parse()
+
+
+def _walk(node: Node) -> Iterator[Node]:
+    yield node
+    for child in node[1:]:
+        if isinstance(child, tuple):
+            yield from _walk(child)
+
+
+def field_lookup(path: str) -> Callable[[Document], Any]:
+    """Function reading a dotted path from a document, MISSING if it is
+    not set.
+    """
+    keys = path.split('.')
+
+    def lookup(doc: Document) -> Any:
+        value: Any = doc
+        for key in keys:
+            if not isinstance(value, dict):
+                return MISSING
+            value = value.get(key, MISSING)
+        return MISSING if value is None else value
+
+    return lookup
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bool):
+        return _TRUE if value else _FALSE
+    return value if isinstance(value, str) else str(value)
+
+
+def _compare(op: Callable[[Any, Any], bool], value: Any, literal: Any) -> bool:
+    if isinstance(literal, (bool, str)):
+        return op(_text(value), _text(literal))
+    try:
+        return op(float(value), literal)
+    except (TypeError, ValueError):
+        return False
+
+
+def all_of(predicates: List[Predicate]) -> Predicate:
+    """Predicate matching when all the predicates, two or more, do."""
+    first, second, *others = predicates
+    if others:
+        return lambda doc, memo: all(
+            predicate(doc, memo) for predicate in predicates)
+    return lambda doc, memo: first(doc, memo) and second(doc, memo)
+
+
+def any_of(predicates: List[Predicate]) -> Predicate:
+    """Predicate matching when any of the predicates, two or more, does."""
+    first, second, *others = predicates
+    if others:
+        return lambda doc, memo: any(
+            predicate(doc, memo) for predicate in predicates)
+    return lambda doc, memo: first(doc, memo) or second(doc, memo)
+
+
+class Compiler:
+    """Compiles PCL expressions into predicates sharing subexpressions.
+
+    All the expressions must be added with `add()` before any is compiled
+    with `compile()`, so that the subexpressions they share are known.
+    """
+
+    def __init__(self) -> None:
+        self._parsed: Dict[str, Node] = {}
+        self._uses: Dict[Node, int] = {}
+        self._compiled: Dict[Node, Predicate] = {}
+        self._slots: Dict[Node, int] = {}
+        self._regexes: Dict[str, Pattern[str]] = {}
+
+    def new_memo(self) -> List[Any]:
+        """A fresh memo, to be used for one document.
+        """
+        return [_UNSET] * len(self._slots)
+
+    def add(self, expression: str) -> None:
+        """Parse an expression to be compiled.
+
+        Raises:
+            PCLError: If the expression is invalid.
+        """
+        if (node := self._parsed.get(expression)) is None:
+            node = self._parsed[expression] = parse(expression)
+        for sub in _walk(node):
+            self._uses[sub] = self._uses.get(sub, 0) + 1
+            if sub[0] == _MATCHES_REGEX:
+                self._regex(sub[2])
+
+    def compile(self, expression: str) -> Predicate:
+        """Predicate of an expression previously added.
+        """
+        return self._node(self._parsed[expression])
+
+    def _regex(self, text: str) -> Pattern[str]:
+        if (regex := self._regexes.get(text)) is None:
+            try:
+                regex = self._regexes[text] = re.compile(text)
+            except re.error as ex:
+                raise PCLError(f'Invalid regex ({ex})', text,
+                               ex.pos or 0) from ex
+        return regex
+
+    def _node(self, node: Node) -> Predicate:
+        if (compiled := self._compiled.get(node)) is not None:
+            return compiled
+        kind = node[0]
+        build = (Compiler._build_comparison if kind in _COMPARISONS else
+                 Compiler._BUILDERS[kind])
+        compiled = build(self, node)
+        if self._uses.get(node, 0) > 1:
+            compiled = self._memoized(node, compiled)
+        self._compiled[node] = compiled
+        return compiled
+
+    def _memoized(self, node: Node, compiled: Predicate) -> Predicate:
+        slot = self._slots[node] = len(self._slots)
+
+        def memoized(doc: Document, memo: List[Any]) -> Any:
+            if (value := memo[slot]) is _UNSET:
+                value = memo[slot] = compiled(doc, memo)
+            return value
+
+        return memoized
+
+    def _build_field(self, node: Node) -> Predicate:
+        lookup = field_lookup(node[1])
+        return lambda doc, memo: lookup(doc)
+
+    def _build_and(self, node: Node) -> Predicate:
+        return all_of([self._node(child) for child in node[1:]])
+
+    def _build_or(self, node: Node) -> Predicate:
+        return any_of([self._node(child) for child in node[1:]])
+
+    def _build_not(self, node: Node) -> Predicate:
+        child = self._node(node[1])
+        return lambda doc, memo: not child(doc, memo)
+
+    def _build_exists(self, node: Node) -> Predicate:
+        field = self._node(node[1])
+        return lambda doc, memo: field(doc, memo) is not MISSING
+
+    def _test(self, node: Node, check: Callable[[Any], bool]) -> Predicate:
+        # Check of the value of a field test, failing on missing fields.
+        field = self._node(node[1])
+
+        def predicate(doc: Document, memo: List[Any]) -> bool:
+            value = field(doc, memo)
+            return value is not MISSING and check(value)
+
+        return predicate
+
+    def _build_matches(self, node: Node) -> Predicate:
+        literal = node[-1]
+        return self._test(node, lambda value: _text(value) == literal)
+
+    def _build_matches_part(self, node: Node) -> Predicate:
+        literal = node[-1]
+        return self._test(node, lambda value: literal in _text(value))
+
+    def _build_matches_regex(self, node: Node) -> Predicate:
+        search = self._regex(node[-1]).search
+        return self._test(node,
+                          lambda value: search(_text(value)) is not None)
+
+    def _build_comparison(self, node: Node) -> Predicate:
+        op = _COMPARISONS[node[0]]
+        literal = node[-1]
+        return self._test(node, lambda value: _compare(op, value, literal))
+
+    # Node kind -> builder of its predicate, but for comparisons
+    _BUILDERS: Dict[str, Callable[['Compiler', Node], Predicate]] = {
+        _FIELD: _build_field,
+        _AND: _build_and,
+        _OR: _build_or,
+        _NOT: _build_not,
+        _EXISTS: _build_exists,
+        _MATCHES: _build_matches,
+        _MATCHES_PART: _build_matches_part,
+        _MATCHES_REGEX: _build_matches_regex,
+    }
+
+def compile_expression(expression: str) -> Callable[[Document], bool]:
+    """Compile a single PCL expression into a predicate over documents.
+
+    Raises:
+        PCLError: If the expression is invalid.
+    """
+    compiler = Compiler()
+    compiler.add(expression)
+    predicate = compiler.compile(expression)
+    return lambda doc: bool(predicate(doc, compiler.new_memo()))
+
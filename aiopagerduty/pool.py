@@ -0,0 +1,148 @@
+"""Pool of Clients, one per PagerDuty account.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, Generic,
+                    List, Mapping, Optional, TypeVar)
+
+from aiopagerduty.client import Client
+from aiopagerduty.ratelimit import DEFAULT_PERIOD, DEFAULT_RATE, RateLimiter
+from aiopagerduty.transport import Transport
+
+T = TypeVar('T')
+
+_logger = logging.getLogger(__name__)
+
+
+class AccountResult(Generic[T]):
+    """Outcome of an operation run against one account.
+    """
+
+    __slots__ = ('account', 'value', 'error')
+
+    def __init__(self, account: str, value: Optional[T] = None,
+                 error: Optional[BaseException] = None) -> None:
+        self.account = account
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f'AccountResult({self.account!r}, error={self.error!r})'
+        return f'AccountResult({self.account!r})'
+
+
+class ClientPool:
+    """Runs the same operation across many PagerDuty accounts.
+
+    Every account gets its own Client and rate budget. All the clients
+    share one Transport::
+
+        async with ClientPool({'prod': key1, 'staging': key2}) as pool:
+            async for result in pool.run(lambda pd: pd.list_services()):
+                print(result.account, result.value or result.error)
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, api_keys: Mapping[str, str],
+                 rate: float = DEFAULT_RATE, period: float = DEFAULT_PERIOD,
+                 max_concurrency: int = 10,
+                 transport: Optional[Transport] = None,
+                 executor: Optional[Executor] = None,
+                 **client_kwargs: Any) -> None:
+        """Constructor
+
+        Args:
+            api_keys (Mapping[str, str]): API key, keyed by account name.
+            rate (float): Requests allowed per period, per account.
+            period (float): Rate period in seconds.
+            max_concurrency (int): Maximum number of accounts an operation
+                                   runs against at the same time.
+            transport (Transport): Shared transport. The pool opens and
+                                   closes its own if None.
+            executor (Executor): Executor to construct models in, eg. a
+                                 ProcessPoolExecutor. Owned by the caller.
+            client_kwargs: Passed on to every Client, eg. base_url.
+        """
+        self._owns_transport = transport is None
+        self._transport = transport or Transport()
+        self._max_concurrency = max_concurrency
+        self._clients: Dict[str, Client] = {
+            account: Client(api_key, transport=self._transport,
+                            rate_limiter=RateLimiter(rate, period),
+                            executor=executor, **client_kwargs)
+            for account, api_key in api_keys.items()
+        }
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'ClientPool':
+        await self._transport.open()
+        for client in self._clients.values():
+            await client.__aenter__()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        for client in self._clients.values():
+            await client.__aexit__(*args)
+        if self._owns_transport:
+            await self._transport.close()
+
+    @property
+    def accounts(self) -> List[str]:
+        return list(self._clients)
+
+    def client(self, account: str) -> Client:
+        return self._clients[account]
+
+    async def run(
+        self, operation: Callable[[Client], Awaitable[T]]
+    ) -> AsyncIterator[AccountResult[T]]:
+        """Run operation against every account, yielding results as they
+        complete. A failing account yields its error instead of stopping
+        the others.
+
+        Args:
+            operation (Callable[[Client], Awaitable[T]]): Operation to run,
+                eg. `lambda pd: pd.list_users()`.
+
+        Yields:
+            AccountResult[T]: Result of each account, in completion order.
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def run_one(account: str, client: Client) -> AccountResult[T]:
+            async with semaphore:
+                try:
+                    return AccountResult(account, value=await operation(client))
+                except Exception as ex:  # pylint: disable=broad-except
+                    _logger.warning('Operation failed', extra={
+                        'account': account,
+                        'error': str(ex),
+                    })
+                    return AccountResult(account, error=ex)
+
+        tasks = [asyncio.ensure_future(run_one(account, client))
+                 for account, client in self._clients.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def gather(
+        self, operation: Callable[[Client], Awaitable[T]]
+    ) -> Dict[str, AccountResult[T]]:
+        """Run operation against every account and wait for all of them.
+
+        Returns:
+            Dict[str, AccountResult[T]]: Results keyed by account.
+        """
+        return {result.account: result async for result in self.run(operation)}
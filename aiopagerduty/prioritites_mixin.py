@@ -1,13 +1,17 @@
 """PrioritiesMixin
 """
-from aiopagerduty.fetcher import FetcherProtocol
+from aiopagerduty.fetcher import FetcherProtocol, RawPage
 from aiopagerduty.models import Priority
 
-from typing import List
+from typing import AsyncIterator, List
 
 
 class PrioritiesMixin:
 
     async def list_priorities(self: FetcherProtocol) -> List[Priority]:
         query_url = 'priorities'
-        return await self.multi_fetch(Priority, query_url, 'priorities')
+        return await self.cached_multi_fetch(Priority, query_url,
+                                             'priorities')
+
+    def list_priorities_raw(self: FetcherProtocol) -> AsyncIterator[RawPage]:
+        return self.iter_raw_pages('priorities')
@@ -0,0 +1,300 @@
+"""Read-through caching proxy for the PagerDuty API.
+
+Workers point their Client's `base_url` at the proxy instead of the
+PagerDuty API. The proxy holds the only upstream API key and rate budget,
+so adding workers does not add API consumption:
+
+- GET responses are cached for `ttl` seconds, keyed by path and query.
+- Concurrent GETs of the same url are coalesced into one upstream request.
+- Writes are passed through and invalidate the cached responses of the
+  collection they modify, eg. `PUT users/P1` invalidates `users*`.
+
+Requests are signed with the upstream key whoever sends them, so the proxy
+should only accept known workers: given `tokens`, it answers 401 to
+requests whose Authorization header does not hold one of them, ie. workers
+use a proxy token as their api key. Without tokens, any process that can
+connect to the proxy reads and writes with the upstream key, which is why
+it listens on localhost by default.
+
+Run it with::
+
+    PAGERDUTY_API_KEY=... PAGERDUTY_PROXY_TOKEN=... \
+        python -m aiopagerduty.proxy --port 8081
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import aiohttp
+from aiohttp import hdrs, web
+
+from aiopagerduty.fetcher import _URL_PREFIX, Error, Fetcher
+from aiopagerduty.ratelimit import DEFAULT_PERIOD, DEFAULT_RATE, RateLimiter
+from aiopagerduty.transport import Transport
+
+_logger = logging.getLogger(__name__)
+
+_JSON = 'application/json'
+_LOCALHOST = 'localhost'
+
+
+def _collection(path_qs: str) -> str:
+    return path_qs.split('?', 1)[0].strip('/').split('/', 1)[0]
+
+
+class CachingProxy:
+    """Coalescing, caching and rate limiting proxy of the PagerDuty API.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, api_key: str, upstream_url: str = _URL_PREFIX, *,
+                 ttl: float = 60.0, max_entries: int = 10000,
+                 rate: float = DEFAULT_RATE, period: float = DEFAULT_PERIOD,
+                 transport: Optional[Transport] = None,
+                 max_retries: int = 3,
+                 tokens: Optional[Sequence[str]] = None) -> None:
+        """Constructor
+
+        Args:
+            api_key (str): Upstream PagerDuty API key.
+            upstream_url (str): PagerDuty API server url.
+            ttl (float): Seconds a GET response is served from the cache.
+            max_entries (int): Number of responses cached, least recently
+                               used ones are evicted first.
+            rate (float): Upstream requests allowed per period, for the
+                          whole fleet of workers.
+            period (float): Rate period in seconds.
+            transport (Transport): Upstream connection pool.
+            max_retries (int): Upstream retries of throttled requests.
+            tokens (Sequence[str]): Api keys accepted from the workers.
+                                    Any request is accepted if None.
+        """
+        self._fetcher = Fetcher(api_key, base_url=upstream_url,
+                                transport=transport,
+                                rate_limiter=RateLimiter(rate, period),
+                                max_retries=max_retries)
+        self._authorizations = (
+            None if tokens is None else
+            [f'Token token={token}'.encode() for token in tokens])
+        self._ttl = ttl
+        self._max_entries = max_entries
+        # path and query -> (expiry, body)
+        self._cache: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._inflight: Dict[str, 'asyncio.Future[bytes]'] = {}
+        # collection -> number of times it was invalidated
+        self._generations: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'writes': 0,
+            'invalidated': 0,
+            'unauthorized': 0,
+        }
+
+        self.app = web.Application()
+        self.app.router.add_get('/_proxy/stats', self._stats)
+        self.app.router.add_route('*', '/{path:.*}', self._handle)
+        self._stack = contextlib.AsyncExitStack()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ''
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'CachingProxy':
+        await self.start()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        await self.stop()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        await self._stack.enter_async_context(self._fetcher)
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.url = f'http://{bound_host}:{bound_port}'
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        await self._stack.aclose()
+
+    def invalidate(self, collection: str) -> None:
+        """Drop every cached response of a collection, eg. 'services'.
+        """
+        self._generations[collection] = self._generations.get(collection,
+                                                              0) + 1
+        stale = [key for key in self._cache if _collection(key) == collection]
+        for key in stale:
+            del self._cache[key]
+        self.stats['invalidated'] += len(stale)
+
+    def _cached(self, key: str) -> Optional[bytes]:
+        if (entry := self._cache.get(key)) is None:
+            return None
+        expiry, body = entry
+        if expiry < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return body
+
+    def _store(self, key: str, body: bytes) -> None:
+        self._cache[key] = (time.monotonic() + self._ttl, body)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_entries:  # pylint: disable=while-used
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, key: str) -> bytes:
+        collection = _collection(key)
+        generation = self._generations.get(collection, 0)
+        try:
+            body = await self._fetcher.fetch_raw_result(key)
+        finally:
+            del self._inflight[key]
+        # A write during the fetch may have made the response stale.
+        if self._generations.get(collection, 0) == generation:
+            self._store(key, body)
+        return body
+
+    async def _read(self, key: str) -> bytes:
+        if (body := self._cached(key)) is not None:
+            self.stats['hits'] += 1
+            return body
+        if (inflight := self._inflight.get(key)) is not None:
+            self.stats['coalesced'] += 1
+        else:
+            self.stats['misses'] += 1
+            inflight = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = inflight
+        # Shielded so that a worker disconnecting does not cancel the
+        # upstream request other workers are waiting on.
+        return await asyncio.shield(inflight)
+
+    def _authorized(self, request: web.Request) -> bool:
+        if self._authorizations is None:
+            return True
+        authorization = request.headers.get('Authorization', '').encode()
+        # Every token is compared, in constant time.
+        return sum(hmac.compare_digest(authorization, accepted)
+                   for accepted in self._authorizations) > 0
+
+    async def _write(self, request: web.Request,
+                     key: str) -> Tuple[int, bytes]:
+        data = await request.json() if request.can_read_body else None
+        self.stats['writes'] += 1
+        try:
+            return await self._fetcher.send(request.method, key, data)
+        finally:
+            # Invalidate even on errors, the write may have been applied.
+            self.invalidate(_collection(key))
+
+    async def _get(self, key: str) -> Tuple[int, bytes]:
+        return HTTPStatus.OK, await self._read(key)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            self.stats['unauthorized'] += 1
+            return _error('Unauthorized', HTTPStatus.UNAUTHORIZED)
+        key = request.path_qs.lstrip('/')
+        response = (self._get(key) if request.method == hdrs.METH_GET
+                    else self._write(request, key))
+        try:
+            status, body = await response
+        except Error as ex:
+            if _is_json(ex.body):
+                # The PagerDuty error, with its detailed errors.
+                return web.Response(status=ex.status, body=ex.body,
+                                    content_type=_JSON)
+            return _error(ex.message, ex.status)
+        except json.JSONDecodeError:
+            return _error('Invalid JSON body', HTTPStatus.BAD_REQUEST)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            _logger.error('Upstream request failed', extra={
+                          'method': request.method,
+                          'url': key,
+                          'error': repr(ex),
+                          })
+            return _error('Upstream request failed', HTTPStatus.BAD_GATEWAY)
+        if not body:
+            return web.Response(status=status)
+        return web.Response(status=status, body=body, content_type=_JSON)
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        del request
+        return web.json_response({**self.stats, 'entries': len(self._cache)})
+
+
+def _error(message: Optional[str], status: int) -> web.Response:
+    error = {'error': {'message': message, 'code': status}}
+    return web.json_response(error, status=status)
+
+
+def _is_json(body: bytes) -> bool:
+    try:
+        json.loads(body)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_loopback(host: str) -> bool:
+    if host == _LOCALHOST:
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='PagerDuty caching proxy')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--upstream', default=_URL_PREFIX)
+    parser.add_argument('--ttl', type=float, default=60.0)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='upstream requests per minute')
+    args = parser.parse_args()
+
+    api_key = os.environ['PAGERDUTY_API_KEY']
+    token = os.environ.get('PAGERDUTY_PROXY_TOKEN')
+    if token is None and not _is_loopback(args.host):
+        parser.error('PAGERDUTY_PROXY_TOKEN is required to listen on '
+                     f'{args.host}')
+    logging.basicConfig(level=logging.INFO)
+    if token is None:
+        _logger.warning('No PAGERDUTY_PROXY_TOKEN, any local process can '
+                        'use the upstream api key')
+    proxy = CachingProxy(api_key, upstream_url=args.upstream, ttl=args.ttl,
+                         rate=args.rate,
+                         tokens=None if token is None else [token])
+
+    async def serve() -> None:
+        await proxy.start(args.host, args.port)
+        _logger.info('Proxy listening on %s', proxy.url)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await proxy.stop()
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
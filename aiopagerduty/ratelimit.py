@@ -0,0 +1,68 @@
+"""Client side rate limiting of PagerDuty API requests.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+# PagerDuty allows 960 REST API requests per minute per API key.
+DEFAULT_RATE = 960
+DEFAULT_PERIOD = 60.0
+
+
+class RateLimiter:
+    """Token bucket limiting the request rate of one API key.
+
+    Requests wait for a token before being sent. When the server throttles
+    a request anyway, `pause` stops every request of the key until the
+    Retry-After delay has passed instead of each one finding out by itself.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE,
+                 period: float = DEFAULT_PERIOD,
+                 burst: Optional[int] = None) -> None:
+        """Constructor
+
+        Args:
+            rate (float): Number of requests allowed per period.
+            period (float): Period in seconds.
+            burst (int): Bucket size, ie. requests that can be sent back to
+                         back. Defaults to a tenth of the rate.
+        """
+        self._per_second = rate / period
+        self._capacity = float(burst if burst is not None
+                               else max(int(rate / 10), 1))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # Created on first use, within the event loop.
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self._capacity,
+                           self._tokens + elapsed * self._per_second)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request can be sent."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:  # pylint: disable=while-used
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._per_second)
+
+    def pause(self, delay: float) -> None:
+        """Hold back all requests for delay seconds, eg. after a 429."""
+        self._paused_until = max(self._paused_until,
+                                 time.monotonic() + delay)
+        self._tokens = 0.0
+        self._updated = self._paused_until
@@ -0,0 +1,244 @@
+"""Index of the users and teams services can page.
+
+A service pages through its escalation policy, whose rules target users
+and schedules, and schedules rotate users. `ReachabilityIndex` follows
+these links once for a whole catalog and keeps, for every escalation
+policy, the users and teams it reaches as bitsets over compact integer
+ids, so that questions about many services are answered with a few
+integer operations::
+
+    index = ReachabilityIndex(services, policies, schedules)
+    index.users_of('PSERVICE')
+    index.services_losing_coverage(['PUSER'])  # If PUSER leaves
+
+Schedules are not fetched by this library: they are given as a mapping of
+schedule id to the ids of the users in its layers. Reachable teams are the
+teams of the escalation policy, and those of the reachable users when the
+users are given.
+
+The index is updated in place when a policy, service or schedule changes,
+only the policies affected are computed again.
+"""
+
+from typing import (Dict, Iterable, Iterator, List, Mapping, Optional,
+                    Sequence, Set)
+
+from aiopagerduty.models import EscalationPolicy, Service, User
+
+_SCHEDULE_TARGETS = ('schedule', 'schedule_reference')
+
+
+class _Interner:
+    """Compact integer ids of string ids.
+    """
+
+    def __init__(self) -> None:
+        self.ints: Dict[str, int] = {}
+        self.ids: List[str] = []
+
+    def __call__(self, obj_id: str) -> int:
+        number = self.ints.get(obj_id)
+        if number is None:
+            number = self.ints[obj_id] = len(self.ids)
+            self.ids.append(obj_id)
+        return number
+
+    def bits(self, obj_ids: Iterable[str]) -> int:
+        bits = 0
+        for obj_id in obj_ids:
+            bits |= 1 << self(obj_id)
+        return bits
+
+    def decode(self, bits: int) -> Iterator[str]:
+        while bits:  # pylint: disable=while-used
+            low = bits & -bits
+            yield self.ids[low.bit_length() - 1]
+            bits ^= low
+
+
+def _count(bits: int) -> int:
+    return bin(bits).count('1')
+
+
+class ReachabilityIndex:
+    """Users and teams reachable from each service.
+    """
+
+    def __init__(self, services: Iterable[Service],
+                 policies: Iterable[EscalationPolicy],
+                 schedules: Optional[Mapping[str, Iterable[str]]] = None,
+                 users: Optional[Iterable[User]] = None) -> None:
+        """Constructor
+
+        Args:
+            services (Iterable[Service]): Services of the catalog.
+            policies (Iterable[EscalationPolicy]): Escalation policies of
+                                                   the catalog.
+            schedules (Mapping[str, Iterable[str]]): Schedule id to the ids
+                                                     of its users.
+            users (Iterable[User]): Users, for their teams.
+        """
+        self._users = _Interner()
+        self._teams = _Interner()
+        self._services = _Interner()
+        # User int -> teams bits
+        self._user_teams: Dict[int, int] = {}
+        for user in users or []:
+            self._user_teams[self._users(user.id)] = self._teams.bits(
+                team.id for team in user.teams or [])
+        # Schedule id -> users bits
+        self._schedules: Dict[str, int] = {
+            schedule_id: self._users.bits(user_ids)
+            for schedule_id, user_ids in (schedules or {}).items()
+        }
+        # Schedule id -> ids of the policies targeting it
+        self._schedule_policies: Dict[str, Set[str]] = {}
+        # Policy id -> users, teams and services bits
+        self._policy_users: Dict[str, int] = {}
+        self._policy_teams: Dict[str, int] = {}
+        self._policy_services: Dict[str, int] = {}
+        self._policies: Dict[str, EscalationPolicy] = {}
+        # Service int -> policy id
+        self._service_policy: Dict[int, str] = {}
+        for policy in policies:
+            self._policies[policy.id] = policy
+            self._compute(policy)
+        for service in services:
+            self.update_service(service)
+
+    def _compute(self, policy: EscalationPolicy) -> None:
+        users = 0
+        for rule in policy.escalation_rules:
+            for target in rule.targets:
+                if target.type in _SCHEDULE_TARGETS:
+                    users |= self._schedules.get(target.id, 0)
+                    self._schedule_policies.setdefault(target.id,
+                                                       set()).add(policy.id)
+                else:
+                    users |= 1 << self._users(target.id)
+        teams = self._teams.bits(team.id for team in policy.teams or [])
+        if self._user_teams:
+            for user_id in self._users.decode(users):
+                teams |= self._user_teams.get(self._users.ints[user_id], 0)
+        self._policy_users[policy.id] = users
+        self._policy_teams[policy.id] = teams
+
+    def _forget(self, policy_id: str) -> None:
+        policy = self._policies.pop(policy_id, None)
+        if policy is None:
+            return
+        for rule in policy.escalation_rules:
+            for target in rule.targets:
+                if target.type in _SCHEDULE_TARGETS:
+                    self._schedule_policies.get(target.id,
+                                                set()).discard(policy_id)
+        del self._policy_users[policy_id]
+        del self._policy_teams[policy_id]
+
+    def update_policy(self, policy: EscalationPolicy) -> None:
+        """Add or replace an escalation policy.
+
+        The services listed by the policy are moved to it.
+        """
+        self._forget(policy.id)
+        self._policies[policy.id] = policy
+        self._compute(policy)
+        for ref in policy.services or []:
+            self._move(self._services(ref.id), policy.id)
+
+    def remove_policy(self, policy_id: str) -> None:
+        """Remove an escalation policy, its services reach no one.
+        """
+        self._forget(policy_id)
+
+    def update_service(self, service: Service) -> None:
+        """Add a service or move it to another escalation policy.
+        """
+        self._move(self._services(service.id), service.escalation_policy.id)
+
+    def update_schedule(self, schedule_id: str,
+                        user_ids: Iterable[str]) -> None:
+        """Replace the users of a schedule.
+        """
+        self._schedules[schedule_id] = self._users.bits(user_ids)
+        for policy_id in list(self._schedule_policies.get(schedule_id, ())):
+            self._compute(self._policies[policy_id])
+
+    def _move(self, service: int, policy_id: str) -> None:
+        bit = 1 << service
+        previous = self._service_policy.get(service)
+        if previous is not None:
+            self._policy_services[previous] &= ~bit
+        self._service_policy[service] = policy_id
+        self._policy_services[policy_id] = self._policy_services.get(
+            policy_id, 0) | bit
+
+    def _policy_of(self, service_id: str) -> str:
+        return self._service_policy[self._services.ints[service_id]]
+
+    def users_of(self, service_id: str) -> Set[str]:
+        """Ids of the users a service can page.
+
+        Raises:
+            KeyError: If the service is unknown.
+        """
+        return set(self._users.decode(self._policy_users.get(
+            self._policy_of(service_id), 0)))
+
+    def teams_of(self, service_id: str) -> Set[str]:
+        """Ids of the teams a service can page.
+
+        Raises:
+            KeyError: If the service is unknown.
+        """
+        return set(self._teams.decode(self._policy_teams.get(
+            self._policy_of(service_id), 0)))
+
+    def _services_where(self, matches: Mapping[str, bool]) -> Set[str]:
+        bits = 0
+        for policy_id, services in self._policy_services.items():
+            if matches.get(policy_id, False):
+                bits |= services
+        return set(self._services.decode(bits))
+
+    def services_reaching(self, user_id: str) -> Set[str]:
+        """Ids of the services that can page a user.
+        """
+        user = self._users.ints.get(user_id)
+        if user is None:
+            return set()
+        bit = 1 << user
+        return self._services_where({
+            policy_id: bool(users & bit)
+            for policy_id, users in self._policy_users.items()
+        })
+
+    def services_losing_coverage(self, user_ids: Sequence[str]) -> Set[str]:
+        """Ids of the services that could page no one without the users,
+        eg. if they all left.
+        """
+        gone = self._users.bits(user_id for user_id in user_ids
+                                if user_id in self._users.ints)
+        return self._services_where({
+            policy_id: bool(users) and not users & ~gone
+            for policy_id, users in self._policy_users.items()
+        })
+
+    def uncovered_services(self) -> Set[str]:
+        """Ids of the services that can page no one.
+        """
+        bits = 0
+        for service, policy_id in self._service_policy.items():
+            if not self._policy_users.get(policy_id, 0):
+                bits |= 1 << service
+        return set(self._services.decode(bits))
+
+    def coverage(self) -> Dict[str, int]:
+        """Number of users each service can page.
+        """
+        counts = {policy_id: _count(users)
+                  for policy_id, users in self._policy_users.items()}
+        return {
+            self._services.ids[service]: counts.get(policy_id, 0)
+            for service, policy_id in self._service_policy.items()
+        }
@@ -1,8 +1,12 @@
 """Service Orchestrations Mixin
 """
-from aiopagerduty.fetcher import FetcherProtocol
+from http import HTTPStatus
+from typing import List, Optional
+
+from aiopagerduty.fetcher import Error, FetcherProtocol
 from aiopagerduty.models import (ObjectRef, ServiceOrchestration,
                                  ServiceOrchestrationStatus)
+from aiopagerduty.orchestrationdiff import Change, diff
 
 
 class ServiceOrchestrationsMixin:
@@ -54,3 +58,54 @@ class ServiceOrchestrationsMixin:
         # return await self._object_fetch(ServiceOrchestration, url)
         return await self.single_fetch(ServiceOrchestration, url,
                                        'orchestration_path')
+
+    async def update_service_orchestration(
+            self: FetcherProtocol,
+            desired: ServiceOrchestration,
+            live: Optional[ServiceOrchestration] = None) -> List[Change]:
+        """Update the orchestration rules of a service if they changed.
+
+        The rules are only written when they differ from the live ones, so
+        applying the same configuration again costs no write. The update is
+        guarded by `desired.version`: when set, the live rules are always
+        fetched, and their version must still be that of `desired`,
+        otherwise someone else edited the rules since `desired` was read and
+        nothing is written.
+
+        The guard is best-effort: the API takes no version with the write,
+        so an edit landing between the version check and the write is
+        overwritten.
+
+        Args:
+            desired (ServiceOrchestration): Rules to define; its parent is
+                                            the service updated.
+            live (ServiceOrchestration): Live rules, if already fetched.
+                                         Fetched otherwise, or when
+                                         `desired.version` is set.
+
+        Raises:
+            Error: With status CONFLICT if the live version is not the
+                   version of `desired`.
+
+        Returns:
+            List[Change]: Changes written, empty if the rules were unchanged.
+        """
+        url = f'event_orchestrations/services/{desired.parent.id}'
+        if live is None or desired.version is not None:
+            # The version is checked against the live rules, never against
+            # rules read by the caller.
+            live = await self.single_fetch(ServiceOrchestration, url,
+                                           'orchestration_path')
+        if desired.version is not None and desired.version != live.version:
+            raise Error(f'Service orchestration of {desired.parent.id} is '
+                        f'at version {live.version}, not {desired.version}',
+                        HTTPStatus.CONFLICT)
+        changes = diff(live, desired)
+        if changes:
+            data = {
+                'orchestration_path':
+                    desired.dict(include={'sets', 'catch_all'},
+                                 exclude_none=True)
+            }
+            await self.put_json_result(url, data)
+        return changes
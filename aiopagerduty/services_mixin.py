@@ -1,9 +1,10 @@
 """Services Mixin
 """
 
-from aiopagerduty.fetcher import FetcherProtocol
+from aiopagerduty.fetcher import FetcherProtocol, RawPage
 from aiopagerduty.models import Service
-from typing import List
+from aiopagerduty.views import ModelView, build_views
+from typing import AsyncIterator, List
 
 
 class ServicesMixin:
@@ -16,8 +17,31 @@ class ServicesMixin:
         Returns:
             Dict[str, Service]: Dictionary of all services, keyed by service id.
         """
-        return await self.multi_fetch(Service, 'services', 'services')
+        return await self.cached_multi_fetch(Service, 'services',
+                                             'services')
+
+    async def list_services_lazy(
+            self: FetcherProtocol) -> List[ModelView[Service]]:
+        """Fetch all services as lazy views, validating only the fields
+        read.
+
+        Returns:
+            List[ModelView[Service]]: Views of all services.
+        """
+        items = await self.cached_multi_fetch_json('services', 'services')
+        return build_views(Service, items)
+
+    def list_services_raw(self: FetcherProtocol) -> AsyncIterator[RawPage]:
+        """Fetch all services as undecoded pages.
+
+        Returns:
+            AsyncIterator[RawPage]: Pages with the services under 'services'.
+        """
+        return self.iter_raw_pages('services')
 
     async def list_service(self: FetcherProtocol, service_id: str) -> Service:
+        cached = await self.cached_item('services', service_id)
+        if cached is not None:
+            return Service(**cached)
         return await self.single_fetch(Service, f'services/{service_id}',
                                        'service')
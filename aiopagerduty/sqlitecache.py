@@ -0,0 +1,165 @@
+"""SQLite cache backend shared by all the processes of a host.
+
+The database runs in WAL mode so that readers never block on the process
+refreshing a collection. Items are stored as their json text, one row per
+item, which readers decode without any model construction. A lease row
+makes sure only one process refreshes a collection at a time; the others
+find the expired collection missing, like any other backend, and wait for
+the refresh to land.
+
+Waiting for another process' write lock blocks, so the cache is a
+`blocking` backend: the client calls it in the default executor. The
+database is only opened on the first call, in that executor too.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from aiopagerduty.cache import JsonObj
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS collections (
+    key TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    key TEXT NOT NULL,
+    id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (key, id)
+);
+CREATE INDEX IF NOT EXISTS items_seq ON items (key, seq);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+'''
+
+
+class SQLiteCache:
+    """Cache backend stored in a SQLite database file.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, timeout: float = 30.0) -> None:
+        """Constructor
+
+        Args:
+            path (str): Database file, shared by the processes of a host.
+            timeout (float): Seconds to wait for another process' write.
+        """
+        self._path = path
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use, with the lock held.
+        if self._db is None:
+            # Autocommit mode; transactions are started explicitly.
+            conn = sqlite3.connect(self._path, timeout=self._timeout,
+                                   isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._db = conn
+        return self._db
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _write(self, sql: str, *params: object) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def get(self, key: str) -> Optional[List[JsonObj]]:
+        with self._lock:
+            # One read transaction so that the items match the expiry.
+            self._conn.execute('BEGIN')
+            try:
+                row = self._conn.execute(
+                    'SELECT expires FROM collections WHERE key = ?',
+                    (key,)).fetchone()
+                if row is None or row[0] < time.time():
+                    return None
+                rows = self._conn.execute(
+                    'SELECT body FROM items WHERE key = ? ORDER BY seq',
+                    (key,)).fetchall()
+            finally:
+                self._conn.execute('COMMIT')
+        return [json.loads(body) for body, in rows]
+
+    def get_item(self, key: str, item_id: str) -> Optional[JsonObj]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body FROM items JOIN collections USING (key) '
+                'WHERE key = ? AND id = ? AND expires >= ?',
+                (key, item_id, time.time())).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, items: List[JsonObj], ttl: float) -> None:
+        rows = [(key, item['id'], seq, json.dumps(item))
+                for seq, item in enumerate(items)]
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('DELETE FROM items WHERE key = ?', (key,))
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO items (key, id, seq, body) '
+                    'VALUES (?, ?, ?, ?)', rows)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO collections (key, expires) '
+                    'VALUES (?, ?)', (key, time.time() + ttl))
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def upsert(self, key: str, item: JsonObj) -> None:
+        # Replaced items keep their position, new ones are appended.
+        self._write(
+            'INSERT INTO items (key, id, seq, body) '
+            'SELECT ?, ?, COALESCE((SELECT MAX(seq) + 1 FROM items '
+            '                       WHERE key = ?), 0), ? '
+            'WHERE EXISTS (SELECT 1 FROM collections WHERE key = ?) '
+            'ON CONFLICT (key, id) DO UPDATE SET body = excluded.body',
+            key, item['id'], key, json.dumps(item), key)
+
+    def remove(self, key: str, item_id: str) -> None:
+        self._write('DELETE FROM items WHERE key = ? AND id = ?', key,
+                    item_id)
+
+    def invalidate(self, key: str) -> None:
+        self._write('DELETE FROM collections WHERE key = ?', key)
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT owner, expires FROM leases WHERE key = ?',
+                    (key,)).fetchone()
+                if row is not None and row[0] != owner and row[1] > now:
+                    return False
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO leases (key, owner, expires) '
+                    'VALUES (?, ?, ?)', (key, owner, now + ttl))
+                return True
+            finally:
+                self._conn.execute('COMMIT')
+
+    def release_lease(self, key: str, owner: str) -> None:
+        self._write('DELETE FROM leases WHERE key = ? AND owner = ?', key,
+                    owner)
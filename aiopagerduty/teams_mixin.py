@@ -1,10 +1,10 @@
 """Teams Mixin
 """
 
-from aiopagerduty.fetcher import FetcherProtocol
+from aiopagerduty.fetcher import FetcherProtocol, RawPage
 from aiopagerduty.models import Team, TeamMember
 
-from typing import List
+from typing import AsyncIterator, List
 
 
 class TeamsMixin:
@@ -12,9 +12,16 @@ class TeamsMixin:
     """
 
     async def list_teams(self: FetcherProtocol) -> List[Team]:
-        return await self.multi_fetch(Team, 'teams', 'teams')
+        return await self.cached_multi_fetch(Team, 'teams', 'teams')
+
+    def list_teams_raw(self: FetcherProtocol) -> AsyncIterator[RawPage]:
+        return self.iter_raw_pages('teams')
 
     async def list_team_members(self: FetcherProtocol,
                                 team: Team) -> List[TeamMember]:
         return await self.multi_fetch(TeamMember, f'teams/{team.id}/members',
                                       'members')
+
+    def list_team_members_raw(self: FetcherProtocol,
+                              team: Team) -> AsyncIterator[RawPage]:
+        return self.iter_raw_pages(f'teams/{team.id}/members')
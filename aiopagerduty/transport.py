@@ -0,0 +1,133 @@
+"""Transport module that provides a shareable HTTP connection pool.
+"""
+
+import asyncio
+import logging
+import random
+from typing import Any, Optional
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+_logger = logging.getLogger(__name__)
+
+
+def _resolver() -> AbstractResolver:
+    """aiodns based resolver, falling back to the threaded resolver when
+    aiodns is unavailable on the platform.
+    """
+    try:
+        return aiohttp.AsyncResolver()
+    except (ImportError, RuntimeError):
+        _logger.warning('aiodns unavailable, using threaded DNS resolver')
+        return aiohttp.ThreadedResolver()
+
+
+def retry_delay(resp: aiohttp.ClientResponse, attempt: int,
+                backoff: float) -> float:
+    """Seconds to wait before retrying a throttled or failed request: its
+    Retry-After header if valid, or an exponential backoff with jitter
+    starting at `backoff`.
+    """
+    if (retry_after := resp.headers.get('Retry-After')) is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return float(backoff * 2**attempt * (0.5 + random.random()))
+
+
+class Transport:
+    """Pooled HTTP transport that can be shared by many Clients.
+
+    A single connector holds the keep-alive connections and the DNS cache
+    for every Client attached to the transport. The session carries no
+    credentials; each Client sends its own Authorization header per
+    request::
+
+        async with Transport(warmup_url='https://api.pagerduty.com') as t:
+            clients = [Client(key, transport=t) for key in api_keys]
+    """
+
+    def __init__(self, limit: int = 25, limit_per_host: int = 0,
+                 dns_cache_ttl: int = 300, keepalive_timeout: float = 30.0,
+                 warmup_url: Optional[str] = None,
+                 warmup_connections: int = 4) -> None:
+        """Constructor
+
+        Args:
+            limit (int): Maximum number of concurrent connections.
+                         Defaults to 25 to limit PagerDuty rate limiting
+                         issues.
+            limit_per_host (int): Maximum connections per host, 0 for none.
+            dns_cache_ttl (int): Seconds a resolved address is cached.
+            keepalive_timeout (float): Seconds an idle connection is kept.
+            warmup_url (str): Url to pre-open connections to when the
+                              transport is opened.
+            warmup_connections (int): Number of connections to pre-open.
+        """
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._dns_cache_ttl = dns_cache_ttl
+        self._keepalive_timeout = keepalive_timeout
+        self._warmup_url = warmup_url
+        self._warmup_connections = warmup_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'Transport':
+        await self.open()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError('Transport is not open')
+        return self._session
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    async def open(self) -> None:
+        """Create the connection pool. Opening an open transport is a no-op.
+        """
+        if self._session is not None:
+            return
+        conn = aiohttp.TCPConnector(limit=self._limit,
+                                    limit_per_host=self._limit_per_host,
+                                    resolver=_resolver(),
+                                    use_dns_cache=True,
+                                    ttl_dns_cache=self._dns_cache_ttl,
+                                    keepalive_timeout=self._keepalive_timeout)
+        self._session = aiohttp.ClientSession(connector=conn)
+        if self._warmup_url is not None:
+            await self.warmup(self._warmup_url, self._warmup_connections)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def warmup(self, url: str, connections: int) -> None:
+        """Pre-open connections to url so that the first requests do not pay
+        for DNS resolution and TLS handshakes.
+
+        Args:
+            url (str): Url to connect to. The response status is ignored.
+            connections (int): Number of concurrent connections to open.
+        """
+
+        async def connect() -> None:
+            try:
+                async with self.session.head(url) as resp:
+                    await resp.read()
+            except aiohttp.ClientError as ex:
+                _logger.warning('Connection warmup failed',
+                                extra={'url': url, 'error': str(ex)})
+
+        await asyncio.gather(*[connect() for _ in range(connections)])
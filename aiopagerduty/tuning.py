@@ -0,0 +1,191 @@
+"""Adaptive page size and concurrency of list crawls.
+
+An `AutoTuner` watches the list pages fetched by a client, grouped by
+endpoint family, ie. the url path without ids (`teams/members` for
+`teams/PXXXXXX/members`), and adjusts the page size and the number of
+pages fetched at a time for each family with an AIMD control loop:
+
+- a page slower than `target_latency`, or larger than `max_page_bytes`,
+  halves the page size of its family; once the page size is at its
+  minimum, it halves the concurrency instead,
+- a throttled (429) or failed (5xx) request halves the concurrency,
+- any other page grows the page size by `limit_step` and the concurrency
+  by one per round of concurrent pages, up to their maximums.
+
+Light lists, eg. vendors, end up crawled in full pages by several
+requests at a time, while heavy ones, eg. users with their contact
+methods, use smaller pages. The settings learned are saved to a json file
+when the client closes and loaded by the next run::
+
+    async with Client(api_key, tuner=AutoTuner('tuning.json')) as client:
+        await client.list_users()
+"""
+
+import json
+import logging
+import os
+import re
+import urllib.parse
+from typing import Dict, NamedTuple, Optional
+
+# PagerDuty pages hold at most 100 items.
+MAX_LIMIT = 100
+
+_ID_RE = re.compile(r'^[A-Z0-9]{6,}$')
+
+_logger = logging.getLogger(__name__)
+
+
+def endpoint_family(url: str) -> str:
+    """Url path without its query and object ids.
+    """
+    path = urllib.parse.urlsplit(url).path.strip('/')
+    return '/'.join(part for part in path.split('/')
+                    if not _ID_RE.match(part))
+
+
+class Settings(NamedTuple):
+    """Crawl settings of an endpoint family.
+    """
+    limit: int  # Page size
+    concurrency: int  # Pages fetched at a time
+
+
+class _State:
+    """Control state of an endpoint family.
+    """
+
+    __slots__ = ('limit', 'concurrency')
+
+    def __init__(self, limit: float, concurrency: float) -> None:
+        self.limit = limit
+        self.concurrency = concurrency
+
+
+class AutoTuner:
+    """Learns the page size and concurrency of each endpoint family.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, path: Optional[str] = None,
+                 target_latency: float = 1.0,
+                 max_page_bytes: int = 1 << 20,
+                 min_limit: int = 10, max_limit: int = MAX_LIMIT,
+                 limit_step: int = 10, max_concurrency: int = 8,
+                 decrease: float = 0.5) -> None:
+        """Constructor
+
+        Args:
+            path (str): Json file the settings are loaded from, if it
+                        exists, and saved to. Not persisted if None.
+            target_latency (float): Seconds a page should take at most.
+            max_page_bytes (int): Size a page body should stay under.
+            min_limit (int): Smallest page size.
+            max_limit (int): Largest page size, and the page size of
+                             families not seen yet.
+            limit_step (int): Page size added after a page on target.
+            max_concurrency (int): Most pages fetched at a time; keep it
+                                   within the connection limit of the
+                                   transport.
+            decrease (float): Factor applied on a decrease.
+        """
+        self._path = path
+        self._target_latency = target_latency
+        self._max_page_bytes = max_page_bytes
+        self._min_limit = min_limit
+        self._max_limit = min(max_limit, MAX_LIMIT)
+        self._limit_step = limit_step
+        self._max_concurrency = max_concurrency
+        self._decrease = decrease
+        # Endpoint family -> control state
+        self._states: Dict[str, _State] = {}
+        self.stats: Dict[str, int] = {
+            'pages': 0,
+            'throttled': 0,
+            'limit_decreases': 0,
+            'concurrency_decreases': 0,
+        }
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def _state(self, family: str) -> _State:
+        state = self._states.get(family)
+        if state is None:
+            state = self._states[family] = _State(self._max_limit, 1.0)
+        return state
+
+    def settings(self, url: str) -> Settings:
+        """Settings of the family of a url.
+        """
+        state = self._state(endpoint_family(url))
+        return Settings(int(state.limit), int(state.concurrency))
+
+    def _decrease_concurrency(self, state: _State) -> None:
+        state.concurrency = max(1.0, state.concurrency * self._decrease)
+        self.stats['concurrency_decreases'] += 1
+
+    def record(self, url: str, status: int, latency: float,
+               size: int) -> None:
+        """Adjust the settings of a url's family to a response.
+
+        Only responses to list pages, ie. urls with a limit, are taken
+        into account.
+
+        Args:
+            url (str): Url requested.
+            status (int): Response status.
+            latency (float): Seconds from sending the request to reading
+                             the body.
+            size (int): Body size in bytes.
+        """
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        if 'limit' not in query:
+            return
+        state = self._state(endpoint_family(url))
+        if status == 429 or status >= 500:
+            self.stats['throttled'] += status == 429
+            self._decrease_concurrency(state)
+            return
+        self.stats['pages'] += 1
+        if latency > self._target_latency or size > self._max_page_bytes:
+            if state.limit > self._min_limit:
+                state.limit = max(float(self._min_limit),
+                                  state.limit * self._decrease)
+                self.stats['limit_decreases'] += 1
+            else:
+                self._decrease_concurrency(state)
+            return
+        state.limit = min(float(self._max_limit),
+                          state.limit + self._limit_step)
+        # One more page at a time after a round of pages on target.
+        state.concurrency = min(float(self._max_concurrency),
+                                state.concurrency + 1 / state.concurrency)
+
+    def load(self, path: str) -> None:
+        """Load the settings saved by a previous run.
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as ex:
+            _logger.warning('Tuning settings not loaded',
+                            extra={'path': path, 'error': str(ex)})
+            return
+        for family, (limit, concurrency) in saved.items():
+            self._states[family] = _State(
+                min(max(float(limit), self._min_limit), self._max_limit),
+                min(max(float(concurrency), 1.0), self._max_concurrency))
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Save the settings, to the path given to the constructor by
+        default.
+        """
+        path = path or self._path
+        if path is None:
+            return
+        saved = {
+            family: [state.limit, state.concurrency]
+            for family, state in self._states.items()
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
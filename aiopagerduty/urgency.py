@@ -0,0 +1,246 @@
+"""Offline evaluation of incident urgencies.
+
+The `incident_urgency_rule` of a service sets the urgency of its incidents,
+either constant or depending on whether the incident is created during the
+`support_hours` of the service. `UrgencyEvaluator` compiles the rules of
+many services once, each support hours into a `SupportCalendar` of UTC
+intervals, and evaluates the urgency of large batches of incidents given
+as parallel sequences of service ids and creation timestamps::
+
+    evaluator = UrgencyEvaluator(services)
+    urgencies = evaluator.evaluate(service_ids, timestamps)
+    print(urgencies.count('high'), 'high urgency pages')
+
+Timestamps are seconds since the epoch, eg. an `array('d')`. Support hours
+are in the time zone of the service, daylight saving time included.
+"""
+
+import bisect
+import collections
+import datetime
+from array import array
+from typing import (Dict, Iterable, List, NamedTuple, Optional, Sequence,
+                    Tuple)
+
+try:
+    import zoneinfo
+except ImportError:  # Python 3.8
+    from backports import zoneinfo  # type: ignore
+
+from aiopagerduty.models import Service, SupportHours
+
+HIGH = 'high'
+LOW = 'low'
+SEVERITY_BASED = 'severity_based'
+
+# Severities of events creating high urgency incidents on severity based
+# services, the others create low urgency ones.
+_HIGH_SEVERITIES = frozenset(('critical', 'error'))
+_ONE_DAY = datetime.timedelta(days=1)
+
+
+def _local_time(text: str) -> Tuple[int, datetime.time]:
+    # 'HH:MM[:SS]' as days and time of day, '24:00:00' ends a day.
+    parts = [int(part) for part in text.split(':')] + [0, 0]
+    hours, minutes, seconds = parts[:3]
+    days, hours = divmod(hours, 24)
+    return days, datetime.time(hours, minutes, seconds)
+
+
+class SupportCalendar:
+    """Support hours as sorted UTC intervals.
+
+    Intervals are computed for the local days of the timestamps looked up,
+    and kept for later lookups.
+    """
+
+    def __init__(self, support_hours: SupportHours) -> None:
+        """Constructor
+
+        Args:
+            support_hours (SupportHours): Support hours of a service.
+
+        Raises:
+            zoneinfo.ZoneInfoNotFoundError: If the time zone is unknown.
+            ValueError: If a start or end time is invalid.
+        """
+        self.zone = zoneinfo.ZoneInfo(support_hours.time_zone)
+        self._days = frozenset(support_hours.days_of_week)
+        _, self._start = _local_time(support_hours.start_time)
+        end_days, self._end = _local_time(support_hours.end_time)
+        # Support hours ending before they start end the next day.
+        if end_days == 0 and self._end <= self._start:
+            end_days = 1
+        self._end_days = datetime.timedelta(days=end_days)
+        # Local days covered by the intervals, [first, last)
+        self._first: Optional[datetime.date] = None
+        self._last: Optional[datetime.date] = None
+        # Start and end of each interval, alternating
+        self._bounds = array('d')
+
+    def _date(self, timestamp: float) -> datetime.date:
+        return datetime.datetime.fromtimestamp(timestamp, self.zone).date()
+
+    def _cover(self, first: float, last: float) -> None:
+        # Intervals of the previous day may run over midnight.
+        since = self._date(first) - _ONE_DAY
+        until = self._date(last) + _ONE_DAY
+        if self._first is not None and self._last is not None:
+            if self._first <= since and until <= self._last:
+                return
+            since = min(since, self._first)
+            until = max(until, self._last)
+        bounds = array('d')
+        day = since
+        while day < until:  # pylint: disable=while-used
+            if day.isoweekday() in self._days:
+                start = datetime.datetime.combine(day, self._start,
+                                                  self.zone).timestamp()
+                end = datetime.datetime.combine(day + self._end_days,
+                                                self._end,
+                                                self.zone).timestamp()
+                # Overlapping intervals are merged.
+                if bounds and start <= bounds[-1]:
+                    bounds[-1] = max(bounds[-1], end)
+                else:
+                    bounds.extend((start, end))
+            day += _ONE_DAY
+        self._bounds = bounds
+        self._first = since
+        self._last = until
+
+    def contains(self, timestamp: float) -> bool:
+        """Whether a timestamp is during the support hours.
+        """
+        return bool(self.mask([timestamp])[0])
+
+    def mask(self, timestamps: Sequence[float]) -> bytearray:
+        """Which timestamps are during the support hours.
+
+        Args:
+            timestamps (Sequence[float]): Seconds since the epoch.
+
+        Returns:
+            bytearray: 1 for each timestamp during the support hours, 0 for
+                       the others.
+        """
+        if not timestamps:
+            return bytearray()
+        self._cover(min(timestamps), max(timestamps))
+        bounds = self._bounds
+        bisect_right = bisect.bisect_right
+        # Timestamps after an odd number of bounds are in an interval.
+        return bytearray(
+            bisect_right(bounds, timestamp) & 1 for timestamp in timestamps)
+
+
+class _Rule(NamedTuple):
+    during: str  # Urgency during the support hours, or constant
+    outside: str  # Urgency outside the support hours
+    calendar: Optional[SupportCalendar]  # None for constant urgencies
+
+
+def _compile(service: Service) -> _Rule:
+    rule = service.incident_urgency_rule
+    if rule.type == 'constant':
+        if rule.urgency is None:
+            raise ValueError(f'Service {service.id} has no urgency')
+        return _Rule(rule.urgency, rule.urgency, None)
+    if (service.support_hours is None or rule.during_support_hours is None or
+            rule.outside_support_hours is None):
+        raise ValueError(f'Service {service.id} has no support hours')
+    return _Rule(rule.during_support_hours.urgency,
+                 rule.outside_support_hours.urgency,
+                 SupportCalendar(service.support_hours))
+
+
+def _severity_urgency(severity: Optional[str]) -> str:
+    return HIGH if severity in _HIGH_SEVERITIES else LOW
+
+
+class UrgencyEvaluator:
+    """Urgency rules of services compiled for evaluation.
+    """
+
+    def __init__(self, services: Iterable[Service]) -> None:
+        """Constructor
+
+        Args:
+            services (Iterable[Service]): Services to evaluate the
+                                          incidents of.
+
+        Raises:
+            ValueError: If a rule uses support hours the service lacks.
+            zoneinfo.ZoneInfoNotFoundError: If a time zone is unknown.
+        """
+        self._rules: Dict[str, _Rule] = {
+            service.id: _compile(service) for service in services
+        }
+
+    def urgency(self, service_id: str, at: datetime.datetime,
+                severity: Optional[str] = None) -> str:
+        """Urgency of one incident.
+
+        Args:
+            service_id (str): Service of the incident.
+            at (datetime): Creation time, timezone aware.
+            severity (str): Severity of the event creating the incident.
+
+        Returns:
+            str: Urgency of the incident.
+
+        Raises:
+            KeyError: If the service is unknown.
+        """
+        severities = None if severity is None else [severity]
+        return self.evaluate([service_id], [at.timestamp()], severities)[0]
+
+    def evaluate(self, service_ids: Sequence[str],
+                 timestamps: Sequence[float],
+                 severities: Optional[Sequence[Optional[str]]] = None
+                 ) -> List[str]:
+        """Urgencies of a batch of incidents.
+
+        Incidents are grouped per service, and the timestamps of each
+        service are looked up in its calendar at once.
+
+        Args:
+            service_ids (Sequence[str]): Service of each incident.
+            timestamps (Sequence[float]): Creation time of each incident, in
+                                          seconds since the epoch.
+            severities (Sequence[str]): Severity of the event creating each
+                                        incident. Without them, severity
+                                        based urgencies are left as
+                                        `severity_based`.
+
+        Returns:
+            List[str]: Urgency of each incident, in order.
+
+        Raises:
+            KeyError: If a service is unknown.
+            ValueError: If the sequences differ in length.
+        """
+        if len(service_ids) != len(timestamps) or (
+                severities is not None and len(severities) != len(timestamps)):
+            raise ValueError('Sequences differ in length')
+        groups: Dict[str, List[int]] = collections.defaultdict(list)
+        for i, service_id in enumerate(service_ids):
+            groups[service_id].append(i)
+
+        urgencies = [''] * len(service_ids)
+        for service_id, indexes in groups.items():
+            rule = self._rules[service_id]
+            if rule.calendar is None:
+                for i in indexes:
+                    urgencies[i] = rule.during
+                continue
+            mask = rule.calendar.mask([timestamps[i] for i in indexes])
+            choices = (rule.outside, rule.during)
+            for i, during in zip(indexes, mask):
+                urgencies[i] = choices[during]
+
+        if severities is not None:
+            for i, urgency in enumerate(urgencies):
+                if urgency == SEVERITY_BASED:
+                    urgencies[i] = _severity_urgency(severities[i])
+        return urgencies
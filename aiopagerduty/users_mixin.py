@@ -1,12 +1,13 @@
 """Users Mixin
 """
 
-import urllib
+import urllib.parse
 from http import HTTPStatus
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from aiopagerduty.fetcher import FetcherProtocol
+from aiopagerduty.fetcher import FetcherProtocol, RawPage
 from aiopagerduty.models import ResponsePlay, User, UserInfo
+from aiopagerduty.views import ModelView, build_views
 
 
 class UsersMixin:
@@ -14,14 +15,35 @@ class UsersMixin:
     """
 
     async def list_user(self: FetcherProtocol, user_id: str) -> User:
+        cached = await self.cached_item('users', user_id)
+        if cached is not None:
+            return User(**cached)
         return await self.single_fetch(User, f'users/{user_id}', 'user')
 
     async def list_users(self: FetcherProtocol) -> List[User]:
-        return await self.multi_fetch(User, 'users', 'users')
+        return await self.cached_multi_fetch(User, 'users', 'users')
+
+    async def list_users_lazy(self: FetcherProtocol) -> List[ModelView[User]]:
+        """Fetch all users as lazy views, validating only the fields read.
+
+        Returns:
+            List[ModelView[User]]: Views of all users.
+        """
+        items = await self.cached_multi_fetch_json('users', 'users')
+        return build_views(User, items)
+
+    def list_users_raw(self: FetcherProtocol) -> AsyncIterator[RawPage]:
+        """Fetch all users as undecoded pages.
+
+        Returns:
+            AsyncIterator[RawPage]: Pages with the users under 'users'.
+        """
+        return self.iter_raw_pages('users')
 
     async def delete_user(self: FetcherProtocol, user: User) -> None:
         url = f'users/{user.id}'
         await self.delete(url, HTTPStatus.NO_CONTENT)
+        await self.uncache_item('users', user.id)
 
     async def create_user(self: FetcherProtocol, user_info: UserInfo) -> User:
         url = 'users'
@@ -30,17 +52,20 @@ class UsersMixin:
         }
         user_json = await self.post_json_result(url, data=data)
         user = User(**user_json['user'])
+        await self.cache_item('users', user_json['user'])
         return user
 
     async def update_user(self: FetcherProtocol, user: User) -> User:
         url = f'users/{user.id}'
-        user_info = UserInfo(**user.dict(exclude_unset=True,
-                                         exclude_none=True))
+        # The fields are already validated, only the writable ones are
+        # sent.
         data = {
-            'user': user_info.dict(exclude_unset=True)
+            'user': user.dict(include=set(UserInfo.__fields__),
+                              exclude_unset=True, exclude_none=True)
         }
         updated_json = await self.put_json_result(url, data=data)
         updated = User(**updated_json['user'])
+        await self.cache_item('users', updated_json['user'])
         return updated
 
         # Response Plays
@@ -49,12 +74,12 @@ class UsersMixin:
                                   query: Optional[str] = None,
                                   manual: bool = False) -> List[ResponsePlay]:
         query_params: Dict[str, Any] = {
-            'filter_for_manual_run': manual,
+            'filter_for_manual_run': str(manual).lower(),
         }
         if query is not None:
             query_params['query'] = query
 
-        query_url = f'response_plays?filter_for_manual_run={urllib.parse.urlencode(query_params)}'
+        query_url = f'response_plays?{urllib.parse.urlencode(query_params)}'
         return await self.multi_fetch(ResponsePlay, query_url,
                                       'response_plays')
 
@@ -0,0 +1,239 @@
+"""Bulk sync of users from a directory.
+
+`UserSync` makes the PagerDuty users match a directory, eg. an HR system,
+given as `UserInfo`s. Users are matched by email, case insensitively, and
+compared on the synced fields their `UserInfo` sets, so that unchanged
+users cost nothing. Fields a `UserInfo` leaves unset are neither compared
+nor written. The changes are planned first, then applied
+concurrently within the rate budget of the client, each one reported::
+
+    sync = UserSync(client)
+    plan = await sync.plan(directory, delete_missing=True)
+    for result in await sync.apply(plan):
+        if result.error:
+            print(result.item.email, result.error)
+
+The index of the remote users is built from the user list, through the
+client cache when it has one. It is kept up to date as changes are
+applied, and can be saved between runs so that a nightly sync without
+changes sends no request at all.
+"""
+
+import asyncio
+import json
+from http import HTTPStatus
+from typing import (Any, Dict, Iterable, List, NamedTuple, Optional,
+                    Sequence, Tuple)
+
+import aiohttp
+
+from aiopagerduty.fetcher import FetcherProtocol
+from aiopagerduty.models import UserInfo
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+# Fields owned by the sync, a None value set is synced as such.
+DEFAULT_FIELDS = ('name', 'email', 'time_zone', 'job_title', 'role')
+
+# Format of the saved index
+_INDEX_VERSION = 2
+
+
+def _email(email: str) -> str:
+    return email.strip().lower()
+
+
+def synced_values(values: Dict[str, Any],
+                  fields: Sequence[str]) -> Dict[str, Any]:
+    """Synced fields present in a user's json.
+
+    Emails are normalized, as they are matched.
+    """
+    synced = {field: values[field] for field in fields if field in values}
+    if synced.get('email') is not None:
+        synced['email'] = _email(synced['email'])
+    return synced
+
+
+class SyncItem(NamedTuple):
+    """Change to a user.
+    """
+    action: str  # CREATE, UPDATE or DELETE
+    email: str
+    user_id: Optional[str]  # None for CREATE
+    data: Optional[Dict[str, Any]]  # Fields written, None for DELETE
+
+
+class SyncPlan(NamedTuple):
+    """Changes to apply, and the number of users left unchanged.
+    """
+    items: List[SyncItem]
+    unchanged: int
+
+
+class SyncResult(NamedTuple):
+    """Outcome of a change.
+    """
+    item: SyncItem
+    user_id: Optional[str]  # Id of the user created, updated or deleted
+    error: Optional[str]  # None on success
+
+
+class UserSync:
+    """Syncs users from a directory.
+    """
+
+    def __init__(self, fetcher: FetcherProtocol,
+                 fields: Sequence[str] = DEFAULT_FIELDS,
+                 concurrency: int = 8) -> None:
+        """Constructor
+
+        Args:
+            fetcher (FetcherProtocol): Client writing the users.
+            fields (Sequence[str]): `UserInfo` fields synced.
+            concurrency (int): Changes applied at a time.
+        """
+        unknown = set(fields) - set(UserInfo.__fields__)
+        if unknown:
+            raise ValueError(f'Unknown user fields {sorted(unknown)}')
+        self._fetcher = fetcher
+        self._fields = tuple(fields)
+        self._concurrency = concurrency
+        # Email -> (user id, synced values)
+        self.index: Optional[Dict[str, Tuple[str, Dict[str, Any]]]] = None
+
+    def load_index(self, path: str) -> None:
+        """Load the index saved by a previous run.
+        """
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        if (state.get('version') != _INDEX_VERSION
+                or state.get('fields') != list(self._fields)):
+            # Values of other fields can not be compared.
+            return
+        self.index = {
+            email: (entry[0], entry[1])
+            for email, entry in state['users'].items()
+        }
+
+    def save_index(self, path: str) -> None:
+        """Save the index for the next run.
+        """
+        state = {
+            'version': _INDEX_VERSION,
+            'fields': list(self._fields),
+            'users': self.index or {},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    async def _remote_index(self) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        if self.index is None:
+            users = await self._fetcher.cached_multi_fetch_json('users',
+                                                                'users')
+            self.index = {
+                _email(user['email']): (user['id'],
+                                        synced_values(user, self._fields))
+                for user in users
+            }
+        return self.index
+
+    def _data(self, info: UserInfo) -> Dict[str, Any]:
+        data: Dict[str, Any] = json.loads(info.json(include=set(
+            self._fields), exclude_unset=True))
+        data['email'] = info.email
+        data['name'] = info.name
+        return data
+
+    async def plan(self, directory: Iterable[UserInfo],
+                   delete_missing: bool = False) -> SyncPlan:
+        """Changes making the users match the directory.
+
+        Args:
+            directory (Iterable[UserInfo]): Users wanted.
+            delete_missing (bool): Whether users missing from the directory
+                                   are deleted.
+
+        Returns:
+            SyncPlan: Changes to apply.
+        """
+        remote = await self._remote_index()
+        items: List[SyncItem] = []
+        unchanged = 0
+        seen = set()
+        for info in directory:
+            email = _email(info.email)
+            seen.add(email)
+            data = self._data(info)
+            entry = remote.get(email)
+            if entry is None:
+                items.append(SyncItem(CREATE, email, None, data))
+            elif any(entry[1].get(field) != value for field, value in
+                     synced_values(data, self._fields).items()):
+                items.append(SyncItem(UPDATE, email, entry[0], data))
+            else:
+                unchanged += 1
+        if delete_missing:
+            items.extend(SyncItem(DELETE, email, user_id, None)
+                         for email, (user_id, _) in remote.items()
+                         if email not in seen)
+        return SyncPlan(items, unchanged)
+
+    async def _apply(self, item: SyncItem) -> SyncResult:
+        fetcher = self._fetcher
+        try:
+            if item.action == DELETE:
+                await fetcher.delete(f'users/{item.user_id}',
+                                     HTTPStatus.NO_CONTENT)
+                await fetcher.uncache_item('users', item.user_id or '')
+                return SyncResult(item, item.user_id, None)
+            if item.action == CREATE:
+                result = await fetcher.post_json_result('users',
+                                                        {'user': item.data})
+            else:
+                result = await fetcher.put_json_result(
+                    f'users/{item.user_id}', {'user': item.data})
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            return SyncResult(item, item.user_id, str(ex) or repr(ex))
+        user = result['user']
+        await fetcher.cache_item('users', user)
+        return SyncResult(item, user['id'], None)
+
+    async def apply(self, plan: SyncPlan) -> List[SyncResult]:
+        """Apply the changes of a plan concurrently.
+
+        Failed changes are reported, and do not stop the others. The
+        index is updated with the changes applied.
+
+        Returns:
+            List[SyncResult]: Outcome of each change, in plan order.
+        """
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def apply(item: SyncItem) -> SyncResult:
+            async with semaphore:
+                return await self._apply(item)
+
+        results = await asyncio.gather(*(apply(item) for item in plan.items))
+        index = await self._remote_index()
+        for result in results:
+            if result.error is not None:
+                continue
+            if result.item.action == DELETE:
+                index.pop(result.item.email, None)
+            elif result.user_id is not None and result.item.data is not None:
+                values = (index[result.item.email][1]
+                          if result.item.action == UPDATE else {})
+                index[result.item.email] = (
+                    result.user_id,
+                    {**values, **synced_values(result.item.data,
+                                               self._fields)})
+        return list(results)
+
+    async def sync(self, directory: Iterable[UserInfo],
+                   delete_missing: bool = False) -> List[SyncResult]:
+        """Plan and apply the changes making the users match the directory.
+        """
+        return await self.apply(await self.plan(directory, delete_missing))
@@ -3,9 +3,9 @@
 
 from async_lru import alru_cache
 
-from aiopagerduty.fetcher import FetcherProtocol
+from aiopagerduty.fetcher import FetcherProtocol, RawPage
 from aiopagerduty.models import Vendor
-from typing import List
+from typing import AsyncIterator, List
 
 
 class VendorsMixin:
@@ -17,8 +17,11 @@ class VendorsMixin:
         """List of vendors with integrations.
         This list is cached since there are more than 400 vendors defined in the system.
         """
-        return await self.multi_fetch(Vendor, 'vendors', 'vendors')
+        return await self.cached_multi_fetch(Vendor, 'vendors', 'vendors')
+
+    def list_vendors_raw(self: FetcherProtocol) -> AsyncIterator[RawPage]:
+        return self.iter_raw_pages('vendors')
 
     async def list_vendor(self: FetcherProtocol, vendor_id: str) -> Vendor:
-        result = await self.fetch_json_result(f'vendors/{vendor_id}')
-        return Vendor(**result)
+        return await self.single_fetch(Vendor, f'vendors/{vendor_id}',
+                                       'vendor')
@@ -0,0 +1,115 @@
+"""Lazy model views over decoded json.
+
+A `ModelView` wraps the json of an item with its model class, and only
+validates the fields read from it: each field is converted the way the
+model would convert it on first access, eg. `created_at` into a datetime
+or `escalation_policy` into an `ObjectRef`, and memoized. Reading a few
+fields of many items costs a fraction of building the models::
+
+    for service in await client.list_services_lazy():
+        print(service.id, service.escalation_policy.id)
+
+`materialize()` builds the full model, validating every field. Root
+validators only run on materialization. Fields are validated without the
+other fields, so a field whose validators read `values` is taken from the
+full model instead.
+"""
+
+import copy
+import functools
+import inspect
+from enum import Enum
+from typing import Any, Dict, Generic, List, Type
+
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError
+from pydantic.fields import ModelField
+
+from aiopagerduty.fetcher import BaseModelT
+
+
+@functools.lru_cache(maxsize=None)
+def _uses_values(field: ModelField) -> bool:
+    # Whether a validator of the field reads the other fields.
+    for validator in (field.class_validators or {}).values():
+        parameters = inspect.signature(validator.func).parameters
+        if 'values' in parameters or any(
+                parameter.kind is inspect.Parameter.VAR_KEYWORD
+                for parameter in parameters.values()):
+            return True
+    return False
+
+
+class ModelView(Generic[BaseModelT]):
+    """Read-only view of the json of a model, validated field by field.
+    """
+
+    __slots__ = ('_model_type', '_json', '_values')
+
+    def __init__(self, model_type: Type[BaseModelT],
+                 json_obj: Dict[str, Any]) -> None:
+        self._model_type = model_type
+        self._json = json_obj
+        # Field name -> validated value
+        self._values: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are not set, ie. fields.
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        field = self._model_type.__fields__.get(name)
+        if field is None:
+            raise AttributeError(
+                f'{self._model_type.__name__} has no field {name!r}')
+        if _uses_values(field):
+            value = getattr(self.materialize(), name)
+        elif field.alias in self._json:
+            value, errors = field.validate(self._json[field.alias], {},
+                                           loc=field.alias,
+                                           cls=self._model_type)
+            if errors:
+                raise ValidationError([errors], self._model_type)
+            if (self._model_type.__config__.use_enum_values and
+                    isinstance(value, Enum)):
+                value = value.value
+        elif field.required:
+            raise ValidationError(
+                [ErrorWrapper(MissingError(), loc=field.alias)],
+                self._model_type)
+        else:
+            value = copy.deepcopy(field.get_default())
+        self._values[name] = value
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in ModelView.__slots__:
+            raise AttributeError(f'{type(self).__name__} is read-only')
+        object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}[{self._model_type.__name__}]' \
+            f'(id={self._json.get("id")!r})'
+
+    @property
+    def json(self) -> Dict[str, Any]:
+        """Json wrapped, as decoded."""
+        return self._json
+
+    def materialize(self) -> BaseModelT:
+        """Full model of the json.
+
+        Raises:
+            ValidationError: If the json is not a valid model.
+        """
+        return self._model_type(**self._json)
+
+
+def build_views(model_type: Type[BaseModelT],
+                json_objs: List[Dict[str, Any]]) -> List[ModelView[BaseModelT]]:
+    """Views over the json of models."""
+    return [ModelView(model_type, json_obj) for json_obj in json_objs]
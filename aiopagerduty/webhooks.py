@@ -0,0 +1,140 @@
+"""Webhook driven cache invalidation.
+
+`WebhookReceiver` is an aiohttp server accepting PagerDuty v3 webhook
+deliveries. It verifies their signatures and keeps the client's catalog
+cache fresh: created and updated resources are refetched and patched into
+the cached list, deleted ones are removed from it. Clients then stay
+current without polling the lists.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+from http import HTTPStatus
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from aiohttp import web
+from pydantic import ValidationError
+
+from aiopagerduty.fetcher import Fetcher
+from aiopagerduty.models import WebhookEvent
+
+_logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-PagerDuty-Signature'
+
+# Webhook resource type -> (list url, item name in the api response)
+RESOURCES: Dict[str, Tuple[str, str]] = {
+    'service': ('services', 'service'),
+    'user': ('users', 'user'),
+    'team': ('teams', 'team'),
+    'escalation_policy': ('escalation_policies', 'escalation_policy'),
+    'priority': ('priorities', 'priority'),
+}
+
+
+def sign(body: bytes, secret: str) -> str:
+    """Signature header value of a webhook body, as sent by PagerDuty.
+    """
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f'v1={digest}'
+
+
+def verify(body: bytes, header: Optional[str], secrets: Iterable[str]) -> bool:
+    """Check a signature header against every secret.
+
+    The header holds several comma separated signatures while a
+    subscription's secret is being rotated.
+    """
+    if not header:
+        return False
+    signatures = {sig.strip() for sig in header.split(',')}
+    return any(
+        hmac.compare_digest(expected, sig) for expected in
+        (sign(body, secret) for secret in secrets) for sig in signatures)
+
+
+class WebhookReceiver:
+    """Receives PagerDuty v3 webhooks and applies them to a client's cache.
+    """
+
+    def __init__(self, client: Fetcher, secrets: Sequence[str],
+                 path: str = '/webhooks/pagerduty') -> None:
+        """Constructor
+
+        Args:
+            client (Fetcher): Client whose cache is kept fresh.
+            secrets (Sequence[str]): Signing secrets of the subscriptions.
+            path (str): Url path the deliveries are posted to.
+        """
+        self._client = client
+        self._secrets = list(secrets)
+        self.stats: Dict[str, int] = {
+            'received': 0,
+            'rejected': 0,
+            'refetched': 0,
+            'removed': 0,
+            'ignored': 0,
+        }
+        self.app = web.Application()
+        self.app.router.add_post(path, self._handle)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ''
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'WebhookReceiver':
+        await self.start()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        await self.stop()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.url = f'http://{bound_host}:{bound_port}'
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def apply(self, event: WebhookEvent) -> None:
+        """Apply a change event to the client's cache.
+        """
+        cache = self._client.cache
+        resource = RESOURCES.get(event.resource_type)
+        item_id = event.data.get('id')
+        if cache is None or resource is None or item_id is None:
+            self.stats['ignored'] += 1
+            return
+        url_part, item_name = resource
+        if event.event_type.endswith('.deleted'):
+            await self._client.uncache_item(url_part, item_id)
+            self.stats['removed'] += 1
+            return
+        item = await self._client.refresh_cached_item(url_part, item_id,
+                                                      item_name)
+        self.stats['refetched' if item is not None else 'removed'] += 1
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        if not verify(body, request.headers.get(SIGNATURE_HEADER),
+                      self._secrets):
+            self.stats['rejected'] += 1
+            return web.Response(status=HTTPStatus.UNAUTHORIZED)
+        self.stats['received'] += 1
+        try:
+            event = WebhookEvent(**json.loads(body)['event'])
+        except (ValueError, KeyError, TypeError, ValidationError) as ex:
+            _logger.warning('Invalid webhook payload',
+                            extra={'error': str(ex)})
+            return web.Response(status=HTTPStatus.BAD_REQUEST)
+        await self.apply(event)
+        return web.Response(status=HTTPStatus.NO_CONTENT)
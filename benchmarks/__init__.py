@@ -0,0 +1,7 @@
+"""Offline benchmarks for aiopagerduty.
+
+Benchmarks run without network access against synthetic payloads shaped
+like the PagerDuty API responses. Run them with::
+
+    python -m benchmarks.bench_fetch
+"""
@@ -0,0 +1,182 @@
+"""Model parsing and pagination throughput benchmark.
+
+Feeds synthetic pages through `Fetcher.multi_fetch` and
+`Fetcher.single_fetch` without any network access and reports items/sec
+and peak memory of decoding and constructing the models::
+
+    python -m benchmarks.bench_fetch --scales 1000 10000 --check
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+from aiopagerduty.fetcher import Fetcher
+from aiopagerduty.models import (EscalationPolicy, Service,
+                                 ServiceOrchestration, User)
+from aiopagerduty.views import build_views
+from benchmarks import history, payloads
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+
+
+class OfflineFetcher(Fetcher):
+    """Fetcher that serves pre-encoded page bodies instead of HTTP.
+    """
+
+    def __init__(self, pages: Dict[str, List[bytes]], limit: int = 100):
+        super().__init__(api_key='offline')
+        self._pages = pages
+        self._limit = limit
+
+    async def fetch_raw_result(self, url: str) -> bytes:
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        offset = int(query.get('offset', ['0'])[0])
+        return self._pages[parts.path][offset // self._limit]
+
+
+def _list_case(factory: Callable[[int], Dict[str, Any]], model: Any,
+               path: str, items_name: str,
+               count: int) -> Callable[[], Awaitable[int]]:
+    fetcher = OfflineFetcher(
+        {path: payloads.encode_pages(factory, count, items_name)})
+
+    async def run() -> int:
+        items = await fetcher.multi_fetch(model, path, items_name)
+        return len(items)
+
+    return run
+
+
+def _raw_case(factory: Callable[[int], Dict[str, Any]], path: str,
+              items_name: str, count: int) -> Callable[[], Awaitable[int]]:
+    fetcher = OfflineFetcher(
+        {path: payloads.encode_pages(factory, count, items_name)})
+
+    async def run() -> int:
+        # Items are not decoded, so the page count stands in for them.
+        pages = [page async for page in fetcher.iter_raw_pages(path)]
+        return min(len(pages) * 100, count)
+
+    return run
+
+
+def _lazy_case(count: int) -> Callable[[], Awaitable[int]]:
+    # Views only validate the fields read, here the ones most consumers use.
+    fetcher = OfflineFetcher(
+        {'services': payloads.encode_pages(payloads.service_json, count,
+                                           'services')})
+
+    async def run() -> int:
+        items = await fetcher.multi_fetch_json('services', 'services')
+        for view in build_views(Service, items):
+            _ = view.id, view.name, view.escalation_policy.id
+        return len(items)
+
+    return run
+
+
+def _orchestration_case(count: int) -> Callable[[], Awaitable[int]]:
+    # Orchestrations are fetched one service at a time, each one
+    # carrying many rule sets.
+    sample = json.dumps({
+        'orchestration_path': payloads.service_orchestration_json(0),
+    }).encode()
+    pages = {f'orchestrations/{i}': [sample] for i in range(count)}
+    fetcher = OfflineFetcher(pages)
+
+    async def run() -> int:
+        for i in range(count):
+            await fetcher.single_fetch(ServiceOrchestration,
+                                       f'orchestrations/{i}',
+                                       'orchestration_path')
+        return count
+
+    return run
+
+
+CASES: Dict[str, Callable[[int], Callable[[], Awaitable[int]]]] = {
+    'services': lambda n: _list_case(payloads.service_json, Service,
+                                     'services', 'services', n),
+    'users': lambda n: _list_case(payloads.user_json, User, 'users', 'users',
+                                  n),
+    'escalation_policies': lambda n: _list_case(
+        payloads.escalation_policy_json, EscalationPolicy,
+        'escalation_policies', 'escalation_policies', n),
+    'services_lazy': _lazy_case,
+    'services_raw': lambda n: _raw_case(payloads.service_json, 'services',
+                                        'services', n),
+    # Each orchestration holds 100 rules, so it runs at 1/100th the scale.
+    'service_orchestrations': lambda n: _orchestration_case(max(n // 100, 1)),
+}
+
+
+def measure(name: str, scale: int) -> history.Result:
+    """Run one benchmark case, first for time and then for memory.
+    """
+    run = CASES[name](scale)
+    start = time.perf_counter()
+    count = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    # Memory is measured on a separate run since tracing slows down
+    # allocation heavy code considerably.
+    tracemalloc.start()
+    asyncio.run(run())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'name': name,
+        'scale': scale,
+        'values': {
+            'items_per_sec': count / elapsed,
+            'peak_mib': peak / (1024 * 1024),
+        },
+        # Metric name -> True if higher values are better.
+        'metrics': {'items_per_sec': True, 'peak_mib': False},
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+',
+                        default=DEFAULT_SCALES)
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES),
+                        default=sorted(CASES))
+    parser.add_argument('--history', default=history.DEFAULT_HISTORY,
+                        help='json lines file to compare against')
+    parser.add_argument('--no-record', action='store_true',
+                        help='do not append this run to the history')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with an error when a regression is found')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed relative regression (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    results: List[history.Result] = []
+    for name in args.cases:
+        for scale in args.scales:
+            result = measure(name, scale)
+            values = result['values']
+            print(f"{name:24} {scale:>8} {values['items_per_sec']:>12.0f}"
+                  f" items/s {values['peak_mib']:>9.1f} MiB peak")
+            results.append(result)
+
+    regressions = history.compare(history.load(args.history), results,
+                                  args.threshold)
+    for regression in regressions:
+        print(f'REGRESSION: {regression}')
+    if not args.no_record:
+        history.record(args.history, results)
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,93 @@
+"""Import time benchmark.
+
+Times `import aiopagerduty`, and the first access to `aiopagerduty.Client`
+that imports the client for real, in fresh interpreters, and reports the
+heavy dependencies loaded by the bare import::
+
+    python -m benchmarks.bench_import --runs 20 --check
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from benchmarks import history
+
+# Modules `import aiopagerduty` alone must not load.
+HEAVY_MODULES = ['aiohttp', 'pydantic', 'email_validator', 'async_lru',
+                 'aiopagerduty.models', 'aiopagerduty.client']
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import aiopagerduty
+imported = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+aiopagerduty.Client
+client = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'client': client - imported,
+                  'loaded': loaded}}))
+'''
+
+
+def probe() -> Dict[str, Any]:
+    """Import the package in a fresh interpreter.
+    """
+    out = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True)
+    result: Dict[str, Any] = json.loads(out.stdout)
+    return result
+
+
+def measure(runs: int) -> List[history.Result]:
+    """Median import times over several runs.
+    """
+    probes = [probe() for _ in range(runs)]
+    results = []
+    for name in ('import', 'client'):
+        # Milliseconds, lower is better.
+        elapsed = statistics.median(run[name] for run in probes) * 1000
+        results.append({
+            'name': f'import_{name}',
+            'scale': 1,
+            'values': {'ms': elapsed},
+            'metrics': {'ms': False},
+        })
+    return results
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--history', default=history.DEFAULT_HISTORY,
+                        help='json lines file to compare against')
+    parser.add_argument('--no-record', action='store_true',
+                        help='do not append this run to the history')
+    parser.add_argument('--check', action='store_true',
+                        help='exit with an error when a regression is found')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed relative regression (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    loaded = probe()['loaded']
+    results = measure(args.runs)
+    for result in results:
+        print(f"{result['name']:24} {result['values']['ms']:>9.1f} ms")
+
+    regressions = history.compare(history.load(args.history), results,
+                                  args.threshold)
+    if loaded:
+        regressions.append(f'import aiopagerduty loads {loaded}')
+    for regression in regressions:
+        print(f'REGRESSION: {regression}')
+    if not args.no_record:
+        history.record(args.history, results)
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
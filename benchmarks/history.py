@@ -0,0 +1,88 @@
+"""Benchmark result history.
+
+Each benchmark run appends its results as json lines to a history file so
+that throughput and memory can be compared across commits.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List, Optional
+
+Result = Dict[str, Any]
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), 'history.jsonl')
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                             capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(__file__))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _key(result: Result) -> str:
+    return f"{result['name']}/{result['scale']}/{result['python']}"
+
+
+def load(path: str) -> List[Result]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record(path: str, results: List[Result]) -> None:
+    """Append results to the history file, stamped with the run metadata.
+    """
+    stamp = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps({**stamp, **result}) + '\n')
+
+
+def compare(previous: List[Result], results: List[Result],
+            threshold: float) -> List[str]:
+    """Compare results with the latest matching entries in the history.
+
+    Args:
+        previous (List[Result]): History entries.
+        results (List[Result]): Results of the current run.
+        threshold (float): Allowed relative slowdown, eg: 0.1 for 10%.
+
+    Returns:
+        List[str]: Description of every regression found.
+    """
+    python = platform.python_version()
+    latest: Dict[str, Result] = {}
+    for entry in previous:
+        latest[_key(entry)] = entry
+
+    regressions: List[str] = []
+    for result in results:
+        base = latest.get(_key({**result, 'python': python}))
+        if base is None:
+            continue
+        for metric, higher_is_better in result['metrics'].items():
+            old = base['values'].get(metric)
+            new = result['values'][metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if not higher_is_better:
+                change = -change
+            if change < -threshold:
+                regressions.append(
+                    f"{result['name']}[{result['scale']}] {metric}: "
+                    f"{old:.1f} -> {new:.1f} ({change:+.1%}) "
+                    f"vs {base.get('revision')}")
+    return regressions
@@ -0,0 +1,339 @@
+"""Synthetic PagerDuty payloads for offline benchmarks.
+
+Payloads mirror the json returned by the PagerDuty REST API closely enough
+to be parsed by the models in `aiopagerduty.models`.
+"""
+
+import datetime
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+API_URL = 'https://api.pagerduty.com'
+_WEB = 'https://example.pagerduty.com'
+
+JsonObj = Dict[str, Any]
+
+
+def _ref(kind: str, obj_id: str, summary: str) -> JsonObj:
+    return {
+        'id': obj_id,
+        'summary': summary,
+        'self': f'{API_URL}/{kind}s/{obj_id}',
+        'html_url': f'{_WEB}/{kind}s/{obj_id}',
+        'type': f'{kind}_reference',
+    }
+
+
+def _id(prefix: str, i: int) -> str:
+    return f'{prefix}{i:06X}'
+
+
+def service_json(i: int) -> JsonObj:
+    svc_id = _id('PS', i)
+    name = f'Service {i}'
+    return {
+        'id': svc_id,
+        'summary': name,
+        'self': f'{API_URL}/services/{svc_id}',
+        'html_url': f'{_WEB}/service-directory/{svc_id}',
+        'type': 'service',
+        'name': name,
+        'description': f'Synthetic service number {i}',
+        'auto_resolve_timeout': 14400,
+        'acknowledgement_timeout': 600,
+        'created_at': '2022-06-24T21:50:39Z',
+        'status': 'active',
+        'last_incident_timestamp': '2022-08-17T18:17:41Z',
+        'escalation_policy': _ref('escalation_policy', _id('PE', i % 50),
+                                  f'Policy {i % 50}'),
+        'teams': [_ref('team', _id('PT', i % 20), f'Team {i % 20}')],
+        'integrations': [
+            _ref('integration', _id('PI', i * 2 + n), f'Integration {n}')
+            for n in range(2)
+        ],
+        'incident_urgency_rule': {
+            'type': 'constant',
+            'urgency': 'high',
+        },
+        'support_hours': None,
+    }
+
+
+def user_json(i: int) -> JsonObj:
+    user_id = _id('PU', i)
+    name = f'User {i}'
+    return {
+        'id': user_id,
+        'summary': name,
+        'self': f'{API_URL}/users/{user_id}',
+        'html_url': f'{_WEB}/users/{user_id}',
+        'type': 'user',
+        'name': name,
+        'email': f'user{i}@example.com',
+        'time_zone': 'America/Los_Angeles',
+        'description': None,
+        'job_title': 'Engineer',
+        'color': 'green',
+        'role': 'user',
+        'avatar_role': None,
+        'invitation_sent': False,
+        'teams': [_ref('team', _id('PT', i % 20), f'Team {i % 20}')],
+        'contact_methods': [
+            _ref('email_contact_method', _id('PC', i * 3 + n), 'Default')
+            for n in range(3)
+        ],
+        'notification_rules': [
+            _ref('assignment_notification_rule', _id('PN', i * 2 + n),
+                 '0 minutes: channel email') for n in range(2)
+        ],
+    }
+
+
+def escalation_policy_json(i: int) -> JsonObj:
+    ep_id = _id('PE', i)
+    name = f'Policy {i}'
+    return {
+        'id': ep_id,
+        'summary': name,
+        'self': f'{API_URL}/escalation_policies/{ep_id}',
+        'html_url': f'{_WEB}/escalation_policies/{ep_id}',
+        'type': 'escalation_policy',
+        'name': name,
+        'description': None,
+        'num_loops': 1,
+        'on_call_handoff_notifications': 'if_has_services',
+        'escalation_rules': [{
+            'id': _id('PR', i * 3 + level),
+            'escalation_delay_in_minutes': 30,
+            'targets': [
+                _ref('user', _id('PU', i * 3 + level), f'User {level}'),
+            ],
+        } for level in range(3)],
+        'services': [_ref('service', _id('PS', i), f'Service {i}')],
+        'teams': [_ref('team', _id('PT', i % 20), f'Team {i % 20}')],
+    }
+
+
+def team_json(i: int) -> JsonObj:
+    team_id = _id('PT', i)
+    name = f'Team {i}'
+    return {
+        **_ref('team', team_id, name),
+        'self': f'{API_URL}/teams/{team_id}',
+        'type': 'team',
+        'name': name,
+        'description': f'Synthetic team number {i}',
+    }
+
+
+def team_member_json(i: int) -> JsonObj:
+    return {
+        'user': _ref('user', _id('PU', i), f'User {i}'),
+        'role': 'manager' if i % 10 == 0 else 'responder',
+    }
+
+
+def vendor_json(i: int) -> JsonObj:
+    vendor_id = _id('PV', i)
+    name = f'Vendor {i}'
+    return {
+        **_ref('vendor', vendor_id, name),
+        'html_url': None,
+        'type': 'vendor',
+        'name': name,
+        'website_url': f'https://vendor{i}.example.com',
+        'logo_url': None,
+        'thumbnail_url': None,
+        'description': None,
+        'integration_guide_url': None,
+    }
+
+
+def priority_json(i: int) -> JsonObj:
+    priority_id = _id('PP', i)
+    name = f'P{i + 1}'
+    return {
+        **_ref('priority', priority_id, name),
+        'html_url': None,
+        'type': 'priority',
+        'name': name,
+        'description': f'Priority {name}',
+    }
+
+
+def integration_json(i: int, service_id: str) -> JsonObj:
+    integration_id = _id('PI', i)
+    name = f'Integration {i}'
+    return {
+        **_ref('integration', integration_id, name),
+        'self': f'{API_URL}/services/{service_id}/integrations/{integration_id}',
+        'type': 'events_api_v2_inbound_integration',
+        'name': name,
+        'integration_key': f'{i:032x}',
+        'service': _ref('service', service_id, service_id),
+        'created_at': '2022-06-24T21:50:39Z',
+        'vendor': None,
+    }
+
+
+def response_play_json(i: int) -> JsonObj:
+    play_id = _id('PY', i)
+    name = f'Response Play {i}'
+    return {
+        **_ref('response_play', play_id, name),
+        'type': 'response_play',
+        'team': team_json(i % 20),
+        'subscribers': [_ref('user', _id('PU', i), f'User {i}')],
+        'subscribers_message': None,
+        'responders': [],
+        'responders_message': None,
+        'runnability': 'services',
+        'conference_number': None,
+        'conference_url': None,
+        'conference_type': 'none',
+    }
+
+
+def _rule(set_no: int, rule_no: int, route_to: str) -> JsonObj:
+    actions: JsonObj = {
+        'severity': 'critical',
+        'priority': 'P1LAFKQ',
+        'annotate': 'Synthetic rule',
+        'variables': [{
+            'name': 'hostname',
+            'path': 'event.summary',
+            'type': 'regex',
+            'value': 'High CPU on (.*) server',
+        }],
+        'extractions': [{
+            'target': 'event.summary',
+            'template': 'High CPU on {{hostname}}',
+        }],
+    }
+    if route_to:
+        actions['route_to'] = route_to
+    return {
+        'id': f'{set_no:04x}{rule_no:04x}',
+        'label': f'Rule {rule_no}',
+        'conditions': [
+            {'expression': f"event.custom_details.env matches 'env{rule_no}'"},
+            {'expression': "event.summary matches regex '^P2_*'"},
+        ],
+        'actions': actions,
+    }
+
+
+def service_orchestration_json(i: int, sets: int = 20,
+                               rules: int = 5) -> JsonObj:
+    svc_id = _id('PS', i)
+    rule_sets = []
+    for set_no in range(sets):
+        set_id = 'start' if set_no == 0 else f'set{set_no}'
+        next_set = f'set{set_no + 1}' if set_no + 1 < sets else ''
+        rule_sets.append({
+            'id': set_id,
+            'rules': [_rule(set_no, n, next_set) for n in range(rules)],
+        })
+    return {
+        'type': 'service',
+        'parent': {
+            'id': svc_id,
+            'self': f'{API_URL}/services/{svc_id}',
+            'type': 'service_reference',
+        },
+        'version': 'iNIhdF5djxGICuYdu1vXb6LKSZoZ2HPY',
+        'self': f'{API_URL}/event_orchestrations/services/{svc_id}',
+        'updated_at': '2022-08-17T18:17:41Z',
+        'updated_by': None,
+        'created_at': '2022-06-24T21:50:39Z',
+        'created_by': None,
+        'sets': rule_sets,
+        'catch_all': {'actions': {'severity': 'info', 'suppress': True}},
+    }
+
+
+def _timestamp(at: datetime.datetime) -> str:
+    return at.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def incident_json(i: int, created_at: datetime.datetime) -> JsonObj:
+    inc_id = _id('Q', i)
+    svc_no = i % 100
+    user = _ref('user', _id('PU', i % 40), f'User {i % 40}')
+    # Acknowledged within 1 to 30 minutes, resolved within 2 hours.
+    acked_at = created_at + datetime.timedelta(minutes=1 + i * 7 % 30)
+    resolved_at = acked_at + datetime.timedelta(minutes=i * 13 % 120)
+    return {
+        'id': inc_id,
+        'summary': f'[#{i + 1}] Synthetic incident {i}',
+        'self': f'{API_URL}/incidents/{inc_id}',
+        'html_url': f'{_WEB}/incidents/{inc_id}',
+        'type': 'incident',
+        'incident_number': i + 1,
+        'title': f'Synthetic incident {i}',
+        'description': f'Synthetic incident {i}',
+        'status': 'resolved',
+        'urgency': 'high' if i % 4 else 'low',
+        'incident_key': f'key-{i}',
+        'created_at': _timestamp(created_at),
+        'updated_at': _timestamp(resolved_at),
+        'last_status_change_at': _timestamp(resolved_at),
+        'resolved_at': _timestamp(resolved_at),
+        'service': _ref('service', _id('PS', svc_no), f'Service {svc_no}'),
+        'escalation_policy': _ref('escalation_policy', _id('PE', svc_no % 50),
+                                  f'Policy {svc_no % 50}'),
+        'priority': None,
+        'teams': [_ref('team', _id('PT', svc_no % 20), f'Team {svc_no % 20}')],
+        'assignments': [],
+        'acknowledgements': [{
+            'at': _timestamp(acked_at),
+            'acknowledger': user,
+        }],
+    }
+
+
+def oncall_json(policy_no: int, level: int, user_no: int,
+                start: Optional[datetime.datetime],
+                end: Optional[datetime.datetime]) -> JsonObj:
+    # Users on call for a time are on call from a schedule, the others are
+    # targeted directly.
+    schedule = None
+    if start is not None:
+        schedule = _ref('schedule', _id('PC', policy_no * 3 + level),
+                        f'Schedule {level}')
+    return {
+        'user': _ref('user', _id('PU', user_no), f'User {user_no}'),
+        'schedule': schedule,
+        'escalation_policy': _ref('escalation_policy', _id('PE', policy_no),
+                                  f'Policy {policy_no}'),
+        'escalation_level': level,
+        'start': None if start is None else _timestamp(start),
+        'end': None if end is None else _timestamp(end),
+    }
+
+
+def encode_pages(factory: Callable[[int], JsonObj], count: int,
+                 items_name: str, limit: int = 100) -> List[bytes]:
+    """Encode `count` synthetic items as paginated list responses.
+
+    Args:
+        factory (Callable[[int], JsonObj]): Builds the item with an index.
+        count (int): Number of items across all pages.
+        items_name (str): Name of the items within the page json.
+        limit (int): Page size.
+
+    Returns:
+        List[bytes]: Encoded page bodies, in offset order.
+    """
+    pages: List[bytes] = []
+    for offset in range(0, count, limit):
+        items = [factory(i) for i in range(offset, min(offset + limit, count))]
+        page = {
+            items_name: items,
+            'limit': limit,
+            'offset': offset,
+            'more': offset + limit < count,
+            'total': None,
+        }
+        pages.append(json.dumps(page).encode())
+    return pages
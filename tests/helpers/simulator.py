@@ -0,0 +1,494 @@
+"""Local PagerDuty API simulator.
+
+An aiohttp server implementing the subset of the PagerDuty REST API used by
+`aiopagerduty.Client`, with offset pagination, configurable latency, rate
+limiting and injected failures. Point a client at it with `base_url`::
+
+    async with PagerDutySimulator(services=3000) as sim:
+        async with aiopagerduty.Client('key', base_url=sim.url) as pd:
+            ...
+
+It can also be run standalone for manual load testing::
+
+    python -m tests.helpers.simulator --port 8080 --services 3000
+"""
+
+import argparse
+import asyncio
+import bisect
+import datetime
+import math
+import random
+import time
+from collections import Counter
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from aiohttp import web
+
+from benchmarks import payloads
+
+JsonObj = Dict[str, Any]
+Latency = Callable[[random.Random], float]
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+EVENTS_PATH = '/v2/enqueue'
+
+# Incidents are created up to this time.
+INCIDENTS_UNTIL = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Collection name -> (singular item name, payload factory)
+_COLLECTIONS: Dict[str, Any] = {
+    'services': ('service', payloads.service_json),
+    'users': ('user', payloads.user_json),
+    'teams': ('team', payloads.team_json),
+    'vendors': ('vendor', payloads.vendor_json),
+    'priorities': ('priority', payloads.priority_json),
+    'escalation_policies': ('escalation_policy',
+                            payloads.escalation_policy_json),
+    'response_plays': ('response_play', payloads.response_play_json),
+}
+
+
+def no_latency() -> Latency:
+    return lambda rng: 0.0
+
+
+def constant_latency(seconds: float) -> Latency:
+    return lambda rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> Latency:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float) -> Latency:
+    """Long tailed latency, typical for a loaded API server."""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+class PagerDutySimulator:
+    """Simulated PagerDuty account served over http.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, services: int = 100, users: int = 100,
+                 teams: int = 20, members_per_team: int = 10,
+                 vendors: int = 50, priorities: int = 5,
+                 escalation_policies: int = 50, response_plays: int = 10,
+                 incidents: int = 0,
+                 incident_span: datetime.timedelta = datetime.timedelta(
+                     days=30),
+                 oncall_shift: datetime.timedelta = datetime.timedelta(
+                     hours=8),
+                 latency: Optional[Latency] = None,
+                 throttle_rate: float = 0.0, error_rate: float = 0.0,
+                 retry_after: float = 1.0, rate_limit: Optional[int] = None,
+                 rate_window: float = 60.0, max_limit: int = 100,
+                 max_offset: int = 10000,
+                 api_keys: Optional[Set[str]] = None,
+                 seed: int = 0) -> None:
+        """Constructor
+
+        Args:
+            services, users, ... (int): Account size, per collection.
+            incident_span (timedelta): Incidents are created evenly over
+                                       this span, up to INCIDENTS_UNTIL.
+            oncall_shift (timedelta): Length of the on-call shifts of the
+                                      first escalation level.
+            latency (Latency): Latency distribution of every response.
+            throttle_rate (float): Fraction of requests answered with 429.
+            error_rate (float): Fraction of requests answered with 503.
+            retry_after (float): Retry-After seconds sent with 429/503.
+            rate_limit (int): Requests allowed per api key in `rate_window`
+                              seconds. Unlimited if None.
+            max_limit (int): Maximum page size.
+            max_offset (int): Maximum offset plus limit of a page, past
+                              which lists answer 400.
+            api_keys (Set[str]): Accepted api keys. Any key is accepted if
+                                 None.
+            seed (int): Seed of the latency and failure random generator.
+        """
+        sizes = {
+            'services': services,
+            'users': users,
+            'teams': teams,
+            'vendors': vendors,
+            'priorities': priorities,
+            'escalation_policies': escalation_policies,
+            'response_plays': response_plays,
+        }
+        self.data: Dict[str, Dict[str, JsonObj]] = {}
+        for name, count in sizes.items():
+            factory = _COLLECTIONS[name][1]
+            items = (factory(i) for i in range(count))
+            self.data[name] = {item['id']: item for item in items}
+
+        self.members: Dict[str, List[JsonObj]] = {
+            team_id: [payloads.team_member_json(n * teams + i)
+                      for n in range(members_per_team)]
+            for i, team_id in enumerate(self.data['teams'])
+        }
+        self.integrations: Dict[str, Dict[str, JsonObj]] = {}
+        for i, svc_id in enumerate(self.data['services']):
+            intgs = (payloads.integration_json(i * 2 + n, svc_id)
+                     for n in range(2))
+            self.integrations[svc_id] = {intg['id']: intg for intg in intgs}
+        self.orchestrations: Dict[str, JsonObj] = {
+            svc_id: payloads.service_orchestration_json(i, sets=3, rules=2)
+            for i, svc_id in enumerate(self.data['services'])
+        }
+        self.orchestration_active: Dict[str, bool] = {
+            svc_id: True for svc_id in self.data['services']
+        }
+        first_incident = INCIDENTS_UNTIL - incident_span
+        self.incident_times = [
+            first_incident + incident_span * i / incidents
+            for i in range(incidents)
+        ]
+        self.incidents = [
+            payloads.incident_json(i, at)
+            for i, at in enumerate(self.incident_times)
+        ]
+
+        self.oncall_shift = oncall_shift
+
+        self.latency = latency or no_latency()
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.max_limit = max_limit
+        self.max_offset = max_offset
+        self.valid_keys = api_keys
+        self._rng = random.Random(seed)
+        self._windows: Dict[str, List[float]] = {}
+        self._next_id = 0
+
+        # "METHOD path" -> number of requests received
+        self.requests: Counter[str] = Counter()
+        # Requests being handled, and the most handled at a time
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Status code -> number of responses sent
+        self.responses: Counter[int] = Counter()
+        # Authorization header -> number of requests received
+        self.api_keys: Counter[str] = Counter()
+        # Client (host, port) of every connection seen
+        self.connections: Set[Any] = set()
+        # Events API v2 events accepted, in order
+        self.events: List[JsonObj] = []
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self._add_routes()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ''
+
+    # Async ContextManager support
+    async def __aenter__(self) -> 'PagerDutySimulator':
+        await self.start()
+        return self
+
+    # Async ContextManager support
+    async def __aexit__(self, *args: Any) -> None:
+        await self.stop()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.url = f'http://{bound_host}:{bound_port}'
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _add_routes(self) -> None:
+        r = self.app.router
+        r.add_post(EVENTS_PATH, self._enqueue_event)
+        r.add_get('/teams/{id}/members', self._list_members)
+        r.add_get('/services/{id}/integrations/{intg_id}',
+                  self._get_integration)
+        r.add_post('/services/{id}/integrations', self._create_integration)
+        r.add_get('/event_orchestrations/services/{id}/active',
+                  self._get_orchestration_active)
+        r.add_put('/event_orchestrations/services/{id}/active',
+                  self._put_orchestration_active)
+        r.add_get('/event_orchestrations/services/{id}',
+                  self._get_orchestration)
+        r.add_put('/event_orchestrations/services/{id}',
+                  self._put_orchestration)
+        r.add_get('/incidents', self._list_incidents)
+        r.add_get('/oncalls', self._list_oncalls)
+        r.add_post('/users', self._create_user)
+        r.add_put('/users/{id}', self._update_user)
+        r.add_delete('/users/{id}', self._delete_user)
+        r.add_get('/{collection}', self._list_collection)
+        r.add_get('/{collection}/{id}', self._get_item)
+
+    def _throttled(self, api_key: str) -> Optional[float]:
+        """Returns the Retry-After delay if api_key exceeded its rate limit.
+        """
+        if self.rate_limit is None:
+            return None
+        now = time.monotonic()
+        window = self._windows.setdefault(api_key, [now, 0])
+        if now - window[0] >= self.rate_window:
+            window[0], window[1] = now, 0
+        window[1] += 1
+        if window[1] > self.rate_limit:
+            return window[0] + self.rate_window - now
+        return None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request,
+                          handler: Handler) -> web.StreamResponse:
+        self.requests[f'{request.method} {request.path}'] += 1
+        self.api_keys[request.headers.get('Authorization', '')] += 1
+        if request.transport is not None:
+            self.connections.add(request.transport.get_extra_info('peername'))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            resp = await self._handle(request, handler)
+        finally:
+            self.in_flight -= 1
+        self.responses[resp.status] += 1
+        return resp
+
+    async def _handle(self, request: web.Request,
+                      handler: Handler) -> web.StreamResponse:
+        auth = request.headers.get('Authorization', '')
+        # Events are authenticated by their routing key instead.
+        if request.path == EVENTS_PATH:
+            pass
+        elif not auth.startswith('Token token='):
+            return _error(HTTPStatus.UNAUTHORIZED)
+        elif (self.valid_keys is not None
+              and auth[len('Token token='):] not in self.valid_keys):
+            return _error(HTTPStatus.UNAUTHORIZED)
+        await asyncio.sleep(self.latency(self._rng))
+
+        retry_after = self._throttled(auth)
+        if retry_after is None and self._rng.random() < self.throttle_rate:
+            retry_after = self.retry_after
+        if retry_after is not None:
+            return _error(HTTPStatus.TOO_MANY_REQUESTS, retry_after)
+        if self._rng.random() < self.error_rate:
+            return _error(HTTPStatus.SERVICE_UNAVAILABLE, self.retry_after)
+        return await handler(request)
+
+    def _page(self, request: web.Request, items: List[JsonObj],
+              items_name: str) -> web.Response:
+        offset = int(request.query.get('offset', 0))
+        limit = min(int(request.query.get('limit', 25)), self.max_limit)
+        if offset + limit > self.max_offset:
+            return _error(HTTPStatus.BAD_REQUEST)
+        body = {
+            items_name: items[offset:offset + limit],
+            'offset': offset,
+            'limit': limit,
+            'more': offset + limit < len(items),
+            'total': len(items) if request.query.get('total') == 'true'
+            else None,
+        }
+        return web.json_response(body)
+
+    def _new_id(self, prefix: str) -> str:
+        self._next_id += 1
+        return f'{prefix}{self._next_id:05X}'
+
+    async def _list_collection(self, request: web.Request) -> web.Response:
+        name = request.match_info['collection']
+        if name not in self.data:
+            return _error(HTTPStatus.NOT_FOUND)
+        return self._page(request, list(self.data[name].values()), name)
+
+    async def _list_incidents(self, request: web.Request) -> web.Response:
+        # Both ends of the range are inclusive, so that clients have to
+        # deal with incidents on the boundary of adjacent ranges.
+        since = datetime.datetime.fromisoformat(request.query['since'])
+        until = datetime.datetime.fromisoformat(request.query['until'])
+        first = bisect.bisect_left(self.incident_times, since)
+        last = bisect.bisect_right(self.incident_times, until)
+        return self._page(request, self.incidents[first:last], 'incidents')
+
+    def oncall_user(self, policy_no: int, at: float) -> int:
+        """Number of the user on call for the first level of a policy.
+        """
+        shift = math.floor(at / self.oncall_shift.total_seconds())
+        return (policy_no + shift) % len(self.data['users'])
+
+    async def _list_oncalls(self, request: web.Request) -> web.Response:
+        # The first level of each policy rotates over the users, one shift
+        # after the other, the next levels are the users targeted directly.
+        policy_ids = set(request.query.getall('escalation_policy_ids[]', []))
+        now = datetime.datetime.now(datetime.timezone.utc)
+        since = datetime.datetime.fromisoformat(
+            request.query.get('since', now.isoformat()))
+        until = datetime.datetime.fromisoformat(
+            request.query.get('until', now.isoformat()))
+        shift = self.oncall_shift.total_seconds()
+        first = math.floor(since.timestamp() / shift)
+        last = max(math.ceil(until.timestamp() / shift), first + 1)
+        oncalls = []
+        for i, policy_id in enumerate(self.data['escalation_policies']):
+            if policy_ids and policy_id not in policy_ids:
+                continue
+            for n in range(first, last):
+                start = datetime.datetime.fromtimestamp(
+                    n * shift, datetime.timezone.utc)
+                oncalls.append(payloads.oncall_json(
+                    i, 1, self.oncall_user(i, n * shift), start,
+                    start + self.oncall_shift))
+            for level in (2, 3):
+                oncalls.append(payloads.oncall_json(i, level, i * 3 + level - 1,
+                                                    None, None))
+        return self._page(request, oncalls, 'oncalls')
+
+    async def _get_item(self, request: web.Request) -> web.Response:
+        name = request.match_info['collection']
+        item = self.data.get(name, {}).get(request.match_info['id'])
+        if item is None:
+            return _error(HTTPStatus.NOT_FOUND)
+        return web.json_response({_COLLECTIONS[name][0]: item})
+
+    async def _list_members(self, request: web.Request) -> web.Response:
+        members = self.members.get(request.match_info['id'])
+        if members is None:
+            return _error(HTTPStatus.NOT_FOUND)
+        return self._page(request, members, 'members')
+
+    async def _get_integration(self, request: web.Request) -> web.Response:
+        intgs = self.integrations.get(request.match_info['id'], {})
+        intg = intgs.get(request.match_info['intg_id'])
+        if intg is None:
+            return _error(HTTPStatus.NOT_FOUND)
+        return web.json_response({'integration': intg})
+
+    async def _create_integration(self, request: web.Request) -> web.Response:
+        svc_id = request.match_info['id']
+        if svc_id not in self.data['services']:
+            return _error(HTTPStatus.NOT_FOUND)
+        body = await request.json()
+        intg = payloads.integration_json(0, svc_id)
+        intg_id = self._new_id('PI')
+        intg.update(body['integration'], id=intg_id, summary=intg_id,
+                    vendor={**body['integration']['vendor'], 'summary': '',
+                            'self': ''},
+                    service=self.data['services'][svc_id])
+        self.integrations[svc_id][intg_id] = intg
+        ref = {key: intg[key] for key in ('id', 'summary', 'self', 'html_url')}
+        ref['type'] = f"{intg['type']}_reference"
+        self.data['services'][svc_id]['integrations'].append(ref)
+        return web.json_response({'integration': intg},
+                                 status=HTTPStatus.CREATED)
+
+    async def _get_orchestration(self, request: web.Request) -> web.Response:
+        orch = self.orchestrations.get(request.match_info['id'])
+        if orch is None:
+            return _error(HTTPStatus.NOT_FOUND)
+        return web.json_response({'orchestration_path': orch})
+
+    async def _put_orchestration(self, request: web.Request) -> web.Response:
+        orch = self.orchestrations.get(request.match_info['id'])
+        if orch is None:
+            return _error(HTTPStatus.NOT_FOUND)
+        body = await request.json()
+        orch.update(body['orchestration_path'], version=self._new_id('V'))
+        return web.json_response({'orchestration_path': orch})
+
+    async def _get_orchestration_active(
+            self, request: web.Request) -> web.Response:
+        svc_id = request.match_info['id']
+        if svc_id not in self.orchestration_active:
+            return _error(HTTPStatus.NOT_FOUND)
+        return web.json_response({'active': self.orchestration_active[svc_id]})
+
+    async def _put_orchestration_active(
+            self, request: web.Request) -> web.Response:
+        svc_id = request.match_info['id']
+        if svc_id not in self.orchestration_active:
+            return _error(HTTPStatus.NOT_FOUND)
+        body = await request.json()
+        self.orchestration_active[svc_id] = bool(body['active'])
+        return web.json_response({'active': self.orchestration_active[svc_id]})
+
+    async def _enqueue_event(self, request: web.Request) -> web.Response:
+        event = await request.json()
+        action = event.get('event_action')
+        if (not event.get('routing_key')
+                or action not in ('trigger', 'acknowledge', 'resolve')
+                or (action == 'trigger' and 'payload' not in event)
+                or (action != 'trigger' and 'dedup_key' not in event)):
+            return web.json_response(
+                {'status': 'invalid event', 'message': 'Event object is '
+                 'invalid'}, status=HTTPStatus.BAD_REQUEST)
+        dedup_key = event.get('dedup_key') or self._new_id('D')
+        self.events.append(event)
+        return web.json_response(
+            {'status': 'success', 'message': 'Event processed',
+             'dedup_key': dedup_key}, status=HTTPStatus.ACCEPTED)
+
+    async def _create_user(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        user = payloads.user_json(0)
+        user_id = self._new_id('PU')
+        user.update(body['user'], id=user_id, summary=body['user']['name'],
+                    self=f'{payloads.API_URL}/users/{user_id}',
+                    teams=[], contact_methods=[], notification_rules=[])
+        self.data['users'][user_id] = user
+        return web.json_response({'user': user}, status=HTTPStatus.CREATED)
+
+    async def _update_user(self, request: web.Request) -> web.Response:
+        user = self.data['users'].get(request.match_info['id'])
+        if user is None:
+            return _error(HTTPStatus.NOT_FOUND)
+        body = await request.json()
+        user.update(body['user'])
+        return web.json_response({'user': user})
+
+    async def _delete_user(self, request: web.Request) -> web.Response:
+        if self.data['users'].pop(request.match_info['id'], None) is None:
+            return _error(HTTPStatus.NOT_FOUND)
+        return web.Response(status=HTTPStatus.NO_CONTENT)
+
+
+def _error(status: HTTPStatus,
+           retry_after: Optional[float] = None) -> web.Response:
+    headers = {}
+    if retry_after is not None:
+        headers['Retry-After'] = str(max(math.ceil(retry_after), 0))
+    body = {'error': {'message': status.phrase, 'code': status.value}}
+    return web.json_response(body, status=status, headers=headers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='PagerDuty API simulator')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--services', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--median-latency', type=float, default=0.05)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=None,
+                        help='requests per minute per api key')
+    args = parser.parse_args()
+
+    sim = PagerDutySimulator(services=args.services, users=args.users,
+                             latency=lognormal_latency(args.median_latency,
+                                                       0.5),
+                             throttle_rate=args.throttle_rate,
+                             error_rate=args.error_rate,
+                             rate_limit=args.rate_limit)
+    web.run_app(sim.app, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
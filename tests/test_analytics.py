@@ -0,0 +1,149 @@
+"""Incident analytics tests"""
+
+import datetime
+import json
+import math
+import statistics
+
+import aiopagerduty
+import pytest
+from aiopagerduty.analytics import IncidentTable
+from aiopagerduty.models import Incident, Service
+from assertpy import assert_that
+
+from benchmarks import payloads
+from tests.helpers.simulator import INCIDENTS_UNTIL, PagerDutySimulator
+
+START = datetime.datetime(2022, 6, 1, tzinfo=datetime.timezone.utc)
+MINUTE = datetime.timedelta(minutes=1)
+
+
+def _incidents(count: int) -> list:
+    return [Incident(**payloads.incident_json(i, START + MINUTE * i * 7))
+            for i in range(count)]
+
+
+def _table(incidents: list) -> IncidentTable:
+    table = IncidentTable()
+    for incident in incidents:
+        table.add_incident(incident)
+    return table
+
+
+def test_grouped_metrics() -> None:
+    incidents = _incidents(1000)
+    table = _table(incidents + incidents[:10])
+    assert_that(table).is_length(1000)
+
+    tta = table.time_to_ack()
+    by_service: dict = {}
+    for incident, value in zip(incidents, tta):
+        ack = incident.acknowledgements[0].at - incident.created_at
+        assert_that(value).is_equal_to(ack.total_seconds())
+        by_service.setdefault(incident.service.id, []).append(value)
+    means = table.means(tta, "service")
+    percentiles = table.percentiles(tta, "service", [0, 50, 90, 100])
+    assert_that(percentiles).is_length(100)
+    for service_id, values in by_service.items():
+        assert_that(means[service_id]).is_close_to(
+            statistics.mean(values), 1e-6)
+        assert_that(percentiles[service_id][0]).is_equal_to(min(values))
+        assert_that(percentiles[service_id][1]).is_equal_to(
+            statistics.median(values))
+        assert_that(percentiles[service_id][3]).is_equal_to(max(values))
+
+    ttr = table.percentiles(table.time_to_resolve(), "urgency")
+    assert_that(ttr).contains_only("high", "low")
+    assert_that(table.percentiles(tta, "team")).is_length(20)
+    # The synthetic incidents have no priority.
+    assert_that(table.percentiles(tta, "priority")).is_empty()
+
+
+def test_unacknowledged_incidents_are_skipped() -> None:
+    table = IncidentTable()
+    table.add("Q1", 0.0, 60.0, math.nan, "PS1", None, "PP1", "high")
+    table.add("Q2", 0.0, math.nan, math.nan, "PS1", None, "PP1", "high")
+    table.add("Q3", 0.0, 180.0, 300.0, "PS2", None, None, "low")
+    assert_that(table.percentiles(table.time_to_ack(), "priority")
+                ).is_equal_to({"PP1": [60.0, 60.0, 60.0]})
+    assert_that(table.means(table.time_to_resolve())
+                ).is_equal_to({"": 300.0})
+    with pytest.raises(ValueError):
+        table.means([1.0], "service")
+
+
+def test_histogram() -> None:
+    incidents = _incidents(500)
+    table = _table(incidents)
+    histogram = table.histogram("team", bucket=86400)
+    assert_that(histogram.start).is_equal_to(START.timestamp())
+    assert_that(histogram.counts).is_length(20)
+    assert_that(sum(sum(c) for c in histogram.counts.values())
+                ).is_equal_to(500)
+    day = int((incidents[42].created_at - START).total_seconds() // 86400)
+    expected = sum(
+        1 for incident in incidents
+        if incident.teams[0].id == incidents[42].teams[0].id and
+        (incident.created_at - START).total_seconds() // 86400 == day)
+    assert_that(histogram.counts[incidents[42].teams[0].id][day]
+                ).is_equal_to(expected)
+    resolved = table.histogram(bucket=3600, column=table.resolved)
+    assert_that(sum(resolved.counts[""])).is_equal_to(500)
+    assert_that(IncidentTable().histogram().counts).is_empty()
+
+
+def test_ack_timeout_breaches() -> None:
+    incidents = _incidents(300)
+    table = _table(incidents)
+    services = [Service(**payloads.service_json(i)) for i in range(100)]
+    services[1].acknowledgement_timeout = None
+    breaches = table.ack_timeout_breaches(services)
+    expected: dict = {}
+    for incident in incidents:
+        held = incident.resolved_at - incident.acknowledgements[0].at
+        if (held.total_seconds() > 600 and
+                incident.service.id != services[1].id):
+            expected.setdefault(incident.service.id, []).append(incident.id)
+    assert_that(breaches).is_equal_to(expected)
+
+
+def test_log_entries() -> None:
+    incidents = _incidents(10)
+    table = _table(incidents)
+    created = incidents[3].created_at
+    entries = [{
+        "type": "notify_log_entry",
+        "created_at": (created + MINUTE * n).isoformat(),
+        "incident": {"id": incidents[n % 4].id},
+        "user": {"id": f"PU{n % 3}"},
+    } for n in range(12)]
+    entries.append({
+        "type": "acknowledge_log_entry",
+        "created_at": (created + datetime.timedelta(seconds=30)).isoformat(),
+        "incident": {"id": incidents[3].id},
+    })
+    entries.append({"type": "notify_log_entry", "incident": {"id": "QOTHER"},
+                    "user": {"id": "PU0"}})
+    table.add_log_entries(entries)
+    assert_that(table.time_to_ack()[3]).is_equal_to(30.0)
+    assert_that(table.pages()).is_equal_to(
+        {"": {"PU0": 4, "PU1": 4, "PU2": 4}})
+    pages = table.pages("service")
+    assert_that(pages[incidents[0].service.id]).is_equal_to(
+        {"PU0": 1, "PU1": 1, "PU2": 1})
+    assert_that(pages).is_length(4)
+
+
+async def test_raw_pages() -> None:
+    day = datetime.timedelta(days=1)
+    async with PagerDutySimulator(incidents=400, incident_span=day) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            table = IncidentTable()
+            async for page in pd.list_incidents_raw(
+                    INCIDENTS_UNTIL - day, INCIDENTS_UNTIL, windows=4):
+                table.add_json(json.loads(page.body)["incidents"])
+            models = _table([incident async for incident in pd.iter_incidents(
+                INCIDENTS_UNTIL - day, INCIDENTS_UNTIL, windows=4)])
+    assert_that(sorted(table.ids)).is_equal_to(sorted(models.ids))
+    assert_that(table.means(table.time_to_resolve(), "service")).is_equal_to(
+        models.means(models.time_to_resolve(), "service"))
@@ -0,0 +1,143 @@
+"""Catalog cache tests"""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import aiopagerduty
+import pytest
+from aiopagerduty.cache import CacheBackend, JsonObj, MemoryCache
+from aiopagerduty.sqlitecache import SQLiteCache
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator, constant_latency
+
+
+@pytest.fixture(name="make_cache", params=["memory", "sqlite"])
+def cache_factory(request: pytest.FixtureRequest,
+                  tmp_path: Path) -> Callable[[], CacheBackend]:
+    if request.param == "memory":
+        return MemoryCache
+    return lambda: SQLiteCache(str(tmp_path / "cache.db"))
+
+
+def test_collection_operations(make_cache: Callable[[], CacheBackend]) -> None:
+    cache = make_cache()
+    assert_that(cache.get("users")).is_none()
+    cache.upsert("users", {"id": "P0"})
+    assert_that(cache.get("users")).is_none()
+
+    cache.set("users", [{"id": "P1", "n": 1}, {"id": "P2", "n": 2}], ttl=60)
+    cache.upsert("users", {"id": "P1", "n": 10})
+    cache.upsert("users", {"id": "P3", "n": 3})
+    cache.remove("users", "P2")
+    assert_that(cache.get("users")).is_equal_to(
+        [{"id": "P1", "n": 10}, {"id": "P3", "n": 3}])
+
+    cache.invalidate("users")
+    assert_that(cache.get("users")).is_none()
+    cache.set("users", [], ttl=-1)
+    assert_that(cache.get("users")).is_none()
+
+
+def test_leases(make_cache: Callable[[], CacheBackend]) -> None:
+    cache = make_cache()
+    assert_that(cache.acquire_lease("users", "a", ttl=60)).is_true()
+    assert_that(cache.acquire_lease("users", "b", ttl=60)).is_false()
+    assert_that(cache.acquire_lease("users", "a", ttl=60)).is_true()
+    cache.release_lease("users", "a")
+    assert_that(cache.acquire_lease("users", "b", ttl=-1)).is_true()
+    # Expired leases can be taken over.
+    assert_that(cache.acquire_lease("users", "a", ttl=60)).is_true()
+
+
+async def test_processes_share_one_refresh(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache.db")
+    async with PagerDutySimulator(services=250,
+                                  latency=constant_latency(0.05)) as sim:
+        # One client per simulated process, each with its own connection.
+        clients = [aiopagerduty.Client(f"p{n}", base_url=sim.url,
+                                       cache=SQLiteCache(path))
+                   for n in range(4)]
+        for client in clients:
+            await client.__aenter__()
+        results = await asyncio.gather(
+            *[client.list_services() for client in clients])
+        assert_that(sim.requests["GET /services"]).is_equal_to(3)
+
+        late = aiopagerduty.Client("late", base_url=sim.url,
+                                   cache=SQLiteCache(path))
+        async with late:
+            results.append(await late.list_services())
+        for client in clients:
+            await client.__aexit__(None, None, None)
+
+    assert_that(sim.requests["GET /services"]).is_equal_to(3)
+    for result in results:
+        assert_that([s.id for s in result]).is_equal_to(
+            list(sim.data["services"]))
+
+
+async def test_expired_cache_is_refetched() -> None:
+    async with PagerDutySimulator(users=10) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       cache=MemoryCache(),
+                                       cache_ttl=0.5) as pd:
+            await pd.list_users()
+            await pd.list_users()
+            assert_that(sim.requests["GET /users"]).is_equal_to(1)
+            await asyncio.sleep(0.6)
+            await pd.list_users()
+    assert_that(sim.requests["GET /users"]).is_equal_to(2)
+
+
+class _LateReader(MemoryCache):
+    """Misses the first read, as if another process refreshed the list
+    right after it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads = 0
+
+    def get(self, key: str) -> Optional[List[JsonObj]]:
+        self.reads += 1
+        return None if self.reads == 1 else super().get(key)
+
+
+async def test_refresh_landed_before_the_lease() -> None:
+    async with PagerDutySimulator(users=10) as sim:
+        cache = _LateReader()
+        cache.set("users", [{"id": "P1"}], ttl=60)
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       cache=cache) as pd:
+            items = await pd.cached_multi_fetch_json("users", "users")
+    assert_that(items).is_equal_to([{"id": "P1"}])
+    assert_that(sim.requests["GET /users"]).is_zero()
+
+
+async def test_waiting_for_a_lock_does_not_block_the_loop(
+        tmp_path: Path) -> None:
+    path = str(tmp_path / "cache.db")
+    # Another process holds the write lock for a while.
+    other = SQLiteCache(path)
+    other.get("services")
+    locker = sqlite3.connect(path, isolation_level=None)
+    locker.execute("BEGIN IMMEDIATE")
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        locker.execute("COMMIT")
+
+    async with PagerDutySimulator(services=10) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       cache=SQLiteCache(path)) as pd:
+            services, _ = await asyncio.gather(pd.list_services(), tick())
+    locker.close()
+    other.close()
+    assert_that(ticks).is_equal_to(20)
+    assert_that(services).is_length(10)
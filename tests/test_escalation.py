@@ -0,0 +1,83 @@
+"""Escalation policy simulation tests"""
+
+import math
+import random
+import time
+from typing import Any, Dict, List
+
+import pytest
+from aiopagerduty.escalation import EscalationSimulator
+from aiopagerduty.models import EscalationPolicy
+from assertpy import assert_that
+
+from benchmarks import payloads
+
+
+def _policy(i: int, delays: List[int], num_loops: int) -> EscalationPolicy:
+    policy: Dict[str, Any] = payloads.escalation_policy_json(i)
+    policy["num_loops"] = num_loops
+    policy["escalation_rules"] = [
+        {**rule, "escalation_delay_in_minutes": delay}
+        for rule, delay in zip(policy["escalation_rules"], delays)
+    ]
+    return EscalationPolicy(**policy)
+
+
+@pytest.fixture(name="simulator")
+def fixture_simulator() -> EscalationSimulator:
+    return EscalationSimulator([_policy(0, [5, 10], 1)])
+
+
+def test_schedule_loops(simulator: EscalationSimulator) -> None:
+    policy = simulator.policies[payloads.escalation_policy_json(0)["id"]]
+    assert_that(list(policy.offsets)).is_equal_to(
+        [0.0, 300.0, 900.0, 1200.0])
+    assert_that(policy.rule_ids).is_equal_to(policy.rule_ids[:2] * 2)
+
+
+@pytest.mark.parametrize("ack_delay,steps", [
+    (0, 1),
+    (299, 1),
+    (300, 1),  # Acknowledged as the step is due
+    (301, 2),
+    (1000, 3),
+    (math.inf, 4),
+])
+def test_acknowledgement_stops_escalation(simulator: EscalationSimulator,
+                                          ack_delay: float,
+                                          steps: int) -> None:
+    policy_id = payloads.escalation_policy_json(0)["id"]
+    notifications = list(simulator.simulate([policy_id], [1000.0],
+                                            [ack_delay]))
+    assert_that([n.at for n in notifications]).is_equal_to(
+        [1000.0, 1300.0, 1900.0, 2200.0][:steps])
+    assert_that(list(simulator.step_counts([policy_id],
+                                           [ack_delay]))).is_equal_to([steps])
+
+
+def test_bulk_load_matches_notifications() -> None:
+    policies = [_policy(i, [5, 15, 30], i % 3) for i in range(50)]
+    simulator = EscalationSimulator(policies)
+    rand = random.Random(3)
+    count = 50000
+    policy_ids = [policies[rand.randrange(50)].id for _ in range(count)]
+    starts = [rand.random() * 86400 * 30 for _ in range(count)]
+    ack_delays = [rand.expovariate(1 / 600) for _ in range(count)]
+
+    begin = time.perf_counter()
+    load = simulator.target_load(policy_ids, starts, ack_delays)
+    assert_that(time.perf_counter() - begin).is_less_than(2)
+
+    expected: Dict[str, int] = {}
+    for notification in simulator.simulate(policy_ids, starts, ack_delays):
+        for target in notification.targets:
+            expected[target.id] = expected.get(target.id, 0) + 1
+    assert_that(dict(load)).is_equal_to(expected)
+    timeline = simulator.timeline(policy_ids, starts, ack_delays)
+    assert_that(sum(timeline.values())).is_equal_to(sum(expected.values()))
+
+
+def test_sequences_must_match() -> None:
+    simulator = EscalationSimulator([_policy(0, [5], 0)])
+    with pytest.raises(ValueError):
+        simulator.target_load(["PE000000"], [0.0, 1.0], [0.0])
@@ -0,0 +1,158 @@
+"""Events API v2 sender tests"""
+
+import asyncio
+from typing import Any, Dict
+
+import pytest
+from aiopagerduty.events import EventCoalescer, EventSender
+from aiopagerduty.transport import Transport
+from assertpy import assert_that
+
+from tests.helpers.simulator import (EVENTS_PATH, PagerDutySimulator,
+                                     constant_latency)
+
+
+def _event(i: int, action: str = "trigger",
+           summary: str = "Alert") -> Dict[str, Any]:
+    return {
+        "routing_key": "R0",
+        "event_action": action,
+        "dedup_key": f"alert-{i}",
+        "payload": {"summary": summary, "source": "host",
+                    "severity": "critical"},
+    }
+
+
+async def test_sends_concurrently() -> None:
+    async with PagerDutySimulator(latency=constant_latency(0.05)) as sim:
+        async with EventSender(sim.url + EVENTS_PATH,
+                               concurrency=20) as sender:
+            for i in range(100):
+                await sender.send(_event(i))
+            await sender.flush()
+            metrics = sender.metrics()
+
+    assert_that(sim.events).is_length(100)
+    assert_that(metrics["sent"]).is_equal_to(100)
+    assert_that(metrics["failed"]).is_zero()
+    assert_that(metrics["pending"]).is_zero()
+    # Far more than the 20 events/s of sequential posts.
+    assert_that(metrics["events_per_sec"]).is_greater_than(60)
+    assert_that(metrics["latency_p50"]).is_greater_than_or_equal_to(0.05)
+    assert_that(metrics["latency_p99"]).is_greater_than_or_equal_to(
+        metrics["latency_p50"])
+
+
+async def test_backpressure() -> None:
+    async with PagerDutySimulator(latency=constant_latency(0.05)) as sim:
+        async with EventSender(sim.url + EVENTS_PATH, max_queue=2,
+                               concurrency=1) as sender:
+            sender.send_nowait(_event(0))
+            sender.send_nowait(_event(1))
+            with pytest.raises(asyncio.QueueFull):
+                sender.send_nowait(_event(2))
+            # send() waits for room in the queue instead.
+            await asyncio.wait_for(sender.send(_event(2)), timeout=1)
+    # Closing drains the queue.
+    assert_that([e["dedup_key"] for e in sim.events]).is_equal_to(
+        ["alert-0", "alert-1", "alert-2"])
+
+
+async def test_retries_throttled_and_failed_events() -> None:
+    async with PagerDutySimulator(throttle_rate=0.2, error_rate=0.2,
+                                  retry_after=0, seed=1) as sim:
+        async with Transport() as transport:
+            async with EventSender(sim.url + EVENTS_PATH, transport=transport,
+                                   retry_backoff=0.001,
+                                   max_retries=10) as sender:
+                for i in range(50):
+                    await sender.send(_event(i))
+                await sender.flush()
+                assert_that(sender.stats["sent"]).is_equal_to(50)
+                assert_that(sender.stats["throttled"]).is_positive()
+                assert_that(sender.stats["retries"]).is_greater_than(
+                    sender.stats["throttled"])
+            # A shared transport is left open.
+            assert_that(transport.is_open).is_true()
+    assert_that({e["dedup_key"] for e in sim.events}).is_length(50)
+
+
+async def test_rejected_events_are_not_retried() -> None:
+    async with PagerDutySimulator() as sim:
+        async with EventSender(sim.url + EVENTS_PATH) as sender:
+            await sender.send({"routing_key": "R0", "event_action": "bad"})
+            await sender.flush()
+            assert_that(sender.stats["failed"]).is_equal_to(1)
+            assert_that(sender.stats["retries"]).is_zero()
+    assert_that(sim.requests[f"POST {EVENTS_PATH}"]).is_equal_to(1)
+
+
+async def test_workers_survive_unexpected_errors() -> None:
+    async with PagerDutySimulator() as sim:
+        async with EventSender(sim.url + EVENTS_PATH,
+                               concurrency=1) as sender:
+            broken = _event(0)
+            broken["payload"]["custom_details"] = {1, 2}  # Not json
+            await sender.send(broken)
+            await sender.send(_event(1))
+            await asyncio.wait_for(sender.flush(), 5)
+            metrics = sender.metrics()
+
+    assert_that(metrics["failed"]).is_equal_to(1)
+    assert_that(metrics["sent"]).is_equal_to(1)
+    assert_that(sim.events).is_length(1)
+
+
+async def test_events_of_a_key_are_sent_in_order() -> None:
+    async with PagerDutySimulator() as sim:
+        async with EventSender(sim.url + EVENTS_PATH,
+                               concurrency=8) as sender:
+            for n in range(40):
+                await sender.send(_event(n % 2, summary=str(n)))
+    for key in ("alert-0", "alert-1"):
+        summaries = [int(e["payload"]["summary"]) for e in sim.events
+                     if e["dedup_key"] == key]
+        assert_that(summaries).is_length(20).is_sorted()
+
+
+async def test_coalescing() -> None:
+    async with PagerDutySimulator() as sim:
+        async with EventSender(sim.url + EVENTS_PATH) as sender:
+            async with EventCoalescer(sender, window=0.05) as coalescer:
+                # A storm of updates keeps the latest payload.
+                for n in range(100):
+                    await coalescer.send(_event(0, summary=f"Update {n}"))
+                # A flapping alert only sends its resolve, in case it was
+                # open before.
+                for _ in range(5):
+                    await coalescer.send(_event(1))
+                    await coalescer.send(_event(1, "resolve"))
+                # Repeated acknowledges are sent once, after the trigger.
+                await coalescer.send(_event(2))
+                await coalescer.send(_event(2, "acknowledge"))
+                await coalescer.send(_event(2, "acknowledge"))
+                await asyncio.sleep(0.1)
+                first = [(e["dedup_key"], e["event_action"],
+                          e["payload"]["summary"]) for e in sim.events]
+
+                # Known to be resolved, the flapping alert sends nothing.
+                await coalescer.send(_event(1))
+                await coalescer.send(_event(1, "resolve"))
+                # The open alert is resolved.
+                await coalescer.send(_event(0, summary="Last update"))
+                await coalescer.send(_event(0, "resolve"))
+                await coalescer.flush()
+                stats = coalescer.stats
+
+    assert_that(first).contains_only(
+        ("alert-0", "trigger", "Update 99"),
+        ("alert-1", "resolve", "Alert"),
+        ("alert-2", "trigger", "Alert"),
+        ("alert-2", "acknowledge", "Alert"))
+    assert_that(first.index(("alert-2", "trigger", "Alert"))).is_less_than(
+        first.index(("alert-2", "acknowledge", "Alert")))
+    assert_that([(e["dedup_key"], e["event_action"])
+                 for e in sim.events[4:]]).is_equal_to([("alert-0",
+                                                          "resolve")])
+    assert_that(stats["received"]).is_equal_to(117)
+    assert_that(stats["forwarded"]).is_equal_to(5)
@@ -0,0 +1,84 @@
+"""Streaming export tests"""
+
+import csv
+import gzip
+import json
+from pathlib import Path
+
+import aiopagerduty
+import pytest
+from aiopagerduty.export import Export, export_all, projection
+from assertpy import assert_that
+
+from benchmarks import payloads
+from tests.helpers.simulator import PagerDutySimulator
+
+
+def test_projections() -> None:
+    policy = payloads.escalation_policy_json(4)
+    assert_that(projection("name")(policy)).is_equal_to("Policy 4")
+    assert_that(projection("teams[].id")(policy)).is_equal_to(["PT000004"])
+    assert_that(projection("escalation_rules[].targets[].id")(policy)
+                ).is_equal_to(["PU00000C", "PU00000D", "PU00000E"])
+    assert_that(projection("missing.id")(policy)).is_none()
+    assert_that(projection("missing[].id")(policy)).is_empty()
+
+
+async def test_concurrent_exports(tmp_path: Path) -> None:
+    async with PagerDutySimulator(services=250, users=120, teams=5,
+                                  members_per_team=3) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            rows = await export_all(pd, [
+                Export("services", str(tmp_path / "services.csv.gz"), "csv"),
+                Export("users", str(tmp_path / "users.ndjson")),
+                Export("escalation_policies",
+                       str(tmp_path / "policies.ndjson"), "ndjson",
+                       ["id", "escalation_rules[].targets[].id"]),
+                Export("memberships", str(tmp_path / "members.csv"), "csv"),
+            ], queue_size=1)
+
+    assert_that(rows).is_equal_to({
+        str(tmp_path / "services.csv.gz"): 250,
+        str(tmp_path / "users.ndjson"): 120,
+        str(tmp_path / "policies.ndjson"): 50,
+        str(tmp_path / "members.csv"): 15,
+    })
+    with gzip.open(tmp_path / "services.csv.gz", "rt", newline="") as f:
+        services = list(csv.DictReader(f))
+    assert_that(services[3]).is_equal_to({
+        "id": "PS000003",
+        "name": "Service 3",
+        "status": "active",
+        "escalation_policy.id": "PE000003",
+        "teams[].id": "PT000003",
+        "created_at": "2022-06-24T21:50:39Z",
+    })
+    with open(tmp_path / "users.ndjson", encoding="utf-8") as f:
+        users = [json.loads(line) for line in f]
+    assert_that(users[7]).is_equal_to(payloads.user_json(7))
+    with open(tmp_path / "policies.ndjson", encoding="utf-8") as f:
+        policy = json.loads(f.readline())
+    assert_that(policy["escalation_rules[].targets[].id"]).is_length(3)
+    with open(tmp_path / "members.csv", encoding="utf-8", newline="") as f:
+        members = list(csv.reader(f))
+    assert_that(members[0]).is_equal_to(["team.id", "user.id", "role"])
+    assert_that({row[0] for row in members[1:]}).is_length(5)
+
+
+async def test_unknown_format(tmp_path: Path) -> None:
+    async with PagerDutySimulator() as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            with pytest.raises(ValueError):
+                await export_all(pd, [
+                    Export("teams", str(tmp_path / "teams.xml"), "xml")])
+
+
+async def test_failed_export_leaves_no_file(tmp_path: Path) -> None:
+    async with PagerDutySimulator(services=250) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       max_retries=0) as pd:
+            sim.error_rate = 1.0
+            with pytest.raises(aiopagerduty.Error):
+                await export_all(pd, [
+                    Export("services", str(tmp_path / "services.ndjson"))])
+    assert_that(list(tmp_path.iterdir())).is_empty()
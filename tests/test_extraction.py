@@ -0,0 +1,89 @@
+"""Orchestration variable and extraction tests"""
+
+from typing import Any, Dict
+
+from aiopagerduty.extraction import CompiledActions, Transformer, apply_fields
+from aiopagerduty.models import Action, ServiceOrchestration
+from assertpy import assert_that
+
+from benchmarks import payloads
+
+
+def _event(summary: str, env: str = "env1") -> Dict[str, Any]:
+    return {"event": {"summary": summary, "custom_details": {"env": env}}}
+
+
+def test_variables_and_templates() -> None:
+    action = Action(
+        variables=[
+            {"name": "host", "path": "event.summary", "type": "regex",
+             "value": "on (\\w+) server"},
+            {"name": "parts", "path": "event.summary", "type": "regex",
+             "value": "(High) CPU on (w)"},
+            {"name": "whole", "path": "event.summary", "type": "regex",
+             "value": "C.U"},
+            {"name": "unset", "path": "event.source", "type": "regex",
+             "value": ".*"},
+        ],
+        extractions=[
+            {"target": "event.summary",
+             "template": "{{host}}: {{parts}}/{{ whole }} {{unset}}"},
+            {"target": "event.custom_details.where",
+             "template": "{{event.custom_details.env}}-{{variables.host}}"},
+            {"target": "event.source", "source": "event.summary",
+             "regex": "on (\\w+)"},
+            {"target": "event.class", "source": "event.summary",
+             "regex": "^disk"},
+        ])
+    fields: Dict[str, Any] = {}
+    CompiledActions(action).apply(_event("High CPU on web1 server"), fields)
+    assert_that(fields).is_equal_to({
+        "event.summary": "web1: Highw/CPU ",
+        "event.custom_details.where": "env1-web1",
+        "event.source": "web1",
+    })
+
+
+def test_api_regex_extraction() -> None:
+    # Extractions with a regex have no template in the API.
+    action = Action.parse_obj({"extractions": [{
+        "target": "event.custom_details.host",
+        "source": "event.summary",
+        "regex": "on (\\w+) server",
+    }]})
+    fields: Dict[str, Any] = {}
+    CompiledActions(action).apply(_event("High CPU on web1 server"), fields)
+    assert_that(fields).is_equal_to({"event.custom_details.host": "web1"})
+
+
+def test_transform_batch() -> None:
+    orchestration = ServiceOrchestration(
+        **payloads.service_orchestration_json(0, sets=2, rules=3))
+    transformer = Transformer(orchestration)
+    events = [_event("High CPU on db2 server", f"env{i % 4}")
+              for i in range(8)]
+    results = list(transformer.transform_batch(events))
+    assert_that(results).is_length(8)
+
+    match, fields = results[1]
+    assert_that(match.rules).is_equal_to(("00000001", "00010001"))
+    assert_that(fields).is_equal_to({"event.summary": "High CPU on db2"})
+
+    # Events going to catch_all have no extraction to apply.
+    match, fields = results[3]
+    assert_that(match.catch_all).is_true()
+    assert_that(fields).is_empty()
+
+
+def test_apply_fields_copies_changed_paths() -> None:
+    event = _event("High CPU on web1 server")
+    event["raw_event"] = {"a": 1}
+    result = apply_fields(event, {"event.summary": "web1",
+                                  "event.custom_details.host": "web1"})
+    assert_that(result["event"]["summary"]).is_equal_to("web1")
+    assert_that(result["event"]["custom_details"]).is_equal_to(
+        {"env": "env1", "host": "web1"})
+    assert_that(event["event"]["summary"]).is_equal_to(
+        "High CPU on web1 server")
+    assert_that(event["event"]["custom_details"]).does_not_contain_key("host")
+    assert_that(result["raw_event"]).is_same_as(event["raw_event"])
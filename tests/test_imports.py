@@ -0,0 +1,24 @@
+"""Lazy package import tests"""
+
+import aiopagerduty
+from assertpy import assert_that
+
+from benchmarks import bench_import
+
+
+def test_import_loads_no_heavy_module() -> None:
+    assert_that(bench_import.probe()["loaded"]).is_empty()
+
+
+def test_exported_names() -> None:
+    assert_that(aiopagerduty.Client.__module__).is_equal_to(
+        "aiopagerduty.client")
+    assert_that(aiopagerduty.Error.__module__).is_equal_to(
+        "aiopagerduty.fetcher")
+    assert_that(aiopagerduty.ObjectRef).is_same_as(
+        aiopagerduty.models.ObjectRef)
+    assert_that(aiopagerduty.__all__).contains("Client", "ClientPool",
+                                               "Service", "EscalationPolicy")
+    assert_that(dir(aiopagerduty)).contains("Transport")
+    assert_that(getattr).raises(AttributeError).when_called_with(
+        aiopagerduty, "NotAModel")
@@ -0,0 +1,52 @@
+"""Incident listing tests"""
+
+import datetime
+import json
+
+import aiopagerduty
+from aiopagerduty.incidents_mixin import split_windows
+from assertpy import assert_that
+
+from tests.helpers.simulator import INCIDENTS_UNTIL, PagerDutySimulator
+
+DAY = datetime.timedelta(days=1)
+
+
+def test_split_windows() -> None:
+    since = INCIDENTS_UNTIL - DAY
+    windows = split_windows(since, INCIDENTS_UNTIL, 7)
+    assert_that(windows).is_length(7)
+    assert_that(windows[0][0]).is_equal_to(since)
+    assert_that(windows[-1][1]).is_equal_to(INCIDENTS_UNTIL)
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert_that(start).is_equal_to(end)
+        assert_that(start.microsecond).is_zero()
+
+
+async def test_incidents_are_deduplicated_across_windows() -> None:
+    # One incident a minute, so many fall on the hour window boundaries.
+    async with PagerDutySimulator(incidents=24 * 60, incident_span=DAY) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            since = INCIDENTS_UNTIL - DAY
+            pages = [page async for page in pd.list_incidents_raw(
+                since, INCIDENTS_UNTIL, windows=24)]
+            raw_ids = [item["id"] for page in pages
+                       for item in json.loads(page.body)["incidents"]]
+            incidents = [incident async for incident in pd.iter_incidents(
+                since, INCIDENTS_UNTIL, windows=24)]
+
+    assert_that(len(raw_ids)).is_greater_than(24 * 60)
+    assert_that([i.id for i in incidents]).is_length(
+        24 * 60).does_not_contain_duplicates()
+    assert_that({i.id for i in incidents}).is_equal_to(set(raw_ids))
+
+
+async def test_dense_windows_are_split() -> None:
+    # The day holds more incidents than can be paged through.
+    async with PagerDutySimulator(incidents=12000, incident_span=DAY) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            incidents = [incident async for incident in pd.iter_incidents(
+                INCIDENTS_UNTIL - DAY * 2, INCIDENTS_UNTIL, windows=2)]
+
+    assert_that({i.id for i in incidents}).is_length(12000)
+    assert_that(sim.responses[400]).is_zero()
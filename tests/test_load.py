@@ -0,0 +1,96 @@
+"""End-to-end load tests against the local PagerDuty API simulator"""
+
+import asyncio
+from http import HTTPStatus
+
+import aiopagerduty
+import pytest
+from aiopagerduty.models import ServiceOrchestrationStatus, UserInfo
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator, uniform_latency
+
+
+async def test_crawl_all_endpoints() -> None:
+    async with PagerDutySimulator(services=250, users=120) as sim:
+        async with aiopagerduty.Client("sim", base_url=sim.url) as pd:
+            services = await pd.list_services()
+            assert_that(services).is_length(250)
+            assert_that(await pd.list_users()).is_length(120)
+            assert_that(await pd.list_vendors()).is_length(50)
+            assert_that(await pd.list_priorities()).is_length(5)
+            assert_that(await pd.list_escalation_policies()).is_length(50)
+            assert_that(await pd.list_response_plays()).is_length(10)
+
+            teams = await pd.list_teams()
+            members = await pd.list_team_members(teams[0])
+            assert_that(members).is_length(10)
+
+            svc = services[0]
+            assert_that((await pd.list_service(svc.id)).id).is_equal_to(svc.id)
+            orch = await pd.list_service_orchestration(svc)
+            assert_that(orch.parent.id).is_equal_to(svc.id)
+            status = await pd.update_service_orchestration_status(
+                svc, ServiceOrchestrationStatus(active=False))
+            assert_that(status.active).is_false()
+            intg = await pd.list_integration(svc.id, svc.integrations[0].id)
+            assert_that(intg.service.id).is_equal_to(svc.id)
+
+    # Every page was requested exactly once.
+    assert_that(sim.requests["GET /services"]).is_equal_to(3)
+
+
+async def test_pages_smaller_than_asked() -> None:
+    # The API caps the page size below the limit asked.
+    async with PagerDutySimulator(services=95, max_limit=30) as sim:
+        async with aiopagerduty.Client("sim", base_url=sim.url) as pd:
+            services = await pd.list_services()
+    assert_that([s.id for s in services]).is_equal_to(
+        list(sim.data["services"]))
+    assert_that(sim.requests["GET /services"]).is_equal_to(4)
+
+
+async def test_user_lifecycle() -> None:
+    async with PagerDutySimulator(users=0) as sim:
+        async with aiopagerduty.Client("sim", base_url=sim.url) as pd:
+            user = await pd.create_user(
+                UserInfo(name="Load User", email="load@example.com"))
+            user.description = "updated"
+            updated = await pd.update_user(user)
+            assert_that(updated.description).is_equal_to("updated")
+            await pd.delete_user(updated)
+            assert_that(await pd.list_users()).is_empty()
+
+
+async def test_retries_throttled_and_failed_requests() -> None:
+    async with PagerDutySimulator(services=2000, throttle_rate=0.3,
+                                  error_rate=0.2, retry_after=0) as sim:
+        async with aiopagerduty.Client("sim", base_url=sim.url,
+                                       max_retries=10) as pd:
+            services = await pd.list_services()
+    assert_that(services).is_length(2000)
+    assert_that(sim.responses[HTTPStatus.TOO_MANY_REQUESTS]).is_positive()
+    assert_that(sim.responses[HTTPStatus.SERVICE_UNAVAILABLE]).is_positive()
+
+
+async def test_gives_up_after_max_retries() -> None:
+    async with PagerDutySimulator(throttle_rate=1.0, retry_after=0) as sim:
+        async with aiopagerduty.Client("sim", base_url=sim.url,
+                                       max_retries=2) as pd:
+            with pytest.raises(aiopagerduty.Error) as exc:
+                await pd.list_services()
+    assert_that(exc.value.status).is_equal_to(HTTPStatus.TOO_MANY_REQUESTS)
+    assert_that(sim.requests["GET /services"]).is_equal_to(3)
+
+
+async def test_concurrent_crawls_under_latency() -> None:
+    async with PagerDutySimulator(services=500, users=500,
+                                  latency=uniform_latency(0.001, 0.01),
+                                  throttle_rate=0.05, retry_after=0) as sim:
+        async with aiopagerduty.Client("sim", base_url=sim.url,
+                                       max_retries=10) as pd:
+            results = await asyncio.gather(
+                *[pd.list_services() for _ in range(5)],
+                *[pd.list_users() for _ in range(5)])
+    for result in results:
+        assert_that(result).is_length(500)
@@ -0,0 +1,109 @@
+"""On-call listing and cache tests"""
+
+import asyncio
+import datetime
+import time
+from typing import Any, List
+
+import aiopagerduty
+import pytest
+from aiopagerduty.models import OnCall
+from aiopagerduty.oncall import OnCallCache, OnCallLevel
+from assertpy import assert_that
+
+from benchmarks import payloads
+from tests.helpers.simulator import PagerDutySimulator
+
+UTC = datetime.timezone.utc
+SHIFT = datetime.timedelta(hours=8)
+
+
+def _at(hour: int) -> datetime.datetime:
+    return datetime.datetime(2023, 1, 1, hour, tzinfo=UTC)
+
+
+def test_overlapping_oncalls() -> None:
+    oncalls = [
+        OnCall(**payloads.oncall_json(0, 1, 1, _at(0), _at(8))),
+        OnCall(**payloads.oncall_json(0, 1, 2, _at(6), _at(14))),
+        OnCall(**payloads.oncall_json(0, 1, 3, None, None)),
+    ]
+    level = OnCallLevel(oncalls, _at(2).timestamp(), _at(12).timestamp())
+
+    def users(hour: int) -> List[str]:
+        return sorted(user.summary for user in level.at(_at(hour).timestamp()))
+
+    assert_that(users(1)).is_empty()
+    assert_that(users(2)).is_equal_to(["User 1", "User 3"])
+    assert_that(users(7)).is_equal_to(["User 1", "User 2", "User 3"])
+    assert_that(users(8)).is_equal_to(["User 2", "User 3"])
+    assert_that(users(12)).is_empty()
+
+
+async def test_list_oncalls() -> None:
+    async with PagerDutySimulator(escalation_policies=5,
+                                  oncall_shift=SHIFT) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            policy_id = payloads.escalation_policy_json(2)["id"]
+            oncalls = await pd.list_oncalls([policy_id], _at(0), _at(23))
+    assert_that({oncall.escalation_policy.id for oncall in oncalls}
+                ).is_equal_to({policy_id})
+    shifts = [oncall for oncall in oncalls if oncall.escalation_level == 1]
+    assert_that(shifts).is_length(3)
+    assert_that(shifts[1].start).is_equal_to(_at(8))
+    assert_that(shifts[1].schedule).is_not_none()
+    assert_that([oncall.start for oncall in oncalls
+                 if oncall.escalation_level > 1]).is_equal_to([None, None])
+
+
+async def test_cache_prefetches_next_window() -> None:
+    async with PagerDutySimulator(
+            escalation_policies=60,
+            oncall_shift=datetime.timedelta(seconds=1)) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            policy_ids = list(sim.data["escalation_policies"])
+            async with OnCallCache(
+                    pd, policy_ids, window=datetime.timedelta(seconds=2),
+                    lead=datetime.timedelta(seconds=1)) as cache:
+                now = time.time()
+                assert_that([user.id for user in cache.users(
+                    policy_ids[7], 1, datetime.datetime.fromtimestamp(
+                        now, UTC))]).is_equal_to(
+                        [payloads.user_json(sim.oncall_user(7, now))["id"]])
+                assert_that([user.id for user in cache.users(
+                    policy_ids[7], 3)]).is_equal_to(
+                        [payloads.user_json(7 * 3 + 2)["id"]])
+                assert_that(cache.users("PUNKNOWN", 1)).is_empty()
+
+                await asyncio.sleep(1.3)
+                assert_that(cache.stats["windows"]).is_equal_to(2)
+                later = datetime.datetime.fromtimestamp(now + 2.5, UTC)
+                assert_that([user.id for user in cache.users(
+                    policy_ids[7], 1, later)]).is_equal_to([
+                        payloads.user_json(
+                            sim.oncall_user(7, later.timestamp()))["id"]
+                    ])
+                with pytest.raises(LookupError):
+                    cache.users(policy_ids[7], 1, later + datetime.timedelta(
+                        hours=1))
+
+
+async def test_prefetch_survives_unexpected_errors() -> None:
+    async with PagerDutySimulator(escalation_policies=5) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            list_oncalls = pd.list_oncalls
+
+            async def invalid(*args: Any) -> Any:
+                raise ValueError("invalid on-call")
+
+            async with OnCallCache(
+                    pd, list(sim.data["escalation_policies"]),
+                    window=datetime.timedelta(seconds=1),
+                    lead=datetime.timedelta(seconds=0.5),
+                    retry_delay=0.1) as cache:
+                pd.list_oncalls = invalid  # type: ignore[method-assign]
+                await asyncio.sleep(0.8)
+                assert_that(cache.stats["errors"]).is_greater_than(0)
+                pd.list_oncalls = list_oncalls  # type: ignore[method-assign]
+                await asyncio.sleep(0.3)
+                assert_that(cache.stats["windows"]).is_equal_to(2)
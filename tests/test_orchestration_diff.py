@@ -0,0 +1,110 @@
+"""Service orchestration diff and conditional update tests"""
+
+import asyncio
+
+import aiopagerduty
+import pytest
+from aiopagerduty.models import ObjectRef, ServiceOrchestration
+from aiopagerduty.orchestrationdiff import (ADDED, CHANGED, REMOVED,
+                                            REORDERED, diff)
+from assertpy import assert_that
+
+from benchmarks import payloads
+from tests.helpers.simulator import PagerDutySimulator
+
+
+def _orchestration() -> ServiceOrchestration:
+    return ServiceOrchestration(
+        **payloads.service_orchestration_json(0, sets=3, rules=3))
+
+
+def test_identical_orchestrations_have_no_changes() -> None:
+    live = _orchestration()
+    desired = _orchestration()
+    desired.version = "other"
+    desired.updated_at = None
+    assert_that(diff(live, desired)).is_empty()
+
+
+def test_changes_are_structural() -> None:
+    live = _orchestration()
+    desired = _orchestration()
+    assert desired.sets is not None
+    start = desired.sets[0]
+    start.rules[1].actions.severity = "info"
+    start.rules[2].conditions = []
+    start.rules.reverse()
+    del desired.sets[2]
+    desired.catch_all.actions.suppress = False
+
+    changes = diff(live, desired)
+    assert_that([(c.op, c.path) for c in changes]).contains_only(
+        (REMOVED, "sets[set2]"),
+        (CHANGED, "sets[start].rules[00000002].conditions"),
+        (CHANGED, "sets[start].rules[00000001].actions.severity"),
+        (REORDERED, "sets[start].rules"),
+        (CHANGED, "catch_all.actions.suppress"),
+    )
+    severity = [c for c in changes if c.path.endswith("severity")][0]
+    assert_that((severity.old, severity.new)).is_equal_to(
+        ("critical", "info"))
+
+
+def test_added_rule() -> None:
+    live = _orchestration()
+    desired = _orchestration()
+    assert live.sets is not None
+    live.sets[1].rules.pop()
+    changes = diff(live, desired)
+    assert_that(changes).is_length(1)
+    assert_that(changes[0].op).is_equal_to(ADDED)
+    assert_that(changes[0].path).is_equal_to("sets[set1].rules[00010002]")
+
+
+async def test_update_only_writes_changed_services() -> None:
+    async with PagerDutySimulator(services=30) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            services = await pd.list_services()
+            orchestrations = await asyncio.gather(
+                *(pd.list_service_orchestration(s) for s in services))
+            for orch in orchestrations[:3]:
+                assert orch.sets is not None
+                orch.sets[0].rules[0].actions.annotate = "Changed"
+
+            results = await asyncio.gather(
+                *(pd.update_service_orchestration(orch)
+                  for orch in orchestrations))
+            assert_that([len(r) for r in results]).is_equal_to([1] * 3 +
+                                                               [0] * 27)
+            updated = await pd.list_service_orchestration(services[0])
+            assert_that(diff(updated, orchestrations[0])).is_empty()
+
+    puts = [r for r in sim.requests
+            if r.startswith("PUT /event_orchestrations/")]
+    assert_that(puts).is_length(3)
+
+
+async def test_update_is_version_guarded() -> None:
+    async with PagerDutySimulator(services=1) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            service = ObjectRef(**(await pd.list_services())[0].dict())
+            stale = await pd.list_service_orchestration(service)
+            concurrent = await pd.list_service_orchestration(service)
+            assert concurrent.sets is not None
+            concurrent.sets[0].rules[0].label = "Concurrent edit"
+            await pd.update_service_orchestration(concurrent)
+
+            assert stale.sets is not None
+            stale.sets[0].rules[0].label = "Stale edit"
+            with pytest.raises(aiopagerduty.Error) as ex:
+                await pd.update_service_orchestration(stale)
+            assert_that(ex.value.status).is_equal_to(409)
+            # Live rules given by the caller are not trusted for the check.
+            with pytest.raises(aiopagerduty.Error) as ex:
+                await pd.update_service_orchestration(stale, live=stale)
+            assert_that(ex.value.status).is_equal_to(409)
+
+            live = await pd.list_service_orchestration(service)
+            assert live.sets is not None
+            assert_that(live.sets[0].rules[0].label).is_equal_to(
+                "Concurrent edit")
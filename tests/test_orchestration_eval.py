@@ -0,0 +1,154 @@
+"""PCL compiler and orchestration evaluation tests"""
+
+from typing import Any, Dict
+
+import pytest
+from aiopagerduty.models import ServiceOrchestration
+from aiopagerduty.orchestrationeval import CompiledOrchestration, changed
+from aiopagerduty.pcl import Compiler, PCLError, compile_expression
+from assertpy import assert_that
+
+from benchmarks import payloads
+
+EVENT: Dict[str, Any] = {
+    "event": {
+        "summary": "High CPU on web1 server",
+        "severity": "critical",
+        "custom_details": {"env": "prod", "load": 12.5, "paged": True},
+    }
+}
+
+
+@pytest.mark.parametrize("expression,expected", [
+    ("event.summary matches 'High CPU on web1 server'", True),
+    ("event.summary matches 'High CPU'", False),
+    ("event.summary matches part 'CPU'", True),
+    ("event.summary matches regex 'web\\d'", True),
+    ("event.summary matches regex '^web'", False),
+    ("event.source exists", False),
+    ("not event.source exists", True),
+    ("event.source matches part ''", False),
+    ("event.custom_details.load > 10", True),
+    ("event.custom_details.load <= 10", False),
+    ("event.custom_details.paged == true", True),
+    ("event.severity != 'info' and event.custom_details.env matches 'prod'",
+     True),
+    ("event.severity matches 'info' or (event.custom_details.env "
+     "matches part 'pro' and not event.summary matches part 'disk')", True),
+])
+def test_expressions(expression: str, expected: bool) -> None:
+    assert_that(compile_expression(expression)(EVENT)).is_equal_to(expected)
+
+
+@pytest.mark.parametrize("expression", [
+    "event.summary matches",
+    "event.summary ~ 'x'",
+    "(event.source exists",
+    "event.summary matches regex '('",
+    "event.summary > ",
+])
+def test_invalid_expressions(expression: str) -> None:
+    with pytest.raises(PCLError):
+        compile_expression(expression)
+
+
+def test_shared_subexpressions_are_evaluated_once() -> None:
+    calls = []
+
+    class Recorder(dict):  # type: ignore[type-arg]
+        def get(self, key: Any, default: Any = None) -> Any:
+            calls.append(key)
+            return super().get(key, default)
+
+    compiler = Compiler()
+    first = "event.severity matches 'critical' and event.source exists"
+    second = "event.severity matches 'critical' and not event.source exists"
+    compiler.add(first)
+    compiler.add(second)
+    predicates = [compiler.compile(first), compiler.compile(second)]
+    doc = {"event": Recorder(severity="critical")}
+    memo = compiler.new_memo()
+    assert_that([p(doc, memo) for p in predicates]).is_equal_to(
+        [False, True])
+    assert_that(calls).is_equal_to(["severity", "source"])
+
+
+def test_literals_of_equal_values_are_not_shared() -> None:
+    # 1 == True == 1.0 in Python, but the tests differ.
+    expressions = ["event.custom_details.n == 1",
+                   "event.custom_details.n == true",
+                   "event.custom_details.n == 1.0"]
+    compiler = Compiler()
+    for expression in expressions:
+        compiler.add(expression)
+    predicates = [compiler.compile(e) for e in expressions]
+    doc = {"event": {"custom_details": {"n": "true"}}}
+    assert_that([p(doc, compiler.new_memo()) for p in predicates]
+                ).is_equal_to([False, True, False])
+    doc = {"event": {"custom_details": {"n": 1}}}
+    assert_that([p(doc, compiler.new_memo()) for p in predicates]
+                ).is_equal_to([True, False, True])
+
+
+def _orchestration() -> ServiceOrchestration:
+    return ServiceOrchestration(
+        **payloads.service_orchestration_json(0, sets=3, rules=3))
+
+
+def _event(env: str, summary: str = "Disk full") -> Dict[str, Any]:
+    return {"event": {"summary": summary, "custom_details": {"env": env}}}
+
+
+def test_routes_through_sets() -> None:
+    rules = CompiledOrchestration(_orchestration())
+    match = rules.evaluate(_event("env1"))
+    # Each set routes to the next one, the last set ends the evaluation.
+    assert_that(match.rules).is_equal_to(
+        ("00000001", "00010001", "00020001"))
+    assert_that(match.catch_all).is_false()
+    assert_that(match.actions).is_length(3)
+
+
+def test_catch_all() -> None:
+    orchestration = _orchestration()
+    rules = CompiledOrchestration(orchestration)
+    match = rules.evaluate(_event("env9"))
+    assert_that(match.rules).is_empty()
+    assert_that(match.catch_all).is_true()
+    assert_that(match.actions).is_equal_to(
+        (orchestration.catch_all.actions,))
+
+    # Disabled rules never match.
+    assert orchestration.sets is not None
+    orchestration.sets[1].rules[1].disabled = True
+    match = CompiledOrchestration(orchestration).evaluate(_event("env1"))
+    assert_that(match.rules).is_equal_to(("00000001",))
+    assert_that(match.catch_all).is_true()
+
+
+def test_invalid_routes() -> None:
+    orchestration = _orchestration()
+    assert orchestration.sets is not None
+    orchestration.sets[2].rules[0].actions.route_to = "start"
+    with pytest.raises(PCLError):
+        CompiledOrchestration(orchestration)
+    orchestration.sets[2].rules[0].actions.route_to = "missing"
+    with pytest.raises(PCLError):
+        CompiledOrchestration(orchestration)
+
+
+def test_batch_and_changed() -> None:
+    live = _orchestration()
+    desired = _orchestration()
+    assert desired.sets is not None
+    desired.sets[0].rules[2].conditions[0].expression = (
+        "event.custom_details.env matches 'env3'")
+    events = [_event(f"env{i % 4}") for i in range(100)]
+
+    matches = list(CompiledOrchestration(live).evaluate_batch(events))
+    assert_that(sum(m.catch_all for m in matches)).is_equal_to(25)
+
+    diffs = list(changed(live, desired, events))
+    assert_that(diffs).is_length(50)
+    assert_that({d[0]["event"]["custom_details"]["env"]
+                 for d in diffs}).is_equal_to({"env2", "env3"})
@@ -0,0 +1,69 @@
+"""Client pool and rate limiter tests"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import aiopagerduty
+from aiopagerduty.ratelimit import RateLimiter
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator
+
+
+async def test_rate_limiter_spaces_requests() -> None:
+    limiter = RateLimiter(rate=20, period=1.0, burst=1)
+    start = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+    assert_that(time.monotonic() - start).is_greater_than_or_equal_to(0.15)
+
+
+async def test_rate_limiter_pause() -> None:
+    limiter = RateLimiter(rate=1000, period=1.0)
+    limiter.pause(0.1)
+    start = time.monotonic()
+    await limiter.acquire()
+    assert_that(time.monotonic() - start).is_greater_than_or_equal_to(0.09)
+
+
+async def test_pool_isolates_account_failures() -> None:
+    keys = {"a": "key-a", "b": "key-b", "revoked": "key-revoked"}
+    async with PagerDutySimulator(services=150,
+                                  api_keys={"key-a", "key-b"}) as sim:
+        async with aiopagerduty.ClientPool(keys, base_url=sim.url) as pool:
+            results = await pool.gather(lambda pd: pd.list_services())
+
+    assert_that(results).contains_only("a", "b", "revoked")
+    assert_that(results["a"].value).is_length(150)
+    assert_that(results["b"].value).is_length(150)
+    assert_that(results["revoked"].ok).is_false()
+    assert_that(results["revoked"].error.status).is_equal_to(
+        HTTPStatus.UNAUTHORIZED)
+
+
+async def test_pool_streams_results_with_budget() -> None:
+    keys = {f"account-{n}": f"key-{n}" for n in range(4)}
+    async with PagerDutySimulator(users=300, rate_limit=2,
+                                  rate_window=0.5) as sim:
+        async with aiopagerduty.ClientPool(keys, rate=3, period=1.0,
+                                           base_url=sim.url) as pool:
+            accounts = []
+            async for result in pool.run(lambda pd: pd.list_users()):
+                assert_that(result.ok).is_true()
+                assert_that(result.value).is_length(300)
+                accounts.append(result.account)
+    assert_that(accounts).contains_only(*keys)
+    # Each client kept within its budget and was never throttled.
+    assert_that(sim.responses[HTTPStatus.TOO_MANY_REQUESTS]).is_zero()
+
+
+async def test_pool_builds_models_in_process_pool() -> None:
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        async with PagerDutySimulator(services=120) as sim:
+            async with aiopagerduty.ClientPool({"a": "key"}, base_url=sim.url,
+                                               executor=executor) as pool:
+                results = await pool.gather(lambda pd: pd.list_services())
+    services = results["a"].value
+    assert_that(services).is_length(120)
+    assert_that(services[0]).is_instance_of(aiopagerduty.Service)
@@ -0,0 +1,124 @@
+"""Caching proxy tests"""
+
+import asyncio
+from http import HTTPStatus
+
+import aiohttp
+import aiopagerduty
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiopagerduty.models import UserInfo
+from aiopagerduty.proxy import CachingProxy
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator, constant_latency
+
+
+async def test_workers_share_cached_reads() -> None:
+    async with PagerDutySimulator(services=250,
+                                  latency=constant_latency(0.02)) as sim:
+        async with CachingProxy("upstream", upstream_url=sim.url) as proxy:
+            workers = [aiopagerduty.Client(f"worker-{n}", base_url=proxy.url)
+                       for n in range(8)]
+            for worker in workers:
+                await worker.__aenter__()
+            results = await asyncio.gather(
+                *[worker.list_services() for worker in workers])
+            results.append(await workers[0].list_services())
+            for worker in workers:
+                await worker.__aexit__(None, None, None)
+
+    for result in results:
+        assert_that(result).is_length(250)
+    # 3 pages fetched once upstream, with the upstream key only.
+    assert_that(sim.requests["GET /services"]).is_equal_to(3)
+    assert_that(sim.api_keys).is_equal_to({"Token token=upstream": 3})
+    assert_that(proxy.stats["misses"]).is_equal_to(3)
+    assert_that(proxy.stats["coalesced"] + proxy.stats["hits"]).is_equal_to(24)
+
+
+async def test_writes_pass_through_and_invalidate() -> None:
+    async with PagerDutySimulator(users=5) as sim:
+        async with CachingProxy("upstream", upstream_url=sim.url) as proxy:
+            async with aiopagerduty.Client("w", base_url=proxy.url) as pd:
+                assert_that(await pd.list_users()).is_length(5)
+                user = await pd.create_user(
+                    UserInfo(name="New User", email="new@example.com"))
+                assert_that(await pd.list_users()).is_length(6)
+                await pd.delete_user(user)
+                assert_that(await pd.list_users()).is_length(5)
+                # Other collections stay cached.
+                await pd.list_services()
+                await pd.list_services()
+
+    assert_that(sim.requests["GET /users"]).is_equal_to(3)
+    assert_that(sim.requests["GET /services"]).is_equal_to(1)
+
+
+async def test_upstream_errors_are_forwarded() -> None:
+    async with PagerDutySimulator() as sim:
+        async with CachingProxy("upstream", upstream_url=sim.url) as proxy:
+            async with aiopagerduty.Client("w", base_url=proxy.url) as pd:
+                try:
+                    await pd.list_user("PMISSING")
+                except aiopagerduty.Error as ex:
+                    assert_that(ex.status).is_equal_to(HTTPStatus.NOT_FOUND)
+                else:
+                    raise AssertionError("expected an Error")
+
+
+async def test_upstream_error_details_are_passed_through() -> None:
+    details = {"error": {"message": "Invalid Input Provided", "code": 2001,
+                         "errors": ["Email is already taken"]}}
+
+    async def reject(_: web.Request) -> web.Response:
+        return web.json_response(details, status=HTTPStatus.BAD_REQUEST)
+
+    app = web.Application()
+    app.router.add_post("/users", reject)
+    async with TestServer(app) as upstream:
+        async with CachingProxy("upstream",
+                                upstream_url=str(upstream.make_url(""))
+                                ) as proxy:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f"{proxy.url}/users",
+                                        json={"user": {}}) as resp:
+                    assert_that(resp.status).is_equal_to(
+                        HTTPStatus.BAD_REQUEST)
+                    assert_that(await resp.json()).is_equal_to(details)
+
+
+async def test_workers_need_a_token() -> None:
+    async with PagerDutySimulator(users=5) as sim:
+        async with CachingProxy("upstream", upstream_url=sim.url,
+                                tokens=["secret"]) as proxy:
+            async with aiopagerduty.Client("secret", base_url=proxy.url) as pd:
+                users = await pd.list_users()
+            async with aiopagerduty.Client("guess", base_url=proxy.url) as pd:
+                try:
+                    await pd.delete_user(users[0])
+                except aiopagerduty.Error as ex:
+                    assert_that(ex.status).is_equal_to(
+                        HTTPStatus.UNAUTHORIZED)
+                else:
+                    raise AssertionError("expected an Error")
+    assert_that(users).is_length(5)
+    assert_that(sim.data["users"]).contains_key(users[0].id)
+    assert_that(proxy.stats["unauthorized"]).is_equal_to(1)
+
+
+async def test_bad_requests_and_upstream_failures() -> None:
+    async with PagerDutySimulator() as sim:
+        upstream_url = sim.url
+    # The simulator is gone, so upstream connections are refused.
+    async with CachingProxy("upstream", upstream_url=upstream_url) as proxy:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{proxy.url}/users", data=b"{not json",
+                                    headers={"Content-Type":
+                                             "application/json"}) as resp:
+                assert_that(resp.status).is_equal_to(HTTPStatus.BAD_REQUEST)
+                assert_that((await resp.json())["error"]["code"]
+                            ).is_equal_to(HTTPStatus.BAD_REQUEST)
+            async with session.get(f"{proxy.url}/users") as resp:
+                assert_that(resp.status).is_equal_to(HTTPStatus.BAD_GATEWAY)
+                assert_that(await resp.json()).contains_key("error")
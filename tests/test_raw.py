@@ -0,0 +1,40 @@
+"""Raw pass-through mode tests"""
+
+import json
+from http import HTTPStatus
+
+import aiopagerduty
+from aiopagerduty.fetcher import RawPage
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator
+
+
+def test_parse_pagination_from_tail() -> None:
+    body = b'{"users": [{"id": "P1"}], "limit": 25, "offset": 50, "more": true}'
+    page = RawPage.parse(body, 50, 100)
+    assert_that(page.more).is_true()
+    assert_that(page.limit).is_equal_to(25)
+    assert_that(page.view.obj).is_same_as(body)
+
+
+def test_parse_falls_back_to_decoding() -> None:
+    page = RawPage.parse(b'{"more": false, "users": []}', 0, 100)
+    assert_that(page.more).is_false()
+    assert_that(page.limit).is_equal_to(100)
+
+
+async def test_raw_pages_match_decoded_list() -> None:
+    async with PagerDutySimulator(services=250, throttle_rate=0.5,
+                                  retry_after=0) as sim:
+        async with aiopagerduty.Client("sim", base_url=sim.url,
+                                       max_retries=10) as pd:
+            pages = [page async for page in pd.list_services_raw()]
+            services = await pd.list_services()
+
+    assert_that(pages).is_length(3)
+    assert_that([p.offset for p in pages]).is_equal_to([0, 100, 200])
+    ids = [item["id"] for page in pages
+           for item in json.loads(page.body)["services"]]
+    assert_that(ids).is_equal_to([s.id for s in services])
+    assert_that(sim.responses[HTTPStatus.TOO_MANY_REQUESTS]).is_positive()
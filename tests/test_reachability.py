@@ -0,0 +1,120 @@
+"""Service reachability index tests"""
+
+import time
+from typing import Any, Dict, List, Set
+
+from aiopagerduty.models import EscalationPolicy, Service, User
+from aiopagerduty.reachability import ReachabilityIndex
+from assertpy import assert_that
+
+from benchmarks import payloads
+
+
+def _ref(kind: str, obj_id: str) -> Dict[str, Any]:
+    return {"id": obj_id, "summary": obj_id, "self": f"{kind}s/{obj_id}",
+            "type": f"{kind}_reference"}
+
+
+SCHEDULE = _ref("schedule", "PSCHED1")
+
+
+def _policy(i: int, targets: List[Dict[str, Any]]) -> EscalationPolicy:
+    policy = payloads.escalation_policy_json(i)
+    policy["escalation_rules"] = [{
+        "id": f"PR{i}",
+        "escalation_delay_in_minutes": 30,
+        "targets": targets,
+    }]
+    return EscalationPolicy(**policy)
+
+
+def _user_ref(i: int) -> Dict[str, Any]:
+    return _ref("user", payloads.user_json(i)["id"])
+
+
+def _service(i: int, policy: int) -> Service:
+    service = payloads.service_json(i)
+    service["escalation_policy"]["id"] = (
+        payloads.escalation_policy_json(policy)["id"])
+    return Service(**service)
+
+
+def _index() -> ReachabilityIndex:
+    users = [User(**payloads.user_json(i)) for i in range(3)]
+    return ReachabilityIndex(
+        [_service(0, 0), _service(1, 1), _service(2, 1), _service(3, 2)],
+        [_policy(0, [_user_ref(0)]),
+         _policy(1, [_user_ref(0), SCHEDULE]),
+         _policy(2, [SCHEDULE])],
+        {"PSCHED1": [payloads.user_json(1)["id"]]},
+        users)
+
+
+def _ids(kind: str, *numbers: int) -> Set[str]:
+    make = {"service": payloads.service_json, "user": payloads.user_json}
+    return {make[kind](i)["id"] for i in numbers}
+
+
+def test_users_through_schedules() -> None:
+    index = _index()
+    assert_that(index.users_of(payloads.service_json(0)["id"])).is_equal_to(
+        _ids("user", 0))
+    assert_that(index.users_of(payloads.service_json(1)["id"])).is_equal_to(
+        _ids("user", 0, 1))
+    assert_that(index.services_reaching(payloads.user_json(1)["id"])
+                ).is_equal_to(_ids("service", 1, 2, 3))
+    # Teams of the policy and of the user on the schedule
+    assert_that(index.teams_of(payloads.service_json(3)["id"])).is_equal_to({
+        payloads.escalation_policy_json(2)["teams"][0]["id"],
+        payloads.user_json(1)["teams"][0]["id"],
+    })
+
+
+def test_blast_radius() -> None:
+    index = _index()
+    user0, user1 = payloads.user_json(0)["id"], payloads.user_json(1)["id"]
+    assert_that(index.services_losing_coverage([user0])).is_equal_to(
+        _ids("service", 0))
+    assert_that(index.services_losing_coverage([user0, user1])).is_equal_to(
+        _ids("service", 0, 1, 2, 3))
+    assert_that(index.uncovered_services()).is_empty()
+
+
+def test_incremental_updates() -> None:
+    index = _index()
+    user1 = payloads.user_json(1)["id"]
+    index.update_schedule("PSCHED1", [payloads.user_json(2)["id"]])
+    assert_that(index.services_reaching(user1)).is_empty()
+    assert_that(index.users_of(payloads.service_json(3)["id"])).is_equal_to(
+        _ids("user", 2))
+
+    index.update_policy(_policy(0, [SCHEDULE]))
+    assert_that(index.services_losing_coverage(
+        [payloads.user_json(0)["id"]])).is_empty()
+
+    index.remove_policy(payloads.escalation_policy_json(2)["id"])
+    assert_that(index.uncovered_services()).is_equal_to(_ids("service", 3))
+
+    index.update_service(_service(3, 1))
+    assert_that(index.uncovered_services()).is_empty()
+    assert_that(index.coverage()[payloads.service_json(3)["id"]]
+                ).is_equal_to(2)
+
+
+def test_large_catalog_queries() -> None:
+    schedules = {f"PSCHED{i}": [payloads.user_json(i * 5 + n)["id"]
+                                for n in range(5)]
+                 for i in range(200)}
+    policies = [_policy(i, [_user_ref(i % 1000),
+                            _ref("schedule", f"PSCHED{i % 200}")])
+                for i in range(1000)]
+    services = [_service(i, i % 1000) for i in range(3000)]
+    index = ReachabilityIndex(services, policies, schedules)
+    begin = time.perf_counter()
+    for i in range(100):
+        index.services_losing_coverage(schedules[f"PSCHED{i}"] +
+                                       [payloads.user_json(i)["id"]])
+    assert_that(time.perf_counter() - begin).is_less_than(1)
+    gone = schedules["PSCHED0"] + [payloads.user_json(0)["id"]]
+    assert_that(index.services_losing_coverage(gone)).is_equal_to(
+        _ids("service", 0, 1000, 2000))
@@ -0,0 +1,47 @@
+"""Shared transport tests"""
+
+import asyncio
+
+import aiopagerduty
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator, constant_latency
+
+
+async def test_clients_share_connection_pool() -> None:
+    async with PagerDutySimulator(services=300,
+                                  latency=constant_latency(0.01)) as sim:
+        async with aiopagerduty.Transport(limit=4) as transport:
+            clients = [aiopagerduty.Client(f"key-{n}", base_url=sim.url,
+                                           transport=transport)
+                       for n in range(10)]
+            for client in clients:
+                await client.__aenter__()
+            results = await asyncio.gather(
+                *[client.list_services() for client in clients])
+            for client in clients:
+                await client.__aexit__(None, None, None)
+            # Closing the clients leaves the shared transport open.
+            assert_that(transport.is_open).is_true()
+
+    for result in results:
+        assert_that(result).is_length(300)
+    # Each client authenticated with its own key ...
+    assert_that(sim.api_keys).is_length(10)
+    for n in range(10):
+        assert_that(sim.api_keys[f"Token token=key-{n}"]).is_equal_to(3)
+    # ... over at most `limit` pooled connections.
+    assert_that(len(sim.connections)).is_less_than_or_equal_to(4)
+
+
+async def test_warmup_opens_connections() -> None:
+    async with PagerDutySimulator() as sim:
+        transport = aiopagerduty.Transport(warmup_url=sim.url,
+                                           warmup_connections=3)
+        async with transport:
+            assert_that(sim.requests["HEAD /"]).is_equal_to(3)
+            async with aiopagerduty.Client("key", base_url=sim.url,
+                                           transport=transport) as pd:
+                await pd.list_priorities()
+        assert_that(transport.is_open).is_false()
+    assert_that(sim.api_keys[""]).is_equal_to(3)
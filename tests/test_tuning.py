@@ -0,0 +1,116 @@
+"""Adaptive crawl tuning tests"""
+
+import json
+from pathlib import Path
+
+import aiopagerduty
+from aiopagerduty.tuning import AutoTuner, Settings, endpoint_family
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator, constant_latency
+
+
+def test_endpoint_family() -> None:
+    assert_that(endpoint_family("users?offset=0&limit=100")
+                ).is_equal_to("users")
+    assert_that(endpoint_family("teams/PT00001/members?limit=10")
+                ).is_equal_to("teams/members")
+    assert_that(endpoint_family("event_orchestrations/services/PS00003")
+                ).is_equal_to("event_orchestrations/services")
+
+
+def test_aimd() -> None:
+    tuner = AutoTuner(target_latency=1.0, max_page_bytes=1000,
+                      max_concurrency=4)
+    url = "vendors?offset=0&limit=100"
+    assert_that(tuner.settings(url)).is_equal_to(Settings(100, 1))
+    for _ in range(20):
+        tuner.record(url, 200, 0.1, 500)
+    assert_that(tuner.settings(url)).is_equal_to(Settings(100, 4))
+    # Throttling halves the concurrency, not the page size.
+    tuner.record(url, 429, 0.1, 100)
+    assert_that(tuner.settings(url)).is_equal_to(Settings(100, 2))
+
+    # Slow or large pages shrink the page size, then the concurrency.
+    users = "users?offset=0&limit=100"
+    for _ in range(10):
+        tuner.record(users, 200, 0.1, 500)
+    tuner.record(users, 200, 2.0, 500)
+    tuner.record(users, 200, 0.1, 5000)
+    assert_that(tuner.settings(users).limit).is_equal_to(25)
+    for _ in range(4):
+        tuner.record(users, 200, 2.0, 500)
+    assert_that(tuner.settings(users)).is_equal_to(Settings(10, 1))
+    # Other families and single items are not affected.
+    tuner.record("users/PU00001", 200, 5.0, 50000)
+    assert_that(tuner.settings(url)).is_equal_to(Settings(100, 2))
+    assert_that(tuner.stats["throttled"]).is_equal_to(1)
+
+
+def test_persistence(tmp_path: Path) -> None:
+    path = str(tmp_path / "tuning.json")
+    tuner = AutoTuner(path, max_concurrency=4)
+    for _ in range(10):
+        tuner.record("vendors?limit=100", 200, 0.1, 10)
+    tuner.record("users?limit=100", 200, 2.0, 10)
+    tuner.save()
+    loaded = AutoTuner(path, max_concurrency=3)
+    assert_that(loaded.settings("vendors")).is_equal_to(Settings(100, 3))
+    assert_that(loaded.settings("users")).is_equal_to(Settings(50, 1))
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert_that(AutoTuner(path).settings("users")).is_equal_to(
+        Settings(100, 1))
+
+
+async def test_tuned_crawls(tmp_path: Path) -> None:
+    path = str(tmp_path / "tuning.json")
+    async with PagerDutySimulator(users=450, services=30) as sim:
+        # User pages of 100 are larger than allowed.
+        tuner = AutoTuner(path, max_page_bytes=60000, max_concurrency=4)
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       tuner=tuner) as pd:
+            users = await pd.list_users()
+            for _ in range(3):
+                services = await pd.list_services()
+        assert_that([u.id for u in users]).is_equal_to(
+            list(sim.data["users"]))
+        assert_that([s.id for s in services]).is_equal_to(
+            list(sim.data["services"]))
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        assert_that(saved["users"][0]).is_less_than(100)
+        assert_that(saved["services"][1]).is_greater_than(1)
+
+        # The next run starts from the tuned settings, and crawls users
+        # concurrently.
+        sim.requests.clear()
+        sim.max_in_flight = 0
+        tuner = AutoTuner(path, max_page_bytes=60000, max_concurrency=4)
+        limit = tuner.settings("users").limit
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       tuner=tuner) as pd:
+            users = await pd.list_users()
+            raw = [page async for page in pd.list_users_raw()]
+    assert_that([u.id for u in users]).is_equal_to(list(sim.data["users"]))
+    assert_that(sim.max_in_flight).is_greater_than(1)
+    assert_that(raw[0].limit).is_less_than_or_equal_to(limit)
+    assert_that(sum(len(json.loads(p.body)["users"]) for p in raw)
+                ).is_equal_to(450)
+
+
+async def test_model_lists_are_crawled_concurrently(tmp_path: Path) -> None:
+    path = str(tmp_path / "tuning.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"users": [25, 4]}, f)
+    async with PagerDutySimulator(users=200,
+                                  latency=constant_latency(0.02)) as sim:
+        async with aiopagerduty.Client(
+                "k", base_url=sim.url,
+                tuner=AutoTuner(path, max_concurrency=4)) as pd:
+            users = await pd.list_users()
+    # The first page reads the total, the 7 others are fetched 4 at a time.
+    assert_that(sim.requests["GET /users"]).is_equal_to(8)
+    assert_that(sim.max_in_flight).is_equal_to(4)
+    assert_that([u.id for u in users]).is_equal_to(list(sim.data["users"]))
@@ -0,0 +1,126 @@
+"""Incident urgency evaluation tests"""
+
+import datetime
+import random
+from array import array
+from typing import Any, Dict, Optional
+
+import pytest
+from aiopagerduty.models import Service
+from aiopagerduty.urgency import SupportCalendar, UrgencyEvaluator
+from assertpy import assert_that
+
+from benchmarks import payloads
+
+UTC = datetime.timezone.utc
+
+
+def _service(i: int, rule: Dict[str, Any],
+             support_hours: Optional[Dict[str, Any]] = None) -> Service:
+    return Service(**{
+        **payloads.service_json(i),
+        "incident_urgency_rule": rule,
+        "support_hours": support_hours,
+    })
+
+
+def _support_hours(start: str, end: str,
+                   time_zone: str = "America/New_York") -> Dict[str, Any]:
+    return {
+        "type": "fixed_time_per_day",
+        "time_zone": time_zone,
+        "days_of_week": [1, 2, 3, 4, 5],
+        "start_time": start,
+        "end_time": end,
+    }
+
+
+SUPPORT_HOURS_RULE = {
+    "type": "use_support_hours",
+    "during_support_hours": {"type": "constant", "urgency": "high"},
+    "outside_support_hours": {"type": "constant", "urgency": "low"},
+}
+
+
+def _at(*args: int) -> float:
+    return datetime.datetime(*args, tzinfo=UTC).timestamp()
+
+
+@pytest.mark.parametrize("at,expected", [
+    (_at(2023, 3, 10, 13, 30), False),  # Friday 08:30 EST
+    (_at(2023, 3, 10, 14, 0), True),  # Friday 09:00 EST
+    (_at(2023, 3, 10, 22, 0), False),  # Friday 17:00 EST
+    (_at(2023, 3, 11, 15, 0), False),  # Saturday
+    (_at(2023, 3, 13, 13, 30), True),  # Monday 09:30 EDT
+    (_at(2023, 3, 13, 20, 59), True),  # Monday 16:59 EDT
+    (_at(2023, 3, 13, 21, 0), False),  # Monday 17:00 EDT
+])
+def test_support_hours_follow_daylight_saving_time(at: float,
+                                                   expected: bool) -> None:
+    service = _service(0, SUPPORT_HOURS_RULE,
+                       _support_hours("09:00:00", "17:00:00"))
+    assert service.support_hours is not None
+    calendar = SupportCalendar(service.support_hours)
+    assert_that(calendar.contains(at)).is_equal_to(expected)
+
+
+def test_overnight_support_hours() -> None:
+    service = _service(0, SUPPORT_HOURS_RULE,
+                       _support_hours("22:00:00", "06:00:00", "Europe/Paris"))
+    assert service.support_hours is not None
+    calendar = SupportCalendar(service.support_hours)
+    assert_that(list(calendar.mask([
+        _at(2023, 6, 5, 21, 0),  # Monday 23:00 CEST
+        _at(2023, 6, 6, 3, 0),  # Tuesday 05:00 CEST
+        _at(2023, 6, 6, 5, 0),  # Tuesday 07:00 CEST
+        _at(2023, 6, 10, 2, 0),  # Saturday 04:00 CEST, from Friday
+        _at(2023, 6, 11, 2, 0),  # Sunday 04:00 CEST
+    ]))).is_equal_to([1, 1, 0, 1, 0])
+
+
+def test_batch_evaluation() -> None:
+    evaluator = UrgencyEvaluator([
+        _service(0, {"type": "constant", "urgency": "low"}),
+        _service(1, SUPPORT_HOURS_RULE, _support_hours("09:00", "17:00")),
+        _service(2, {"type": "constant", "urgency": "severity_based"}),
+    ])
+    service_ids = [payloads.service_json(i)["id"] for i in (0, 1, 1, 2)]
+    timestamps = array("d", [_at(2023, 3, 10, 15), _at(2023, 3, 10, 15),
+                             _at(2023, 3, 11, 15), _at(2023, 3, 10, 15)])
+    assert_that(evaluator.evaluate(service_ids, timestamps)).is_equal_to(
+        ["low", "high", "low", "severity_based"])
+    assert_that(evaluator.evaluate(
+        service_ids, timestamps,
+        ["info", "info", "info", "critical"])).is_equal_to(
+            ["low", "high", "low", "high"])
+    assert_that(evaluator.urgency(
+        service_ids[1], datetime.datetime(2023, 3, 13, 15, tzinfo=UTC))
+    ).is_equal_to("high")
+
+
+def test_batch_matches_local_times() -> None:
+    services = [
+        _service(i, SUPPORT_HOURS_RULE,
+                 _support_hours("08:30:00", "18:00:00", time_zone))
+        for i, time_zone in enumerate(
+            ["America/New_York", "Europe/London", "Asia/Kolkata"])
+    ]
+    evaluator = UrgencyEvaluator(services)
+    rand = random.Random(7)
+    start = _at(2023, 1, 1)
+    indexes = [rand.randrange(3) for _ in range(2000)]
+    timestamps = [start + rand.random() * 365 * 86400 for _ in range(2000)]
+    batch = evaluator.evaluate([services[i].id for i in indexes], timestamps)
+    for i, timestamp, urgency in zip(indexes, timestamps, batch):
+        support_hours = services[i].support_hours
+        assert support_hours is not None
+        local = datetime.datetime.fromtimestamp(
+            timestamp, SupportCalendar(support_hours).zone)
+        during = (local.isoweekday() <= 5 and
+                  datetime.time(8, 30) <= local.time() < datetime.time(18))
+        assert_that(urgency).is_equal_to("high" if during else "low")
+
+
+def test_support_hours_are_required() -> None:
+    with pytest.raises(ValueError):
+        UrgencyEvaluator([_service(0, SUPPORT_HOURS_RULE)])
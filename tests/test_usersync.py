@@ -0,0 +1,105 @@
+"""Bulk user sync tests"""
+
+from pathlib import Path
+
+import aiopagerduty
+import pytest
+from aiopagerduty.models import UserInfo
+from aiopagerduty.usersync import CREATE, DELETE, UPDATE, UserSync
+from assertpy import assert_that
+
+from benchmarks import payloads
+from tests.helpers.simulator import PagerDutySimulator
+
+
+def _info(i: int, **changes: str) -> UserInfo:
+    user = payloads.user_json(i)
+    user.update(changes)
+    return UserInfo(**user)
+
+
+async def test_sync(tmp_path: Path) -> None:
+    # Users 0-29 unchanged, 30-34 updated, 35-39 deleted, 40-44 created.
+    # Emails differing in case only are the same.
+    directory = [_info(i) for i in range(30)]
+    directory += [_info(i, job_title="Manager") for i in range(30, 35)]
+    directory += [_info(i) for i in range(40, 45)]
+    directory[0] = _info(0, email="USER0@Example.com")
+    async with PagerDutySimulator(users=40) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            sync = UserSync(pd, concurrency=4)
+            plan = await sync.plan(directory, delete_missing=True)
+            assert_that(plan.unchanged).is_equal_to(30)
+            actions = [item.action for item in plan.items]
+            assert_that(actions.count(CREATE)).is_equal_to(5)
+            assert_that(actions.count(UPDATE)).is_equal_to(5)
+            assert_that(actions.count(DELETE)).is_equal_to(5)
+
+            results = await sync.apply(plan)
+            assert_that([r.error for r in results if r.error]).is_empty()
+            sync.save_index(str(tmp_path / "index.json"))
+
+            users = {u["email"]: u for u in sim.data["users"].values()}
+            assert_that(users).is_length(40)
+            assert_that(users["user31@example.com"]["job_title"]
+                        ).is_equal_to("Manager")
+            assert_that(users).contains_key("user44@example.com")
+            assert_that(users).does_not_contain_key("user36@example.com")
+
+            # A new run with the saved index sends no request.
+            sim.requests.clear()
+            sync = UserSync(pd)
+            sync.load_index(str(tmp_path / "index.json"))
+            plan = await sync.plan(directory, delete_missing=True)
+            assert_that(plan.items).is_empty()
+            assert_that(plan.unchanged).is_equal_to(40)
+            assert_that(sim.requests).is_empty()
+
+
+async def test_failed_changes_are_reported(tmp_path: Path) -> None:
+    async with PagerDutySimulator(users=10) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            sync = UserSync(pd)
+            plan = await sync.plan([_info(i, job_title="Lead")
+                                    for i in range(10)])
+            del sim.data["users"][plan.items[2].user_id]
+            results = await sync.apply(plan)
+    errors = [r for r in results if r.error]
+    assert_that(errors).is_length(1)
+    assert_that(errors[0].item).is_equal_to(plan.items[2])
+    assert_that(errors[0].error).contains("404")
+    assert_that(results[3].error).is_none()
+    # Only the applied changes are recorded, the failed one is retried.
+    sync.save_index(str(tmp_path / "index.json"))
+    sync = UserSync(pd)
+    sync.load_index(str(tmp_path / "index.json"))
+    plan = await sync.plan([_info(i, job_title="Lead") for i in range(10)])
+    assert_that(plan.items).is_length(1)
+    assert_that(plan.unchanged).is_equal_to(9)
+
+
+async def test_unset_fields_are_not_synced() -> None:
+    async with PagerDutySimulator(users=3) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            sync = UserSync(pd)
+            plan = await sync.plan([
+                UserInfo(name="User 0", email="user0@example.com"),
+                UserInfo(name="User 1", email="user1@example.com",
+                         job_title="Lead"),
+            ])
+            assert_that(plan.unchanged).is_equal_to(1)
+            assert_that(plan.items).is_length(1)
+            assert_that(plan.items[0].data).is_equal_to({
+                "name": "User 1", "email": "user1@example.com",
+                "job_title": "Lead"})
+            await sync.apply(plan)
+    user = sim.data["users"][plan.items[0].user_id]
+    assert_that(user["job_title"]).is_equal_to("Lead")
+    assert_that(user["time_zone"]).is_equal_to("America/Los_Angeles")
+
+
+async def test_unknown_fields() -> None:
+    async with PagerDutySimulator() as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            with pytest.raises(ValueError, match="shoe_size"):
+                UserSync(pd, fields=["name", "shoe_size"])
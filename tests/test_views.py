@@ -0,0 +1,72 @@
+"""Lazy model view tests"""
+
+import datetime
+from typing import Any, Dict
+
+import aiopagerduty
+import pytest
+from aiopagerduty.models import ObjectRef, Service, User
+from aiopagerduty.views import ModelView
+from assertpy import assert_that
+from pydantic import BaseModel, ValidationError, validator
+
+from benchmarks import payloads
+from tests.helpers.simulator import PagerDutySimulator
+
+
+def test_fields_are_validated_on_access() -> None:
+    json_obj = payloads.service_json(3)
+    view = ModelView(Service, json_obj)
+    assert_that(view.name).is_equal_to("Service 3")
+    assert_that(view.created_at).is_instance_of(datetime.datetime)
+    assert_that(view.escalation_policy).is_instance_of(ObjectRef)
+    # Memoized
+    assert_that(view.escalation_policy).is_same_as(view.escalation_policy)
+    # Enums are stored as values, like the model does.
+    assert_that(view.status).is_equal_to(Service(**json_obj).status)
+    assert_that(view.support_hours).is_none()
+    assert_that(view.materialize()).is_equal_to(Service(**json_obj))
+
+
+def test_only_fields_read_are_validated() -> None:
+    json_obj = payloads.service_json(3)
+    json_obj["created_at"] = "not a date"
+    del json_obj["name"]
+    view = ModelView(Service, json_obj)
+    assert_that(view.id).is_equal_to("PS000003")
+    with pytest.raises(ValidationError):
+        _ = view.created_at
+    with pytest.raises(ValidationError):
+        _ = view.name
+    with pytest.raises(AttributeError):
+        _ = view.not_a_field
+    with pytest.raises(AttributeError):
+        view.name = "renamed"  # type: ignore[misc]
+    with pytest.raises(ValidationError):
+        view.materialize()
+
+
+async def test_lazy_lists() -> None:
+    async with PagerDutySimulator(services=150, users=30) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url) as pd:
+            services = await pd.list_services_lazy()
+            users = await pd.list_users_lazy()
+            expected = await pd.list_users()
+    assert_that([s.id for s in services]).is_equal_to(list(sim.data["services"]))
+    assert_that([u.materialize() for u in users]).is_equal_to(expected)
+    assert_that(users[0].materialize()).is_instance_of(User)
+
+
+def test_validators_reading_values_see_the_other_fields() -> None:
+    class Window(BaseModel):
+        start: int
+        end: int
+
+        @validator("end")
+        def _after_start(cls, value: int, values: Dict[str, Any]) -> int:
+            # pylint: disable=no-self-argument
+            return max(value, int(values["start"]))
+
+    view = ModelView(Window, {"start": 5, "end": 3})
+    assert_that(view.end).is_equal_to(5)
+    assert_that(view.start).is_equal_to(5)
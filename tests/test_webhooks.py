@@ -0,0 +1,74 @@
+"""Webhook receiver tests"""
+
+import json
+from typing import Any, Dict
+
+import aiohttp
+import aiopagerduty
+from aiopagerduty.cache import MemoryCache
+from aiopagerduty.webhooks import SIGNATURE_HEADER, WebhookReceiver, sign, verify
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator
+
+
+def webhook_body(event_type: str, resource: Dict[str, Any]) -> bytes:
+    return json.dumps({
+        "event": {
+            "id": "01DEN4HPBQAAAG05V5QQQAZ4FK",
+            "event_type": event_type,
+            "resource_type": event_type.split(".")[0],
+            "occurred_at": "2022-08-17T18:17:41.000Z",
+            "agent": None,
+            "data": resource,
+        }
+    }).encode()
+
+
+def test_verify_signatures() -> None:
+    body = b'{"event": {}}'
+    assert_that(verify(body, sign(body, "s1"), ["s1"])).is_true()
+    assert_that(verify(body, sign(body, "s1"), ["s2"])).is_false()
+    rotating = f"{sign(body, 'old')}, {sign(body, 'new')}"
+    assert_that(verify(body, rotating, ["new"])).is_true()
+    assert_that(verify(body, None, ["new"])).is_false()
+
+
+async def test_events_patch_cached_lists() -> None:
+    async with PagerDutySimulator(services=150) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       cache=MemoryCache()) as pd:
+            services = await pd.list_services()
+            updated_id, deleted_id = services[3].id, services[7].id
+            sim.data["services"][updated_id]["name"] = "Renamed"
+            del sim.data["services"][deleted_id]
+
+            async with WebhookReceiver(pd, ["secret"]) as receiver, \
+                    aiohttp.ClientSession() as session:
+                url = f"{receiver.url}/webhooks/pagerduty"
+                for event_type, svc_id in [("service.updated", updated_id),
+                                           ("service.deleted", deleted_id),
+                                           ("incident.triggered", "Q1")]:
+                    body = webhook_body(event_type, {"id": svc_id,
+                                                     "type": "service"})
+                    headers = {SIGNATURE_HEADER: sign(body, "secret")}
+                    async with session.post(url, data=body,
+                                            headers=headers) as resp:
+                        assert_that(resp.status).is_equal_to(204)
+
+                async with session.post(url, data=body,
+                                        headers={SIGNATURE_HEADER: "v1=0"}) as resp:
+                    assert_that(resp.status).is_equal_to(401)
+
+            services = {s.id: s for s in await pd.list_services()}
+
+    assert_that(services).is_length(149)
+    assert_that(services[updated_id].name).is_equal_to("Renamed")
+    assert_that(services).does_not_contain_key(deleted_id)
+    # The list itself was crawled once; only the updated service refetched.
+    assert_that(sim.requests["GET /services"]).is_equal_to(2)
+    assert_that(sim.requests[f"GET /services/{updated_id}"]).is_equal_to(1)
+    assert_that(receiver.stats).contains_entry({"rejected": 1},
+                                               {"refetched": 1},
+                                               {"removed": 1},
+                                               {"ignored": 1})
@@ -0,0 +1,65 @@
+"""Write-through cache coherence tests"""
+
+from pathlib import Path
+
+import aiopagerduty
+import pytest
+from aiopagerduty.cache import CacheBackend, MemoryCache
+from aiopagerduty.models import ServiceOrchestrationStatus, UserInfo
+from aiopagerduty.sqlitecache import SQLiteCache
+from assertpy import assert_that
+
+from tests.helpers.simulator import PagerDutySimulator
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request: pytest.FixtureRequest, tmp_path: Path) -> CacheBackend:
+    if request.param == "memory":
+        return MemoryCache()
+    return SQLiteCache(str(tmp_path / "cache.db"))
+
+
+async def test_user_writes_patch_cached_users(cache: CacheBackend) -> None:
+    async with PagerDutySimulator(users=20) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       cache=cache) as pd:
+            await pd.list_users()
+            created = await pd.create_user(
+                UserInfo(name="New User", email="new@example.com"))
+            assert_that([u.id for u in await pd.list_users()]).contains(
+                created.id)
+
+            created.job_title = "Manager"
+            await pd.update_user(created)
+            user = await pd.list_user(created.id)
+            assert_that(user.job_title).is_equal_to("Manager")
+
+            await pd.delete_user(user)
+            users = await pd.list_users()
+            assert_that(users).is_length(20)
+            assert_that([u.id for u in users]).does_not_contain(created.id)
+
+    # Read-your-writes without refetching the list or the user.
+    assert_that(sim.requests["GET /users"]).is_equal_to(1)
+    assert_that(sim.requests[f"GET /users/{created.id}"]).is_zero()
+
+
+async def test_integration_and_status_writes(cache: CacheBackend) -> None:
+    async with PagerDutySimulator(services=5) as sim:
+        async with aiopagerduty.Client("k", base_url=sim.url,
+                                       cache=cache) as pd:
+            service = (await pd.list_services())[0]
+            vendor = (await pd.list_vendors())[0]
+            intg = await pd.create_integration(service, vendor, "Monitor")
+            service = await pd.list_service(service.id)
+            assert_that([i.id for i in service.integrations]).contains(intg.id)
+
+            await pd.update_service_orchestration_status(
+                service, ServiceOrchestrationStatus(active=False))
+            status = await pd.list_service_orchestration_status(service)
+            assert_that(status.active).is_false()
+
+    # Statuses are not cached, they are always read from the API.
+    path = f"/event_orchestrations/services/{service.id}/active"
+    assert_that(sim.requests[f"GET {path}"]).is_equal_to(1)
+    assert_that(sim.requests[f"GET /services/{service.id}"]).is_zero()